@@ -0,0 +1,39 @@
+"""add_slot_to_challenges_and_prompts
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-18 10:12:31.507218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# dense slot numbering per network for constant time random selection, see src/subnet/validator/database/slots.py
+TABLES = ['challenge_funds_flow', 'challenge_balance_tracking', 'validation_prompt']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('slot', sa.Integer(), nullable=True))
+        op.execute(f"""
+            UPDATE {table} AS t SET slot = numbered.slot
+            FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY network ORDER BY id) - 1 AS slot FROM {table}) AS numbered
+            WHERE t.id = numbered.id
+        """)
+        op.alter_column(table, 'slot', nullable=False)
+        op.create_unique_constraint(op.f(f'uq__{table}__network_slot'), table, ['network', 'slot'])
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_constraint(op.f(f'uq__{table}__network_slot'), table, type_='unique')
+        op.drop_column(table, 'slot')
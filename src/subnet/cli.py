@@ -21,17 +21,21 @@ from src.subnet.validator.llm.factory import LLMFactory
 from src.subnet.validator.weights_storage import WeightsStorage
 from src.subnet.validator._config import ValidatorSettings, load_environment
 from src.subnet.validator.validator import Validator
+from src.subnet.validator.nodes.factory import NodeFactory
 from src.subnet.validator.llm_prompt_utility import main as llm_main
 from src.subnet.validator.challenge_utility import main as funds_flow_main, main as balance_tracking_main
+from src.subnet.validator.generator_supervisor import GeneratorSupervisor, run_prompt_generator_worker, run_challenge_generator_worker, get_generator_worker_mode
+from src.subnet.protocol.llm_engine import MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BALANCE_TRACKING
 
 
 
 class PromptGeneratorThread(threading.Thread):
-    def __init__(self, settings, environment, network, frequency, threshold, terminate_event, *args, **kwargs):
+    def __init__(self, settings, environment, network, node, frequency, threshold, terminate_event, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.settings = settings
         self.environment = environment
         self.network = network
+        self.node = node
         self.frequency = frequency
         self.threshold = threshold
         self.terminate_event = terminate_event
@@ -40,17 +44,18 @@ class PromptGeneratorThread(threading.Thread):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(llm_main(self.settings, self.network, self.frequency, self.threshold, self.terminate_event))
+            loop.run_until_complete(llm_main(self.settings, self.network, self.frequency, self.threshold, self.terminate_event, self.node))
         finally:
             loop.close()
 
 
 class FundsFlowChallengeGeneratorThread(threading.Thread):
-    def __init__(self, settings, environment, network, frequency, threshold, terminate_event, *args, **kwargs):
+    def __init__(self, settings, environment, network, node, frequency, threshold, terminate_event, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.settings = settings
         self.environment = environment
         self.network = network
+        self.node = node
         self.model = 'funds_flow'
         self.frequency = frequency
         self.threshold = threshold
@@ -60,17 +65,18 @@ class FundsFlowChallengeGeneratorThread(threading.Thread):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(funds_flow_main(self.settings, self.network, self.model, self.frequency, self.threshold, self.terminate_event))
+            loop.run_until_complete(funds_flow_main(self.settings, self.network, self.model, self.frequency, self.threshold, self.terminate_event, self.node))
         finally:
             loop.close()
 
 
 class BalanceTrackingChallengeGeneratorThread(threading.Thread):
-    def __init__(self, settings, environment, network, frequency, threshold, terminate_event, *args, **kwargs):
+    def __init__(self, settings, environment, network, node, frequency, threshold, terminate_event, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.settings = settings
         self.environment = environment
         self.network = network
+        self.node = node
         self.model = 'balance_tracking'
         self.frequency = frequency
         self.threshold = threshold
@@ -80,7 +86,7 @@ class BalanceTrackingChallengeGeneratorThread(threading.Thread):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(balance_tracking_main(self.settings, self.network, self.model, self.frequency, self.threshold, self.terminate_event))
+            loop.run_until_complete(balance_tracking_main(self.settings, self.network, self.model, self.frequency, self.threshold, self.terminate_event, self.node))
         finally:
             loop.close()
 
@@ -150,7 +156,9 @@ if __name__ == "__main__":
         llm,
         query_timeout=settings.QUERY_TIMEOUT,
         challenge_timeout=settings.CHALLENGE_TIMEOUT,
-        llm_query_timeout=settings.LLM_QUERY_TIMEOUT
+        llm_query_timeout=settings.LLM_QUERY_TIMEOUT,
+        module_client_pool_size=settings.MODULE_CLIENT_POOL_SIZE,
+        module_client_idle_timeout=settings.MODULE_CLIENT_IDLE_TIMEOUT
     )
 
 
@@ -168,53 +176,77 @@ if __name__ == "__main__":
     funds_flow_challenge_generator_threads = []
     balance_tracking_challenge_generator_threads = []
 
-    # Launch Prompt Generator Threads
-    for network in networks:
-        prompt_generator_thread = PromptGeneratorThread(
-            settings=settings,
-            environment=environment,
-            network=network,
-            frequency=settings.PROMPT_FREQUENCY,
-            threshold=settings.PROMPT_THRESHOLD,
-            terminate_event=validator.terminate_event
-        )
-        prompt_generator_threads.append(prompt_generator_thread)
-        prompt_generator_thread.start()
-
-    # Launch Funds Flow Challenge Generator Threads
-    for network in networks:
-        funds_flow_thread = FundsFlowChallengeGeneratorThread(
-            settings=settings,
-            environment=environment,
-            network=network,
-            frequency=settings.FUNDS_FLOW_CHALLENGE_FREQUENCY,
-            threshold=settings.FUNDS_FLOW_CHALLENGE_THRESHOLD,
-            terminate_event=validator.terminate_event
-        )
-        funds_flow_challenge_generator_threads.append(funds_flow_thread)
-        funds_flow_thread.start()
-
-    # Launch Balance Tracking Challenge Generator Threads
-    for network in networks:
-        balance_tracking_thread = BalanceTrackingChallengeGeneratorThread(
-            settings=settings,
-            environment=environment,
-            network=network,
-            frequency=settings.BALANCE_TRACKING_CHALLENGE_FREQUENCY,
-            threshold=settings.BALANCE_TRACKING_CHALLENGE_THRESHOLD,
-            terminate_event=validator.terminate_event
-        )
-        balance_tracking_challenge_generator_threads.append(balance_tracking_thread)
-        balance_tracking_thread.start()
+    supervisor = None
+
+    generator_worker_mode = get_generator_worker_mode(settings.GENERATOR_WORKER_MODE)
+    logger.info(f"Starting generators", worker_mode=generator_worker_mode)
+    if generator_worker_mode == 'process':
+        # generators run in worker processes, away from the GIL of the validation loop, each loading its own node
+        supervisor = GeneratorSupervisor(report_interval=settings.GENERATOR_REPORT_INTERVAL)
+        for network in networks:
+            supervisor.add_worker(f"prompt_{network}", run_prompt_generator_worker, environment, network, settings.PROMPT_FREQUENCY, settings.PROMPT_THRESHOLD)
+            supervisor.add_worker(f"funds_flow_{network}", run_challenge_generator_worker, environment, network, MODEL_TYPE_FUNDS_FLOW, settings.FUNDS_FLOW_CHALLENGE_FREQUENCY, settings.FUNDS_FLOW_CHALLENGE_THRESHOLD)
+            supervisor.add_worker(f"balance_tracking_{network}", run_challenge_generator_worker, environment, network, MODEL_TYPE_BALANCE_TRACKING, settings.BALANCE_TRACKING_CHALLENGE_FREQUENCY, settings.BALANCE_TRACKING_CHALLENGE_THRESHOLD)
+        supervisor.start()
+    else:
+        # one node (and tx_out index) per network, shared by the generator threads; the validator doesn't use one
+        nodes = {network: NodeFactory.get_shared_node(network) for network in networks}
+
+        # Launch Prompt Generator Threads
+        for network in networks:
+            prompt_generator_thread = PromptGeneratorThread(
+                settings=settings,
+                environment=environment,
+                network=network,
+                node=nodes[network],
+                frequency=settings.PROMPT_FREQUENCY,
+                threshold=settings.PROMPT_THRESHOLD,
+                terminate_event=validator.terminate_event
+            )
+            prompt_generator_threads.append(prompt_generator_thread)
+            prompt_generator_thread.start()
+
+        # Launch Funds Flow Challenge Generator Threads
+        for network in networks:
+            funds_flow_thread = FundsFlowChallengeGeneratorThread(
+                settings=settings,
+                environment=environment,
+                network=network,
+                node=nodes[network],
+                frequency=settings.FUNDS_FLOW_CHALLENGE_FREQUENCY,
+                threshold=settings.FUNDS_FLOW_CHALLENGE_THRESHOLD,
+                terminate_event=validator.terminate_event
+            )
+            funds_flow_challenge_generator_threads.append(funds_flow_thread)
+            funds_flow_thread.start()
+
+        # Launch Balance Tracking Challenge Generator Threads
+        for network in networks:
+            balance_tracking_thread = BalanceTrackingChallengeGeneratorThread(
+                settings=settings,
+                environment=environment,
+                network=network,
+                node=nodes[network],
+                frequency=settings.BALANCE_TRACKING_CHALLENGE_FREQUENCY,
+                threshold=settings.BALANCE_TRACKING_CHALLENGE_THRESHOLD,
+                terminate_event=validator.terminate_event
+            )
+            balance_tracking_challenge_generator_threads.append(balance_tracking_thread)
+            balance_tracking_thread.start()
 
     try:
         asyncio.run(validator.validation_loop(settings))
     except KeyboardInterrupt:
         logger.info("Validator loop interrupted")
 
+    if supervisor is not None:
+        supervisor.stop()
+
     # Wait for all threads to finish
     for thread in prompt_generator_threads + funds_flow_challenge_generator_threads + balance_tracking_challenge_generator_threads:
         thread.join()
         logger.info(f"Generator for {thread.network} ({getattr(thread, 'model', 'prompt')}) stopped successfully.")
 
+    NodeFactory.close_shared_nodes()
+
     logger.info("Validator, Prompt Generator, and Challenge Generator stopped successfully.")
@@ -22,6 +22,7 @@ class MinerSettings(BaseSettings):
 
     PORT: int = 9962
     WORKERS: int = 4
+    MAX_CONCURRENT_REQUESTS: int = 3  # challenges and prompts a validator sends at once, advertised in the discovery
 
     LLM_TYPE: str
     DATABASE_URL: str
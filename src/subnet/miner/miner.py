@@ -41,14 +41,16 @@ class Miner(Module):
         """
         Returns the network of the miner
         Returns:
-            dict: The network of the miner
+            dict: The network of the miner and the requests a validator may send it at once
             {
-                "network": "bitcoin"
+                "network": "bitcoin",
+                "max_concurrent_requests": 3
             }
         """
 
         return {
-            "network": self.settings.NETWORK
+            "network": self.settings.NETWORK,
+            "max_concurrent_requests": self.settings.MAX_CONCURRENT_REQUESTS
         }
 
     @endpoint
@@ -27,3 +27,4 @@ def get_networks():
 
 class Discovery(BaseModel):
     network: str = Field(NETWORK_BITCOIN, title="The network to discover")
+    max_concurrent_requests: int = Field(1, title="The challenge and prompt requests a validator sends the miner at once")
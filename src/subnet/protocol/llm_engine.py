@@ -115,7 +115,7 @@ class ChallengeMinerResponse(BaseModel):
     funds_flow_challenge_actual: Optional[str]
     balance_tracking_challenge_actual: Optional[int]
 
-    query_validation_result: bool
+    query_validation_result: Optional[bool] = None  # None when the step deadline cut the prompt phase short
 
     def get_failed_challenges(self):
         funds_flow_challenge_passed = self.funds_flow_challenge_expected == self.funds_flow_challenge_actual
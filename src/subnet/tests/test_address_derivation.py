@@ -0,0 +1,20 @@
+import unittest
+
+from src.subnet.validator.benchmarks.fixtures import FixtureChain, EARLY_CHAIN_SCRIPT_WEIGHTS
+from src.subnet.validator.nodes.bitcoin.node_utils import derive_addresses, get_pubkey_address, get_script_address
+
+
+class AddressDerivationTestCase(unittest.TestCase):
+
+    def test_derive_addresses_matches_fixture_addresses(self):
+        chain = FixtureChain(block_count=3, txs_per_block=40, script_weights={**EARLY_CHAIN_SCRIPT_WEIGHTS, "multisig": 5}, pubkey_pool_size=10)
+        vouts = [vout for block in chain.blocks for tx in block.transactions for vout in tx.vouts if vout.script_type in ("pubkey", "multisig")]
+
+        get_pubkey_address.cache_clear()
+        self.assertEqual(derive_addresses([vout.asm for vout in vouts]), [vout.address for vout in vouts])
+        self.assertLessEqual(get_pubkey_address.cache_info().misses, 10)
+        self.assertIsNone(get_script_address("OP_DUP OP_HASH160 00 OP_EQUALVERIFY"))
+
+
+if __name__ == '__main__':
+    unittest.main()
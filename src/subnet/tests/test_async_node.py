@@ -0,0 +1,59 @@
+import asyncio
+import json
+import time
+import unittest
+
+from src.subnet.validator.benchmarks.fixtures import FixtureChain, to_json_text
+from src.subnet.validator.benchmarks.rpc_server import FixtureRpcServer
+from src.subnet.validator.nodes.bitcoin.async_node import AsyncBitcoinNode
+from src.subnet.validator.nodes.bitcoin.node import BitcoinNode
+
+
+class AsyncBitcoinNodeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = FixtureChain(block_count=4, txs_per_block=60)
+        self.server = FixtureRpcServer(self.chain, latency=0.02).start()
+        self.node = BitcoinNode(self.server.url)
+        # verbosity 2 leaves every input to the prevout resolver
+        self.node.block_verbosity = 2
+
+    def tearDown(self):
+        self.node.rpc_pool.close()
+        self.server.stop()
+
+    def test_matches_bitcoin_node(self):
+        async def run():
+            async_node = AsyncBitcoinNode(self.node, max_concurrency=4)
+            try:
+                self.assertEqual(await async_node.get_current_block_height(), self.chain.tip_height)
+                for height in range(1, self.chain.tip_height + 1):
+                    self.assertEqual(await async_node.get_block_by_height(height), json.loads(to_json_text(self.chain.get_verbose_block(height, 2))))
+                    # resolved over rpc first, the prevout cache answers the BitcoinNode afterwards
+                    total_balance_change = await async_node.get_total_balance_change_from_inputs(height)
+                    self.assertEqual(total_balance_change, self.node.get_total_balance_change_from_inputs(height))
+                    self.assertEqual(await async_node.get_total_balance_change(height), total_balance_change)
+            finally:
+                await async_node.close()
+        asyncio.run(run())
+
+    def test_requests_overlap_up_to_the_limit(self):
+        tx_ids = list(self.chain.transactions)[:16]
+
+        async def run():
+            async_node = AsyncBitcoinNode(self.node, max_concurrency=4)
+            try:
+                start_time = time.perf_counter()
+                results = await asyncio.gather(*(async_node.get_txn_data_by_id(tx_id) for tx_id in tx_ids))
+                return results, time.perf_counter() - start_time, async_node.rpc_client.get_stats()
+            finally:
+                await async_node.close()
+
+        results, elapsed, stats = asyncio.run(run())
+        self.assertEqual([txn_data["txid"] for txn_data in results], tx_ids)
+        self.assertEqual(stats["max_in_flight"], 4)
+        self.assertLess(elapsed, len(tx_ids) * 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from src.subnet.validator.benchmarks.fixtures import FixtureChain
+from src.subnet.validator.nodes.bitcoin.node import BitcoinNode
+
+
+class FixtureRpcPool:
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.calls = []
+
+    def call(self, method, *args):
+        self.calls.append(method)
+        return self.chain.call(method, *args)
+
+    def batch(self, rpc_calls):
+        self.calls.extend(rpc_call[0] for rpc_call in rpc_calls)
+        return [self.chain.call(*rpc_call) for rpc_call in rpc_calls]
+
+    def get_stats(self):
+        return {}
+
+
+class BalanceTrackingFastPathTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = FixtureChain(block_count=5, txs_per_block=80)
+        self.node = BitcoinNode()
+        self.node.rpc_pool = FixtureRpcPool(self.chain)
+
+    def test_block_stats_match_resolving_every_input(self):
+        # the skipped outputs are the correction the fast path has to get right
+        self.assertTrue(any(vout.script_type == "nonstandard" and vout.value for block in self.chain.blocks for tx in block.transactions for vout in tx.vouts))
+        for block_format, block_verbosity in (("json", 3), ("json", 2), ("raw", 3)):
+            self.node.block_format, self.node.block_verbosity = block_format, block_verbosity
+            for height in range(self.chain.tip_height + 1):
+                expected = self.node.get_total_balance_change_from_inputs(height)
+
+                self.node.rpc_pool.calls.clear()
+                self.assertEqual(self.node.get_total_balance_change(height), expected, (block_format, block_verbosity, height))
+                self.assertEqual(self.node.rpc_pool.calls, ['getblockstats', 'getblockhash', 'getblock'])
+
+    def test_falls_back_when_block_stats_fail(self):
+        expected = self.node.get_total_balance_change_from_inputs(3)
+        call = self.node.rpc_pool.call
+
+        def call_without_block_stats(method, *args):
+            if method == 'getblockstats':
+                raise Exception("getblockstats unavailable")
+            return call(method, *args)
+        self.node.rpc_pool.call = call_without_block_stats
+
+        challenge, total_balance_change = self.node.create_balance_tracking_challenge(3)
+        self.assertEqual(challenge.block_height, 3)
+        self.assertEqual(total_balance_change, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+from decimal import Decimal
+
+from src.subnet.validator.nodes.bitcoin.block_cache import BlockCache
+
+
+def make_block(height, confirmations=100):
+    return {"height": height, "hash": f"hash-{height}", "confirmations": confirmations,
+            "tx": [{"txid": f"{height:064x}", "vout": [{"n": 0, "value": Decimal("0.00012345")}]}] * 50}
+
+
+class BlockCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip_and_unconfirmed_blocks(self):
+        cache = BlockCache(self.tmp_dir.name)
+        cache.put(1, "hash-1", 2, make_block(1))
+        cache.put(2, "hash-2", 2, make_block(2, confirmations=3))
+
+        self.assertEqual(cache.get(1, "hash-1", 2), make_block(1))
+        self.assertIsNone(cache.get(1, "hash-1", 3))
+        self.assertIsNone(cache.get(2, "hash-2", 2))
+        # a new instance picks up the entries written by another one
+        self.assertEqual(BlockCache(self.tmp_dir.name).get_stats()["entries"], 1)
+
+    def test_least_recently_used_blocks_are_evicted(self):
+        with tempfile.TemporaryDirectory() as other_dir:
+            sizing_cache = BlockCache(other_dir)
+            sizing_cache.put(0, "hash-0", 2, make_block(0))
+            entry_size = sizing_cache.get_stats()["size_bytes"]
+
+        cache = BlockCache(self.tmp_dir.name, max_size_bytes=entry_size * 2 + 64)
+        for height in range(2):
+            cache.put(height, f"hash-{height}", 2, make_block(height))
+            time.sleep(0.01)
+        self.assertIsNotNone(cache.get(0, "hash-0", 2))
+        time.sleep(0.01)
+        cache.put(2, "hash-2", 2, make_block(2))
+
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["0-hash-0-v2.blk", "2-hash-2-v2.blk"])
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_size_bound_is_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as other_dir:
+            sizing_cache = BlockCache(other_dir)
+            sizing_cache.put(0, "hash-0", 2, make_block(0))
+            entry_size = sizing_cache.get_stats()["size_bytes"]
+
+        # two caches on one directory stand in for two processes
+        first_cache = BlockCache(self.tmp_dir.name, max_size_bytes=entry_size * 2 + 64)
+        second_cache = BlockCache(self.tmp_dir.name, max_size_bytes=entry_size * 2 + 64)
+        for height in range(2):
+            first_cache.put(height, f"hash-{height}", 2, make_block(height))
+            time.sleep(0.01)
+        second_cache.put(2, "hash-2", 2, make_block(2))
+
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["1-hash-1-v2.blk", "2-hash-2-v2.blk"])
+        self.assertEqual(second_cache.get_stats()["evictions"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from src.subnet.validator.blockchain.bitcoin.funds_flow.challenge_generator import ChallengeGenerator
+
+
+class FakeChallenge:
+
+    def __init__(self, tx_id):
+        self.tx_id = tx_id
+
+    def json(self):
+        return f'{{"tx_id": "{self.tx_id}"}}'
+
+
+class FakeAsyncNode:
+
+    def __init__(self):
+        self.created = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_current_block_height(self):
+        return 1000
+
+    async def create_funds_flow_challenge(self, start_block_height, last_block_height):
+        self.created += 1
+        created = self.created
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if created == 3:
+            raise Exception("Failed to create a valid challenge.")
+        return FakeChallenge(f"{created:064x}"), f"{created:064x}"
+
+    async def close(self):
+        pass
+
+
+class FakeChallengeManager:
+
+    def __init__(self):
+        self.challenges = []
+        self.batches = []
+
+    async def get_challenge_count(self, network):
+        return len(self.challenges)
+
+    async def store_challenges(self, challenges, network, threshold):
+        self.batches.append(len(challenges))
+        self.challenges = (self.challenges + challenges)[-threshold:]
+
+
+class ChallengeBatchTestCase(unittest.TestCase):
+
+    def test_fills_pool_then_refreshes_batch_size(self):
+        node = FakeAsyncNode()
+        generator = ChallengeGenerator(SimpleNamespace(CHALLENGE_BATCH_SIZE=2, CHALLENGE_BATCH_WORKERS=4), SimpleNamespace(node_rpc_url="http://127.0.0.1:8332", rpc_pool=SimpleNamespace(timeout=30)))
+        generator.async_node = node
+        challenge_manager = FakeChallengeManager()
+
+        async def run():
+            await generator.generate_and_store(challenge_manager, 10)
+            await generator.generate_and_store(challenge_manager, 10)
+            await generator.shutdown()
+
+        asyncio.run(run())
+
+        # 10 requested on the empty pool in batches of 4 with one failed challenge, then 2 more
+        self.assertEqual(challenge_manager.batches, [3, 4, 2, 2])
+        self.assertEqual(len(challenge_manager.challenges), 10)
+        self.assertLessEqual(node.max_in_flight, 4)
+        self.assertEqual(challenge_manager.challenges[-1][1], f"{12:064x}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import random
+import unittest
+
+from src.subnet.validator.challenge_sampler import ChallengeSampler, ASSIGNMENT_COHORT
+
+
+class FakePoolManager:
+
+    def __init__(self, size: int):
+        self.items = [(f"challenge {i}", f"expected {i}") for i in range(size)]
+        self.queries = []
+
+    async def get_challenges(self, network, limit=None):
+        self.queries.append(network)
+        await asyncio.sleep(0.01)
+        items = self.items if network == "bitcoin" else []
+        return random.sample(items, min(limit, len(items))) if limit else items
+
+    get_prompts = get_challenges
+
+
+class ChallengeSamplerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.funds_flow, self.balance_tracking, self.prompts = FakePoolManager(50), FakePoolManager(50), FakePoolManager(10)
+
+    def sample_miners(self, sampler, miner_keys):
+        async def run():
+            return await asyncio.gather(*(
+                asyncio.gather(
+                    sampler.get_funds_flow_challenge("bitcoin", miner_key),
+                    sampler.get_balance_tracking_challenge("bitcoin", miner_key),
+                    sampler.get_prompt("bitcoin", miner_key),
+                ) for miner_key in miner_keys
+            ))
+
+        return asyncio.run(run())
+
+    def test_loads_each_pool_once_per_step(self):
+        sampler = ChallengeSampler(self.funds_flow, self.balance_tracking, self.prompts)
+        assignments = self.sample_miners(sampler, [f"miner {i}" for i in range(100)])
+
+        self.assertEqual((self.funds_flow.queries, self.balance_tracking.queries, self.prompts.queries), (["bitcoin"], ["bitcoin"], ["bitcoin"]))
+        self.assertGreater(len({funds_flow for funds_flow, _, _ in assignments}), 10)
+        self.assertEqual(asyncio.run(sampler.get_funds_flow_challenge("ethereum", "miner 0")), (None, None))
+        self.assertEqual(asyncio.run(sampler.get_prompt("ethereum", "miner 0")), (None, None, None, None))
+
+    def test_samples_the_pools(self):
+        sampler = ChallengeSampler(self.funds_flow, self.balance_tracking, self.prompts, sample_size=20)
+        assignments = self.sample_miners(sampler, [f"miner {i}" for i in range(100)])
+        self.assertLessEqual(len({funds_flow for funds_flow, _, _ in assignments}), 20)
+
+    def test_cohort_assignment(self):
+        sampler = ChallengeSampler(self.funds_flow, self.balance_tracking, self.prompts, assignment=ASSIGNMENT_COHORT, cohorts=3)
+        miner_keys = [f"miner {i}" for i in range(100)]
+        assignments = self.sample_miners(sampler, miner_keys)
+
+        self.assertEqual(len(set(map(tuple, assignments))), 3)
+        # a miner stays in its cohort for the step
+        self.assertEqual(self.sample_miners(sampler, miner_keys), assignments)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+
+from src.subnet.validator.challenge_scheduler import ChallengeScheduler
+
+
+class ChallengeSchedulerTestCase(unittest.TestCase):
+
+    def test_bounds_concurrency_and_cuts_slow_miners_at_the_deadline(self):
+        in_flight = []
+        max_in_flight = []
+
+        async def challenge_miner(run):
+            in_flight.append(run.uid)
+            max_in_flight.append(len(in_flight))
+            try:
+                # miner_info is the delay of the miner's challenges
+                await run.phase('challenges', asyncio.sleep(run.miner_info))
+                run.partial_result = f"partial {run.uid}"
+                await run.phase('prompt', asyncio.sleep(run.miner_info))
+                return f"result {run.uid}"
+            finally:
+                in_flight.remove(run.uid)
+
+        miners = {uid: 0.01 for uid in range(8)}
+        miners[8] = 0.3  # completes its challenges, not its prompt
+        miners[9] = 1.0  # completes nothing
+
+        scheduler = ChallengeScheduler(max_concurrency=4, step_timeout=0.4)
+        results = asyncio.run(scheduler.run(miners, challenge_miner))
+
+        self.assertEqual(max(max_in_flight), 4)
+        self.assertEqual([results[uid] for uid in range(8)], [f"result {uid}" for uid in range(8)])
+        self.assertEqual(results[8], "partial 8")
+        self.assertIsNone(results[9])
+
+        stats = scheduler.last_stats
+        self.assertEqual((stats['miners'], stats['completed'], stats['deadline_exceeded'], stats['partial']), (10, 8, 2, 1))
+        self.assertEqual(stats['phases']['challenges']['count'], 10)
+        self.assertEqual(stats['queue_wait']['count'], 10)
+        self.assertLess(stats['step_duration'], 0.6)
+
+    def test_phase_timeout_fails_the_miner(self):
+        async def challenge_miner(run):
+            try:
+                await run.phase('discovery', asyncio.sleep(1))
+            except asyncio.TimeoutError:
+                return None
+            return "result"
+
+        scheduler = ChallengeScheduler(max_concurrency=2, phase_timeouts={'discovery': 0.05})
+        results = asyncio.run(scheduler.run({1: None, 2: None}, challenge_miner))
+
+        self.assertEqual(results, {1: None, 2: None})
+        self.assertEqual(scheduler.last_stats['failed'], 2)
+        self.assertEqual(scheduler.last_stats['timed_out_phases'], {'discovery': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
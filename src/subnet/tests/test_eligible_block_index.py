@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+from src.subnet.tests.test_balance_tracking import FixtureRpcPool
+from src.subnet.validator.benchmarks.fixtures import FixtureChain
+from src.subnet.validator.nodes.bitcoin.eligible_block_index import EligibleBlockIndex
+from src.subnet.validator.nodes.bitcoin.node import BitcoinNode
+from src.subnet.validator.nodes.bitcoin.tx_decoder import parse_block_data
+
+
+class EligibleBlockIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = FixtureChain(block_count=20, txs_per_block=12)
+        self.blocks = {height: parse_block_data(self.chain.get_verbose_block(height, 2)) for height in range(self.chain.tip_height + 1)}
+
+    def test_keeps_candidates_of_eligible_blocks(self):
+        index = EligibleBlockIndex(max_offsets_per_block=4)
+        self.assertIsNone(index.get_shuffled_offsets(1))
+        for height, block in self.blocks.items():
+            index.add_block(height, block.transactions)
+        # duplicate coinbase blocks are never eligible, see check_if_block_is_valid_for_challenge
+        index.add_block(91722, self.blocks[1].transactions)
+
+        for height in range(1, self.chain.tip_height + 1):
+            offsets = index.get_shuffled_offsets(height)
+            transactions = self.blocks[height].transactions
+            self.assertTrue(0 < len(offsets) <= 4)
+            self.assertEqual(sorted(offsets), index.get_offsets(height))
+            for offset in offsets:
+                self.assertFalse(transactions[offset].is_coinbase)
+                self.assertTrue(any(amount for _, _, amount in transactions[offset].iter_outputs()))
+        self.assertEqual(index.get_shuffled_offsets(91722), [])
+        self.assertTrue(index.is_scanned(91722))
+
+        index.add_block(5, self.blocks[0].transactions)  # coinbase only
+        for offset in index.get_offsets(6):
+            index.discard(6, offset)
+        self.assertEqual((index.get_shuffled_offsets(5), index.get_shuffled_offsets(6)), ([], []))
+        self.assertEqual(len(index), self.chain.tip_height - 2)
+
+    def test_saves_merge_other_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "eligible_blocks.pickle")
+            first, second = EligibleBlockIndex(path), EligibleBlockIndex(path)
+            for height in range(1, 10):
+                first.add_block(height, self.blocks[height].transactions)
+            for height in range(10, self.chain.tip_height + 1):
+                second.add_block(height, self.blocks[height].transactions)
+            first.save()
+            second.save()
+
+            index = EligibleBlockIndex(path)
+            self.assertEqual(len(index), self.chain.tip_height)
+            self.assertTrue(all(index.is_scanned(height) for height in range(1, self.chain.tip_height + 1)))
+            self.assertFalse(index.is_scanned(0))
+
+    def test_funds_flow_challenge_uses_a_candidate(self):
+        node = BitcoinNode()
+        node.rpc_pool = FixtureRpcPool(self.chain)
+        for height in range(1, self.chain.tip_height + 1):
+            node.eligible_block_index.add_block(height, node.get_parsed_block_by_height(height).transactions)
+
+        fetched = []
+        get_txn_data_by_id = node.get_txn_data_by_id
+        node.get_txn_data_by_id = lambda txn_id: fetched.append(txn_id) or get_txn_data_by_id(txn_id)
+
+        for _ in range(10):
+            fetched.clear()
+            challenge, txn_id = node.create_funds_flow_challenge(1, self.chain.tip_height)
+            self.assertNotEqual(challenge.out_total_amount, 0)
+            # the first candidate is a valid challenge, no transaction is fetched for nothing
+            self.assertEqual(fetched, [txn_id])
+            tx = next(tx for block in self.blocks.values() for tx in block.transactions if tx.tx_id == txn_id)
+            self.assertFalse(tx.is_coinbase)
+
+    def test_funds_flow_blocks_are_drawn_like_select_block(self):
+        node = BitcoinNode()
+        node.eligible_block_index.add_block(1600, self.blocks[1].transactions)
+        node.eligible_block_index.add_block(1599, self.blocks[0].transactions)  # coinbase only
+
+        selections = [node._select_funds_flow_block(1, 1600) for _ in range(2000)]
+        heights = [height for height, _ in selections]
+        # an indexed block is no more likely than any other block of the last range
+        self.assertLess(heights.count(1600), 20)
+        self.assertNotIn(1599, heights)
+        self.assertGreater(sum(height <= 800 for height in heights), 300)
+        for height, offsets in selections:
+            self.assertEqual(offsets and sorted(offsets), node.eligible_block_index.get_offsets(1600) if height == 1600 else None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+from src.subnet.validator.generator_supervisor import GeneratorSupervisor, get_generator_worker_mode
+
+
+def generate_and_exit(count, stop_event, generated):
+    with generated.get_lock():
+        generated.value += count
+    raise SystemExit(1)
+
+
+def generate_until_stopped(count, stop_event, generated):
+    with generated.get_lock():
+        generated.value += count
+    stop_event.wait()
+
+
+class GeneratorSupervisorTestCase(unittest.TestCase):
+
+    def test_restarts_exited_workers_and_counts_generated(self):
+        supervisor = GeneratorSupervisor(restart_delay=0.05, max_restart_delay=0.2, poll_interval=0.05)
+        supervisor.add_worker("crashing", generate_and_exit, 2)
+        supervisor.add_worker("steady", generate_until_stopped, 5)
+        supervisor.start()
+
+        deadline = time.monotonic() + 60
+        crashing, steady = supervisor.workers
+        while crashing.restarts < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        supervisor.stop(timeout=30)
+
+        stats = supervisor.get_stats()
+        self.assertGreaterEqual(stats["crashing"]["restarts"], 2)
+        self.assertGreaterEqual(stats["crashing"]["generated"], 2 * (stats["crashing"]["restarts"]))
+        self.assertEqual(stats["steady"], {**stats["steady"], 'alive': False, 'restarts': 0, 'generated': 5})
+        self.assertEqual(steady.process.exitcode, 0)
+
+    def test_worker_mode_defaults_to_processes_only_with_a_tx_out_index(self):
+        environments = [
+            ({}, 'thread'),
+            ({"BITCOIN_V2_TX_OUT_HASHMAP_PICKLES": "a.pkl"}, 'thread'),
+            ({"BITCOIN_V2_TX_OUT_INDEX": "tx_out.idx", "BITCOIN_V2_TX_OUT_HASHMAP_PICKLES": "a.pkl"}, 'thread'),
+            ({"BITCOIN_V2_TX_OUT_INDEX": "tx_out.idx"}, 'process'),
+        ]
+        for environment, worker_mode in environments:
+            with mock.patch.dict(os.environ, environment):
+                for name in {"BITCOIN_V2_TX_OUT_INDEX", "BITCOIN_V2_TX_OUT_HASHMAP_PICKLES"} - set(environment):
+                    os.environ.pop(name, None)
+                self.assertEqual(get_generator_worker_mode(''), worker_mode)
+                # a configured mode is kept
+                self.assertEqual(get_generator_worker_mode('process'), 'process')
+
+
+if __name__ == '__main__':
+    unittest.main()
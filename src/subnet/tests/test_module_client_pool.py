@@ -0,0 +1,74 @@
+import asyncio
+import time
+import unittest
+
+from aiohttp import web
+from communex.errors import NetworkTimeoutError  # type: ignore
+from substrateinterface import Keypair  # type: ignore
+
+from src.subnet.validator.module_client_pool import ModuleClientPool
+
+
+class ModuleClientPoolTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.key = Keypair.create_from_uri("//Alice")
+        self.connections = set()
+
+        async def method(request):
+            self.connections.add(request.transport.get_extra_info("peername"))
+            body = await request.json()
+            if request.match_info["fn"] == "slow":
+                await asyncio.sleep(1)
+            return web.json_response({"fn": request.match_info["fn"], "target_key": body["params"]["target_key"]})
+
+        app = web.Application()
+        app.router.add_post("/method/{fn}", method)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def test_reuses_connections_across_calls(self):
+        pool = ModuleClientPool(self.key)
+        try:
+            for fn in ("discovery", "challenge", "challenge", "llm_query"):
+                client = await pool.get("127.0.0.1", self.port)
+                result = await client.call(fn, self.key.ss58_address, {}, timeout=5)
+                self.assertEqual(result, {"fn": fn, "target_key": self.key.ss58_address})
+
+            self.assertEqual(len(self.connections), 1)
+            self.assertEqual(pool.get_stats()["misses"], 1)
+            self.assertEqual(pool.get_stats()["hits"], 3)
+
+            with self.assertRaises(NetworkTimeoutError):
+                await client.call("slow", self.key.ss58_address, {}, timeout=0.1)
+        finally:
+            await pool.close()
+
+    async def test_evicts_idle_and_least_recently_used_clients(self):
+        pool = ModuleClientPool(self.key, max_clients=2, idle_timeout=0.2)
+        try:
+            first = await pool.get("127.0.0.1", self.port)
+            await first.call("discovery", self.key.ss58_address, {}, timeout=5)
+            await pool.get("127.0.0.2", self.port)
+            await pool.get("127.0.0.3", self.port)
+            # the least recently used client made room
+            self.assertEqual(len(pool), 2)
+            self.assertIsNot(await pool.get("127.0.0.1", self.port), first)
+            self.assertTrue(first._session.closed)
+
+            time.sleep(0.25)
+            await pool.get("127.0.0.4", self.port)
+            self.assertEqual(len(pool), 1)
+            self.assertEqual(pool.get_stats()["evicted"], 4)
+        finally:
+            await pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+from src.subnet.protocol.blockchain import NETWORK_BITCOIN
+from src.subnet.validator.nodes.factory import NodeFactory
+
+
+class NodeFactoryTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        NodeFactory._shared_nodes.clear()
+
+    def test_shared_node_is_created_once(self):
+        nodes = []
+        with patch.object(NodeFactory, 'create_node', side_effect=lambda network: object()) as create_node:
+            threads = [threading.Thread(target=lambda: nodes.append(NodeFactory.get_shared_node(NETWORK_BITCOIN))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(create_node.call_count, 1)
+        self.assertEqual(len({id(node) for node in nodes}), 1)
+
+    def test_close_shared_nodes(self):
+        node = Mock()
+        with patch.object(NodeFactory, 'create_node', return_value=node):
+            self.assertIs(NodeFactory.get_shared_node(NETWORK_BITCOIN), node)
+        NodeFactory.close_shared_nodes()
+
+        node.close.assert_called_once_with()
+        self.assertEqual(NodeFactory._shared_nodes, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from dataclasses import asdict
+
+from src.subnet.validator.benchmarks.fixtures import FixtureChain
+from src.subnet.validator.nodes.bitcoin.tx_decoder import parse_block_data, parse_block_data_columnar
+from src.subnet.validator.nodes.bitcoin.raw_block import parse_raw_block_data, parse_raw_block_columnar
+
+
+def without_unserialized_fields(block):
+    # fields parse_raw_block_data leaves empty, see its docstring
+    block = asdict(block)
+    for tx in block["transactions"]:
+        tx["fee_satoshi"] = 0
+        for vin in tx["vins"]:
+            vin["script_sig"] = None
+        for vout in tx["vouts"]:
+            vout["script_pub_key"] = None
+    return block
+
+
+class ParseRawBlockDataTestCase(unittest.TestCase):
+
+    def test_matches_verbose_json_parsing(self):
+        chain = FixtureChain(block_count=4, txs_per_block=60)
+        for height in range(chain.tip_height + 1):
+            expected = parse_block_data(chain.get_verbose_block(height, 2))
+            actual = parse_raw_block_data(chain.get_raw_block(height), height)
+            self.assertEqual(without_unserialized_fields(actual), without_unserialized_fields(expected))
+        self.assertEqual(len(actual.transactions), 60)
+
+    def test_columnar_blocks_match_blocks(self):
+        chain = FixtureChain(block_count=4, txs_per_block=60)
+        for height in range(chain.tip_height + 1):
+            verbose_block = chain.get_verbose_block(height, 3)
+            expected = parse_block_data(verbose_block)
+            for block, with_prevouts in ((parse_block_data_columnar(verbose_block), True),
+                                         (parse_raw_block_columnar(chain.get_raw_block(height), height), False)):
+                self.assertEqual((block.block_hash, block.previous_block_hash, len(block)), (expected.block_hash, expected.previous_block_hash, len(expected.transactions)))
+                for view, tx in zip(block.transactions, expected.transactions):
+                    self.assertEqual((view.tx_id, view.timestamp, view.is_coinbase), (tx.tx_id, tx.timestamp, tx.is_coinbase))
+                    self.assertEqual(list(view.iter_outputs()), list(tx.iter_outputs()))
+                    expected_inputs = list(tx.iter_inputs())
+                    if not with_prevouts:
+                        expected_inputs = [(tx_id, vout_id, None, None) for tx_id, vout_id, _, _ in expected_inputs]
+                    self.assertEqual(list(view.iter_inputs()), expected_inputs)
+
+
+if __name__ == '__main__':
+    unittest.main()
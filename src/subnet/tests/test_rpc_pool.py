@@ -0,0 +1,117 @@
+import decimal
+import socket
+import threading
+import unittest
+
+from bitcoinrpc.authproxy import JSONRPCException
+
+from src.subnet.validator.benchmarks.fixtures import FixtureChain
+from src.subnet.validator.benchmarks.rpc_server import FixtureRpcServer
+from src.subnet.validator.nodes.bitcoin.rpc_pool import RpcConnectionPool
+
+
+class RpcConnectionPoolTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.chain = FixtureChain(block_count=4, txs_per_block=5)
+        cls.server = FixtureRpcServer(cls.chain, latency=0.01).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.pool = RpcConnectionPool(self.server.url, size=2, fast_json=True)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_keeps_connections_alive(self):
+        self.assertEqual(self.pool.call('getblockcount'), self.chain.tip_height)
+        with self.pool.connection() as rpc_connection:
+            sock = rpc_connection.connection.sock
+        for height in range(self.chain.tip_height + 1):
+            self.assertEqual(self.pool.call('getblockhash', height), self.chain.get_block_hash(height))
+        with self.pool.connection() as rpc_connection:
+            self.assertIs(rpc_connection.connection.sock, sock)
+
+        # bitcoind errors come with a JSON body and leave the connection usable
+        with self.assertRaises(JSONRPCException):
+            self.pool.call('getblockhash', 1000)
+        self.assertEqual(self.pool.call('getblockcount'), self.chain.tip_height)
+        self.assertEqual(self.pool.get_stats()['created'], 1)
+        self.assertEqual(self.pool.get_stats()['reconnects'], 0)
+
+    def test_is_bounded_across_threads(self):
+        errors = []
+
+        def call():
+            try:
+                for height in range(self.chain.tip_height + 1):
+                    assert self.pool.call('getblockhash', height) == self.chain.get_block_hash(height)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(stats['acquisitions'], 8 * (self.chain.tip_height + 1))
+        self.assertGreater(stats['max_wait_time'], 0)
+
+    def test_reconnects_after_a_dropped_connection(self):
+        self.pool.call('getblockcount')
+        with self.pool.connection() as rpc_connection:
+            rpc_connection.connection.sock.shutdown(socket.SHUT_RDWR)
+
+        self.assertEqual(self.pool.call('getblockcount'), self.chain.tip_height)
+        self.assertEqual(self.pool.get_stats()['reconnects'], 1)
+
+        # without retries the error is raised, but the broken connection is still replaced
+        pool = RpcConnectionPool(self.server.url, size=1, max_retries=0)
+        try:
+            pool.call('getblockcount')
+            with pool.connection() as rpc_connection:
+                rpc_connection.connection.sock.shutdown(socket.SHUT_RDWR)
+            with self.assertRaises((ConnectionError, OSError)):
+                pool.call('getblockcount')
+            self.assertEqual(pool.call('getblockcount'), self.chain.tip_height)
+        finally:
+            pool.close()
+
+    def test_batch_results_follow_the_request_order(self):
+        heights = [3, 0, 1000, 2, 1]
+        results_by_thread = [None] * 4
+
+        def batch(index):
+            results_by_thread[index] = self.pool.batch([('getblockhash', height) for height in heights])
+
+        threads = [threading.Thread(target=batch, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for results in results_by_thread:
+            self.assertIsInstance(results[2], JSONRPCException)
+            self.assertEqual([result for result in results if not isinstance(result, JSONRPCException)], [self.chain.get_block_hash(height) for height in (3, 0, 2, 1)])
+        self.assertEqual(self.pool.batch([]), [])
+
+    def test_decodes_amounts_as_decimal_without_fast_json(self):
+        pool = RpcConnectionPool(self.server.url, size=1)
+        try:
+            txid = self.chain.get_verbose_block(1, 2)["tx"][0]["txid"]
+            self.assertIsInstance(pool.call('getrawtransaction', txid, 1)['vout'][0]['value'], decimal.Decimal)
+            self.assertIsInstance(self.pool.call('getrawtransaction', txid, 1)['vout'][0]['value'], float)
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+from src.subnet.validator.benchmarks.fixtures import FixtureChain, to_json_text
+from src.subnet.validator.benchmarks.rpc_server import FixtureRpcServer, RecordedChain
+from bitcoinrpc.authproxy import JSONRPCException
+
+from src.subnet.validator.nodes.bitcoin.node import BitcoinNode
+
+
+class FixtureRpcServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = FixtureChain(block_count=4, txs_per_block=30)
+
+    def test_counts_calls_and_requests(self):
+        with FixtureRpcServer(self.chain) as server:
+            node = BitcoinNode(server.url)
+            node.block_verbosity = 2
+            try:
+                block = node.get_block_by_height(2)
+                self.assertEqual(block["hash"], self.chain.get_block_hash(2))
+                self.assertEqual(server.get_counts(), {"calls": {"getblockhash": 1, "getblock": 1}, "requests": 2})
+
+                server.reset_counts()
+                txn_vouts = [(vin["txid"], vin["vout"]) for tx_data in block["tx"][1:] for vin in tx_data["vin"]]
+                node.get_addresses_and_amounts_by_txn_vouts(txn_vouts)
+                counts = server.get_counts()
+                # one batch for all the spent transactions
+                self.assertEqual(counts["requests"], 1)
+                self.assertEqual(counts["calls"], {"getrawtransaction": len({txn_id for txn_id, _ in txn_vouts})})
+
+                self.assertIsNone(node.get_txn_data_by_id("00" * 32))
+                self.assertEqual(node.rpc_pool.call("fixture_getcounts")["requests"], 2)
+            finally:
+                node.close()
+
+    def test_recorded_chain_has_no_verbosity_3(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for height in range(self.chain.tip_height + 1):
+                with open(os.path.join(directory, f"{height}.json"), "w") as file:
+                    file.write(to_json_text(self.chain.get_verbose_block(height, 2)))
+                with open(os.path.join(directory, f"{height}.hex"), "w") as file:
+                    file.write(self.chain.get_raw_block(height).hex())
+
+            with FixtureRpcServer(RecordedChain(directory)) as server:
+                node = BitcoinNode(server.url)
+                node.block_verbosity = 3
+                try:
+                    self.assertEqual(node.get_current_block_height(), self.chain.tip_height)
+                    block = node.get_parsed_block_by_height(3)
+                    self.assertEqual(node.block_verbosity, 2)
+                    self.assertEqual(len(block.transactions), len(self.chain.get_verbose_block(3, 2)["tx"]))
+                finally:
+                    node.close()
+
+    def test_missing_block_keeps_verbosity_3(self):
+        with FixtureRpcServer(self.chain) as server:
+            node = BitcoinNode(server.url)
+            node.block_verbosity = 3
+            try:
+                with self.assertRaises(JSONRPCException):
+                    node._get_block_by_hash("00" * 32)
+                self.assertEqual(node.block_verbosity, 3)
+                self.assertEqual(node.get_block_by_height(1)["hash"], self.chain.get_block_hash(1))
+                self.assertIn("prevout", node.get_block_by_height(1)["tx"][1]["vin"][0])
+            finally:
+                node.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import random
+import unittest
+
+from src.subnet.validator.database.slots import get_slot_moves
+
+
+class SlotMovesTestCase(unittest.TestCase):
+
+    def test_moves_keep_slots_dense(self):
+        rng = random.Random(5)
+        for _ in range(200):
+            slot_count = rng.randrange(1, 60)
+            rows = {slot: f"row {slot}" for slot in range(slot_count)}
+            deleted_slots = rng.sample(range(slot_count), rng.randrange(0, slot_count + 1))
+            for slot in deleted_slots:
+                del rows[slot]
+            remaining = set(rows.values())
+
+            moves = get_slot_moves(deleted_slots, slot_count)
+            for old_slot, new_slot in moves:
+                self.assertNotIn(new_slot, rows)
+                rows[new_slot] = rows.pop(old_slot)
+
+            self.assertEqual(sorted(rows), list(range(slot_count - len(deleted_slots))))
+            self.assertEqual(set(rows.values()), remaining)
+            # only the rows above the new count move
+            self.assertEqual(len(moves), sum(1 for slot in deleted_slots if slot < slot_count - len(deleted_slots)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from src.subnet.validator.nodes.bitcoin.tx_decoder import parse_block_data
+from src.subnet.validator.nodes.bitcoin.tx_out_follower import TxOutIndexFollower
+
+
+class FakeRpcPool:
+
+    def __init__(self, chain):
+        self.chain = chain
+
+    def call(self, method, *args):
+        if method == 'getblockcount':
+            return len(self.chain) - 1
+        if method == 'getblockhash':
+            return self.chain[args[0]]["hash"]
+        raise ValueError(method)
+
+
+class FakeNode:
+
+    def __init__(self, chain):
+        self.rpc_pool = FakeRpcPool(chain)
+        self.fetched = []
+
+    def get_parsed_block_by_height(self, height):
+        self.fetched.append(height)
+        return parse_block_data(self.rpc_pool.chain[height])
+
+
+def make_block(height, fork="a"):
+    txid = f"{fork}{height:063x}"
+    return {
+        "height": height,
+        "hash": f"{fork}-{height}",
+        "time": 1231006505,
+        "tx": [{
+            "txid": txid,
+            "vin": [{"coinbase": "04ffff001d0104", "sequence": 4294967295}],
+            "vout": [{"n": 0, "value": "50.00000000", "scriptPubKey": {"type": "pubkeyhash", "address": f"1{fork}{height}"}}],
+        }],
+    }
+
+
+class TxOutIndexFollowerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.tmp_dir.name, "follower.pkl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_reorg_rollback_and_checkpoint_resume(self):
+        chain = [make_block(height) for height in range(10)]
+        node = FakeNode(chain)
+        follower = TxOutIndexFollower(node, self.checkpoint_path, backfill_blocks=5)
+
+        self.assertEqual(follower.follow(), 5)
+        self.assertEqual(node.fetched, [5, 6, 7, 8, 9])
+        self.assertEqual(follower.delta_index.get(chain[9]["tx"][0]["txid"], 0), ("1a9", 5_000_000_000))
+        self.assertEqual(follower.follow(), 0)
+
+        # blocks 8 and 9 are replaced and the chain grows by one block
+        chain[8:] = [make_block(height, fork="b") for height in range(8, 11)]
+        node.fetched.clear()
+        self.assertEqual(follower.follow(), 3)
+        self.assertEqual(node.fetched, [8, 9, 10])
+        self.assertIsNone(follower.delta_index.get(make_block(9)["tx"][0]["txid"], "0"))
+        self.assertEqual(follower.delta_index.get(chain[9]["tx"][0]["txid"], "0"), ("1b9", 5_000_000_000))
+        follower.close()
+
+        node.fetched.clear()
+        restarted = TxOutIndexFollower(node, self.checkpoint_path, backfill_blocks=5)
+        self.assertEqual(restarted.delta_index.tip_height, 10)
+        self.assertEqual(restarted.follow(), 0)
+        self.assertEqual(node.fetched, [])
+        self.assertEqual(len(restarted.delta_index), 6)
+        restarted.close()
+
+    def test_delta_and_checkpoint_stay_bounded(self):
+        chain = [make_block(height) for height in range(30)]
+        node = FakeNode(chain)
+        follower = TxOutIndexFollower(node, self.checkpoint_path, reorg_depth=2, backfill_blocks=30, max_blocks=5)
+
+        self.assertEqual(follower.follow(), 30)
+        self.assertEqual(follower.delta_index.block_count, 5)
+        self.assertIsNone(follower.delta_index.get(chain[24]["tx"][0]["txid"], 0))
+        self.assertIsNotNone(follower.delta_index.get(chain[25]["tx"][0]["txid"], 0))
+
+        # every poll appends its changes, the log is rewritten before it grows past its bound
+        for height in range(30, 300):
+            chain.append(make_block(height))
+            follower.follow()
+            follower.save_checkpoint()
+            self.assertEqual(follower.delta_index.block_count, 5)
+            self.assertLessEqual(follower._log_records, 2 * 5 + 100 + 2)
+
+        # a partly written record is dropped, and the log rewritten
+        follower.close()
+        with open(self.checkpoint_path, "ab") as file:
+            file.write(pickle.dumps(("block", 300, "a-300", {}))[:-3])
+        restarted = TxOutIndexFollower(node, self.checkpoint_path, reorg_depth=2, max_blocks=5)
+        self.assertEqual(restarted.delta_index.get_state(), follower.delta_index.get_state())
+        self.assertEqual(restarted._log_records, 5)
+        restarted.close()
+
+    def test_loads_a_whole_delta_checkpoint(self):
+        chain = [make_block(height) for height in range(3)]
+        follower = TxOutIndexFollower(FakeNode(chain), self.checkpoint_path, backfill_blocks=5)
+        follower.follow()
+        follower.close()
+        with open(self.checkpoint_path, "wb") as file:
+            pickle.dump(follower.delta_index.get_state(), file)
+
+        restarted = TxOutIndexFollower(FakeNode(chain), self.checkpoint_path)
+        self.assertEqual(restarted.delta_index.get_state(), follower.delta_index.get_state())
+        self.assertEqual(restarted.follow(), 0)
+        restarted.close()
+
+    def test_one_writer_per_checkpoint(self):
+        # flock locks conflict between open files, so two followers of one process stand in for two processes
+        chain = [make_block(height) for height in range(10)]
+        writer_node, reader_node = FakeNode(chain), FakeNode(chain)
+        writer = TxOutIndexFollower(writer_node, self.checkpoint_path, reorg_depth=2, backfill_blocks=5, max_blocks=5)
+        reader = TxOutIndexFollower(reader_node, self.checkpoint_path, reorg_depth=2, backfill_blocks=5, max_blocks=5)
+        self.assertTrue(writer.is_writer)
+        self.assertFalse(reader.is_writer)
+
+        self.assertEqual(writer.poll(), 5)
+        self.assertEqual(reader.poll(), 0)
+        self.assertEqual(reader_node.fetched, [])
+        self.assertEqual(reader.delta_index.get_state(), writer.delta_index.get_state())
+        log_id = reader._log_id
+
+        # the reader follows the appends and the rewrites of the log
+        for height in range(10, 150):
+            chain.append(make_block(height))
+            writer.poll()
+            if height % 7 == 0:
+                reader.poll()
+        reader.poll()
+        self.assertEqual(reader.delta_index.get_state(), writer.delta_index.get_state())
+        self.assertEqual(reader_node.fetched, [])
+        self.assertNotEqual(reader._log_id, log_id)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["follower.pkl", "follower.pkl.lock"])
+
+        # the reader takes over once the writer is closed
+        writer.close()
+        chain.append(make_block(150))
+        self.assertEqual(reader.poll(), 1)
+        self.assertTrue(reader.is_writer)
+        self.assertEqual(reader_node.fetched, [150])
+        reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from src.subnet.validator.nodes.bitcoin.node_utils import initialize_tx_out_hash_table
+from src.subnet.validator.nodes.bitcoin.tx_out_index import TxOutIndex, TxOutIndexWriter, convert_pickles
+
+
+def make_txid(i):
+    return f"{i:064x}"[::-1]
+
+
+class TxOutIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "tx_out.idx")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_lookup_across_sorted_runs(self):
+        writer = TxOutIndexWriter(self.path, run_size=7)
+        expected = {}
+        for i in range(100):
+            for vout in range(3):
+                address = f"address-{i % 10}"
+                writer.add(make_txid(i), vout, address, i * 1000 + vout)
+                expected[(make_txid(i), vout)] = (address, i * 1000 + vout)
+        self.assertEqual(writer.finish(), 300)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["tx_out.idx"])
+
+        index = TxOutIndex(self.path)
+        self.assertEqual(len(index), 300)
+        self.assertEqual(index.address_count, 10)
+        for (txid, vout), value in expected.items():
+            self.assertEqual(index.get(txid, vout), value)
+            self.assertEqual(index.get(txid, str(vout)), value)
+
+        self.assertIsNone(index.get(make_txid(100), 0))
+        self.assertIsNone(index.get(make_txid(1), 3))
+        self.assertIsNone(index.get("not-a-txid", 0))
+        index.close()
+
+    def test_last_duplicate_wins(self):
+        writer = TxOutIndexWriter(self.path, run_size=2)
+        writer.add(make_txid(1), 0, "first", 1)
+        writer.add(make_txid(2), 0, "other", 2)
+        writer.add(make_txid(1), 0, "second", 3)
+        self.assertEqual(writer.finish(), 2)
+
+        index = TxOutIndex(self.path)
+        self.assertEqual(index.get(make_txid(1), 0), ("second", 3))
+        index.close()
+
+    def test_convert_pickles(self):
+        pickle_paths = []
+        for part in range(2):
+            hash_table = initialize_tx_out_hash_table()
+            for i in range(part * 50, part * 50 + 50):
+                txid = make_txid(i)
+                hash_table[txid[:3]][(txid, "0")] = (f"address-{i}", i)
+            pickle_path = os.path.join(self.tmp_dir.name, f"part-{part}.pkl")
+            with open(pickle_path, "wb") as file:
+                pickle.dump(hash_table, file)
+            pickle_paths.append(pickle_path)
+
+        self.assertEqual(convert_pickles(pickle_paths, self.path), 100)
+        index = TxOutIndex(self.path)
+        for i in range(100):
+            self.assertEqual(index.get(make_txid(i), "0"), (f"address-{i}", i))
+        index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
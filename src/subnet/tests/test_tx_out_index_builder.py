@@ -0,0 +1,105 @@
+import hashlib
+import os
+import struct
+import tempfile
+import unittest
+
+from src.subnet.validator.nodes.bitcoin.node_utils import pubkey_to_address, construct_redeem_script, \
+    hash_redeem_script, create_p2sh_address, create_p2pkh_address, create_segwit_address
+from src.subnet.validator.nodes.bitcoin.tx_out_index import TxOutIndex
+from src.subnet.validator.nodes.bitcoin.tx_out_index_builder import build_tx_out_index, MAINNET_MAGIC
+
+PUBKEY_1 = "02" + "11" * 32
+PUBKEY_2 = "03" + "22" * 32
+PUBKEY_HASH = bytes(range(20))
+WITNESS_PROGRAM = bytes(range(20, 40))
+
+P2PKH_SCRIPT = bytes.fromhex("76a914") + PUBKEY_HASH + bytes.fromhex("88ac")
+P2PK_SCRIPT = bytes.fromhex("21" + PUBKEY_1 + "ac")
+P2WPKH_SCRIPT = bytes.fromhex("0014") + WITNESS_PROGRAM
+MULTISIG_SCRIPT = bytes.fromhex("51" + "21" + PUBKEY_1 + "21" + PUBKEY_2 + "52ae")
+NULLDATA_SCRIPT = bytes.fromhex("6a04deadbeef")
+NONSTANDARD_SCRIPT = bytes.fromhex("51")
+
+
+def varint(n):
+    return bytes([n]) if n < 0xfd else b"\xfd" + struct.pack("<H", n)
+
+
+def serialize_tx(vins, vouts, witness=False):
+    body = varint(len(vins))
+    for prev_txid, prev_vout in vins:
+        script_sig = b"\x03\x01\x00\x00"
+        body += bytes.fromhex(prev_txid)[::-1] + struct.pack("<I", prev_vout) + varint(len(script_sig)) + script_sig + b"\xff\xff\xff\xff"
+    body += varint(len(vouts))
+    for value, script in vouts:
+        body += struct.pack("<q", value) + varint(len(script)) + script
+    version, locktime = struct.pack("<i", 2), b"\x00\x00\x00\x00"
+    txid = hashlib.sha256(hashlib.sha256(version + body + locktime).digest()).digest()[::-1].hex()
+    if witness:
+        witnesses = b"".join(b"\x01" + varint(72) + b"\x00" * 72 for _ in vins)
+        return version + b"\x00\x01" + body + witnesses + locktime, txid
+    return version + body + locktime, txid
+
+
+def serialize_block(txs):
+    return b"\x00" * 80 + varint(len(txs)) + b"".join(txs)
+
+
+def write_blk_file(path, blocks, xor_key=b""):
+    data = b"".join(MAINNET_MAGIC + struct.pack("<I", len(block)) + block for block in blocks) + b"\x00" * 64
+    if xor_key:
+        data = bytes(b ^ xor_key[i % len(xor_key)] for i, b in enumerate(data))
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+class TxOutIndexBuilderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.blocks_dir = os.path.join(self.tmp_dir.name, "blocks")
+        os.makedirs(self.blocks_dir)
+        self.output_path = os.path.join(self.tmp_dir.name, "tx_out.idx")
+
+        coinbase_1, self.coinbase_1_txid = serialize_tx([("00" * 32, 0xFFFFFFFF)], [(5000000000, P2PKH_SCRIPT), (0, NULLDATA_SCRIPT)])
+        spend, self.spend_txid = serialize_tx([(self.coinbase_1_txid, 0)], [(1000, P2PK_SCRIPT), (2000, P2WPKH_SCRIPT), (3000, MULTISIG_SCRIPT), (4000, NONSTANDARD_SCRIPT)], witness=True)
+        coinbase_2, self.coinbase_2_txid = serialize_tx([("00" * 32, 0xFFFFFFFF)], [(625000000, P2WPKH_SCRIPT)], witness=True)
+        self.blk_files = [[serialize_block([coinbase_1, spend])], [serialize_block([coinbase_2])]]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_index_content(self):
+        index = TxOutIndex(self.output_path)
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.get(self.coinbase_1_txid, 0), (create_p2pkh_address(PUBKEY_HASH), 5000000000))
+        self.assertIsNone(index.get(self.coinbase_1_txid, 1))
+        self.assertEqual(index.get(self.spend_txid, 0), (pubkey_to_address(PUBKEY_1), 1000))
+        self.assertEqual(index.get(self.spend_txid, 1), (create_segwit_address(0, WITNESS_PROGRAM), 2000))
+        multisig_address = create_p2sh_address(hash_redeem_script(construct_redeem_script([PUBKEY_1, PUBKEY_2], 1)))
+        self.assertEqual(index.get(self.spend_txid, 2), (multisig_address, 3000))
+        self.assertIsNone(index.get(self.spend_txid, 3))
+        self.assertEqual(index.get(self.coinbase_2_txid, 0), (create_segwit_address(0, WITNESS_PROGRAM), 625000000))
+        index.close()
+
+    def test_build_from_block_files(self):
+        for i, blocks in enumerate(self.blk_files):
+            write_blk_file(os.path.join(self.blocks_dir, f"blk{i:05d}.dat"), blocks)
+
+        self.assertEqual(build_tx_out_index(self.blocks_dir, self.output_path, workers=2, files_per_task=1), 5)
+        self.assert_index_content()
+
+    def test_build_from_obfuscated_block_files(self):
+        xor_key = bytes.fromhex("0102030405060708")
+        with open(os.path.join(self.blocks_dir, "xor.dat"), "wb") as file:
+            file.write(xor_key)
+        for i, blocks in enumerate(self.blk_files):
+            write_blk_file(os.path.join(self.blocks_dir, f"blk{i:05d}.dat"), blocks, xor_key)
+
+        self.assertEqual(build_tx_out_index(self.blocks_dir, self.output_path, workers=1), 5)
+        self.assert_index_content()
+
+
+if __name__ == '__main__':
+    unittest.main()
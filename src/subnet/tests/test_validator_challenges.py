@@ -0,0 +1,142 @@
+import asyncio
+import time
+import unittest
+
+from src.subnet.protocol.blockchain import Discovery
+from src.subnet.protocol.llm_engine import Challenge, MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BALANCE_TRACKING
+from src.subnet.validator.challenge_sampler import ChallengeSampler
+from src.subnet.validator.challenge_scheduler import MinerChallengeRun
+from src.subnet.validator.validator import Validator
+
+
+class FakeChallengeManager:
+
+    def __init__(self, kind, expected):
+        self.kind = kind
+        self.expected = expected
+
+    async def get_challenges(self, network, limit=None):
+        return [(Challenge(kind=self.kind).model_dump_json(), self.expected)]
+
+
+class FakePromptManager:
+
+    async def get_prompts(self, network, limit=None):
+        return [(1, "Return the transactions of block 1", "funds_flow", [])]
+
+
+class FakePromptResponseManager:
+
+    async def store_response(self, **kwargs):
+        pass
+
+
+class FakeLLM:
+
+    def validate_query_by_prompt(self, prompt, query, network):
+        return True
+
+
+class FakeMinerClient:
+    """
+    Answers the challenges and the prompt after `delay`, with the given funds flow tx_id and balance.
+    """
+
+    def __init__(self, delay: float, tx_id: str = "expected_tx_id", balance=42):
+        self.delay = delay
+        self.tx_id = tx_id
+        self.balance = balance
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call(self, method, miner_key, params, timeout):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if method == "llm_query":
+                self.calls.append(method)
+                return {"outputs": [{"type": "text", "query": "MATCH (n) RETURN n", "result": {}}]}
+            challenge = Challenge(**params["challenge"])
+            self.calls.append(challenge.kind)
+            challenge.output = {"tx_id": self.tx_id} if challenge.kind == MODEL_TYPE_FUNDS_FLOW else {"balance": self.balance}
+            return challenge.model_dump()
+        finally:
+            self.in_flight -= 1
+
+
+class ValidatorChallengesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = Validator.__new__(Validator)
+        self.validator.challenge_timeout = 5
+        self.validator.llm_query_timeout = 5
+        self.validator.llm = FakeLLM()
+        self.validator.validation_prompt_response_manager = FakePromptResponseManager()
+        self.validator.challenge_sampler = ChallengeSampler(
+            FakeChallengeManager(MODEL_TYPE_FUNDS_FLOW, "expected_tx_id"),
+            FakeChallengeManager(MODEL_TYPE_BALANCE_TRACKING, "42"),
+            FakePromptManager(),
+        )
+
+    def perform_challenges(self, client, max_concurrent_requests):
+        run = MinerChallengeRun(1, None, {})
+        discovery = Discovery(network="bitcoin", max_concurrent_requests=max_concurrent_requests)
+        start_time = time.perf_counter()
+        response = asyncio.run(self.validator._perform_challenges(run, client, "miner_key", discovery))
+        return response, time.perf_counter() - start_time
+
+    def test_sends_requests_up_to_the_miner_capacity(self):
+        client = FakeMinerClient(delay=0.1)
+        response, elapsed = self.perform_challenges(client, 3)
+        self.assertEqual(response.get_failed_challenges(), 0)
+        self.assertTrue(response.query_validation_result)
+        self.assertEqual(client.max_in_flight, 3)
+        self.assertLess(elapsed, 0.25)
+
+        # miners that don't advertise a capacity get one request at a time, in the original order
+        client = FakeMinerClient(delay=0.05)
+        response, elapsed = self.perform_challenges(client, Discovery().max_concurrent_requests)
+        self.assertTrue(response.query_validation_result)
+        self.assertEqual(client.max_in_flight, 1)
+        self.assertEqual(client.calls, [MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BALANCE_TRACKING, "llm_query"])
+
+    def test_capacity_is_applied_per_validator(self):
+        # the miner doesn't throttle, each validator keeps to the advertised capacity on its own
+        client = FakeMinerClient(delay=0.1)
+        discovery = Discovery(network="bitcoin", max_concurrent_requests=2)
+
+        async def run():
+            return await asyncio.gather(*(self.validator._perform_challenges(MinerChallengeRun(1, None, {}), client, "miner_key", discovery) for _ in range(2)))
+
+        for response in asyncio.run(run()):
+            self.assertEqual(response.get_failed_challenges(), 0)
+        self.assertEqual(client.max_in_flight, 4)
+
+    def test_one_failed_challenge_keeps_the_prompt(self):
+        # the prompt still decides between 0 (failed prompt) and 0.15
+        client = FakeMinerClient(delay=0.05, tx_id="wrong_tx_id")
+        response, _ = self.perform_challenges(client, 1)
+        self.assertEqual(response.get_failed_challenges(), 1)
+        self.assertTrue(response.query_validation_result)
+        self.assertIn("llm_query", client.calls)
+
+    def test_failed_challenges_cancel_the_prompt(self):
+        client = FakeMinerClient(delay=0.05, tx_id="wrong_tx_id", balance=41)
+        response, _ = self.perform_challenges(client, 1)
+        self.assertEqual(response.get_failed_challenges(), 2)
+        self.assertIsNone(response.query_validation_result)
+        self.assertNotIn("llm_query", client.calls)
+        self.assertEqual(Validator._score_miner(response, 1), 0)
+
+    def test_answers_are_compared_as_scored(self):
+        # the expected balance is stored as a string, the miner may answer with a string or a float
+        for balance in (42, "42", 42.0):
+            response, _ = self.perform_challenges(FakeMinerClient(delay=0.01, balance=balance), 3)
+            self.assertEqual(response.get_failed_challenges(), 0)
+            self.assertTrue(response.query_validation_result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,6 +32,16 @@ class ValidatorSettings(BaseSettings):
     QUERY_TIMEOUT: int   # cross check query timeout
     CHALLENGE_TIMEOUT: int  # challenge and llm challenge time
 
+    CHALLENGE_CONCURRENCY: int = 32  # miners challenged at once in a validation step
+    CHALLENGE_STEP_TIMEOUT: int = 0  # deadline of a validation step's challenges, 0 for ITERATION_INTERVAL
+    CHALLENGE_PHASE_TIMEOUTS: dict[str, float] = {}  # overrides the phase timeouts derived from the timeouts above, e.g. {"validation": 120}
+    CHALLENGE_ASSIGNMENT: str = 'random'  # 'random' draws challenges and prompts per miner, 'cohort' per group of miners
+    CHALLENGE_COHORTS: int = 4  # groups of miners sharing their challenges and prompt with the 'cohort' assignment
+    CHALLENGE_SAMPLE_SIZE: int = 1000  # challenges and prompts of each pool sampled per step with the 'random' assignment, 0 for all
+
+    MODULE_CLIENT_POOL_SIZE: int = 512  # miners the validator keeps connections to
+    MODULE_CLIENT_IDLE_TIMEOUT: int = 600  # seconds before an unused miner connection is closed, above ITERATION_INTERVAL to span steps
+
     LLM_API_KEY: str
     LLM_TYPE: str
 
@@ -43,5 +53,11 @@ class ValidatorSettings(BaseSettings):
     BALANCE_TRACKING_CHALLENGE_FREQUENCY: int
     BALANCE_TRACKING_CHALLENGE_THRESHOLD: int
 
+    CHALLENGE_BATCH_SIZE: int = 1  # challenges stored per cycle once the pool is full
+    CHALLENGE_BATCH_WORKERS: int = 4  # challenges built concurrently, bounds the node rpc usage
+
+    GENERATOR_WORKER_MODE: str = ''  # 'process' runs the generators under a GeneratorSupervisor, 'thread' in the validator process, empty for 'process' only with a tx_out index and no pickles
+    GENERATOR_REPORT_INTERVAL: int = 300  # seconds between generator throughput reports
+
     class Config:
         extra = 'ignore'
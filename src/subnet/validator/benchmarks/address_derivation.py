@@ -0,0 +1,75 @@
+"""
+Measures the memoized P2PK / bare multisig address derivation (node_utils.get_script_address and
+derive_addresses) on early-chain fixture blocks, which pay almost only to bare public keys that are reused.
+
+The derivation alone is compared with pubkey_to_address / the P2SH of the redeem script for every output,
+then parse_block_data (verbosity 3, so prevouts are derived too) and parse_raw_block_data are timed with
+the address cache cleared before every block (cold) and kept across blocks (warm).
+
+Usage: python -m src.subnet.validator.benchmarks.address_derivation [<blocks>] [<txs_per_block>] [<distinct_pubkeys>]
+"""
+import sys
+import time
+
+from src.subnet.validator.benchmarks.fixtures import FixtureChain, EARLY_CHAIN_SCRIPT_WEIGHTS
+from src.subnet.validator.nodes.bitcoin.node_utils import derive_addresses, get_pubkey_address, get_multisig_address, \
+    get_address_cache_stats, pubkey_to_address, create_p2sh_address, hash_redeem_script, construct_redeem_script
+from src.subnet.validator.nodes.bitcoin.tx_decoder import parse_block_data
+from src.subnet.validator.nodes.bitcoin.raw_block import parse_raw_block_data
+
+
+def clear_address_cache():
+    get_pubkey_address.cache_clear()
+    get_multisig_address.cache_clear()
+
+
+def derive_uncached(script_pub_key_asm: str):
+    if "OP_CHECKSIG" in script_pub_key_asm:
+        return pubkey_to_address(script_pub_key_asm.split()[0])
+    parts = script_pub_key_asm.split()
+    return create_p2sh_address(hash_redeem_script(construct_redeem_script(parts[1:-2], int(parts[0]))))
+
+
+def timed(fn):
+    start_time = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start_time
+
+
+def run(blocks: int, txs_per_block: int, distinct_pubkeys: int):
+    chain = FixtureChain(block_count=blocks, txs_per_block=txs_per_block, script_weights=EARLY_CHAIN_SCRIPT_WEIGHTS, pubkey_pool_size=distinct_pubkeys)
+    heights = range(1, chain.tip_height + 1)
+    verbose_blocks = [chain.get_verbose_block(height, 3) for height in heights]
+    raw_blocks = [(height, chain.get_raw_block(height)) for height in heights]
+    asms = [vout.asm for block in chain.blocks[1:] for tx in block.transactions for vout in tx.vouts if vout.script_type in ("pubkey", "multisig")]
+
+    print(f"blocks={len(heights)} txs_per_block={txs_per_block} derived_outputs={len(asms)} distinct_scripts={len(set(asms))}")
+    print(f"{'case':<28} {'time (ms)':>10} {'outputs/s':>12}")
+
+    expected, elapsed = timed(lambda: [derive_uncached(asm) for asm in asms])
+    print(f"{'derive, no memo':<28} {elapsed * 1000:>10.1f} {len(asms) / elapsed:>12.0f}")
+    clear_address_cache()
+    addresses, elapsed = timed(lambda: derive_addresses(asms))
+    assert addresses == expected
+    print(f"{'derive_addresses, cold':<28} {elapsed * 1000:>10.1f} {len(asms) / elapsed:>12.0f}")
+    _, elapsed = timed(lambda: derive_addresses(asms))
+    print(f"{'derive_addresses, warm':<28} {elapsed * 1000:>10.1f} {len(asms) / elapsed:>12.0f}")
+
+    for name, parse, payloads in (("parse_block_data", lambda block: parse_block_data(block), verbose_blocks),
+                                  ("parse_raw_block_data", lambda payload: parse_raw_block_data(payload[1], payload[0]), raw_blocks)):
+        cold = 0.0
+        for payload in payloads:
+            clear_address_cache()
+            cold += timed(lambda: parse(payload))[1]
+        warm = timed(lambda: [parse(payload) for payload in payloads])[1]
+        print(f"{name + ', cold':<28} {cold * 1000:>10.1f}")
+        print(f"{name + ', warm':<28} {warm * 1000:>10.1f}")
+
+    print(f"address cache: {get_address_cache_stats()}")
+
+
+if __name__ == "__main__":
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    txs_per_block = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    distinct_pubkeys = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    run(blocks, txs_per_block, distinct_pubkeys)
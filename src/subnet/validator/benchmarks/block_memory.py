@@ -0,0 +1,75 @@
+"""
+Compares the memory held by a parsed block and the time to parse and process it for the object per
+field representation (node_utils.Block) and the columnar one (node_utils.ColumnarBlock).
+
+Processing runs BitcoinNode.process_in_memory_txn_for_indexing over every transaction, as the balance
+tracking challenge does. JSON blocks are rendered with verbosity 3 and parsing includes json decoding, so
+the held memory covers the address strings too; raw blocks resolve their inputs from a pre-filled prevout cache.
+
+Usage: python -m src.subnet.validator.benchmarks.block_memory [<blocks>] [<txs_per_block>]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from src.subnet.validator.benchmarks.fixtures import FixtureChain, to_json_text
+from src.subnet.validator.nodes.bitcoin.node import BitcoinNode
+from src.subnet.validator.nodes.bitcoin.tx_decoder import parse_block_data, parse_block_data_columnar
+from src.subnet.validator.nodes.bitcoin.raw_block import parse_raw_block_data, parse_raw_block_columnar
+
+
+def measure(name, parse, payloads, node):
+    parse_time = process_time = 0.0
+    retained = peak = 0
+    for height, payload in payloads:
+        tracemalloc.start()
+        block = parse(payload, height)
+        current, block_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        retained += current
+        peak = max(peak, block_peak)
+        del block
+
+        # timed separately, tracemalloc slows allocations down
+        start_time = time.perf_counter()
+        block = parse(payload, height)
+        parse_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        transactions = block.transactions
+        resolved_inputs = node.resolve_block_inputs(transactions)
+        for tx in transactions:
+            node.process_in_memory_txn_for_indexing(tx, resolved_inputs)
+        process_time += time.perf_counter() - start_time
+        del block, transactions
+
+    count = len(payloads)
+    print(f"{name:<18} {retained / count / (1024 * 1024):>14.2f} {peak / (1024 * 1024):>10.2f} {parse_time / count * 1000:>12.2f} {process_time / count * 1000:>14.2f}")
+
+
+def run(blocks: int, txs_per_block: int):
+    chain = FixtureChain(block_count=blocks, txs_per_block=txs_per_block)
+    heights = range(1, chain.tip_height + 1)
+    verbose_blocks = [(height, to_json_text(chain.get_verbose_block(height, 3))) for height in heights]
+    raw_blocks = [(height, chain.get_raw_block(height)) for height in heights]
+    # the raw blocks have no prevouts, their inputs resolve from the prevout cache instead of RPC
+    node = BitcoinNode()
+    node.prevout_cache.max_size = 1 << 30
+    for height in range(chain.tip_height + 1):
+        for tx in parse_block_data(chain.get_verbose_block(height, 2)).transactions:
+            node.prevout_cache.put_many({(tx.tx_id, str(vout_id)): (address, amount) for vout_id, address, amount in tx.iter_outputs()})
+
+    print(f"blocks={len(heights)} txs_per_block={txs_per_block}")
+    print(f"{'representation':<18} {'held (MB/blk)':>14} {'peak (MB)':>10} {'parse (ms)':>12} {'process (ms)':>14}")
+    measure("Block (json)", lambda data, height: parse_block_data(json.loads(data, parse_float=Decimal)), verbose_blocks, node)
+    measure("Columnar (json)", lambda data, height: parse_block_data_columnar(json.loads(data, parse_float=Decimal)), verbose_blocks, node)
+    measure("Block (raw)", parse_raw_block_data, raw_blocks, node)
+    measure("Columnar (raw)", parse_raw_block_columnar, raw_blocks, node)
+
+
+if __name__ == "__main__":
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    txs_per_block = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    run(blocks, txs_per_block)
@@ -0,0 +1,101 @@
+"""
+Compares the slot based random selection of a challenge (ChallengeFundsFlowManager.get_random_challenge) with
+the ORDER BY RANDOM() query it replaced, and measures the ring buffer writes keeping the slots dense, for
+pools of 10k, 100k and 1M rows.
+
+Runs against the database of DATABASE_URL (migrated to 014) in a network of its own, which is deleted afterwards.
+
+Usage:
+    python -m src.subnet.validator.benchmarks.challenge_sampling [<rows>,...] [<samples>]
+"""
+import asyncio
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+from src.subnet.validator.database.models.challenge_funds_flow import ChallengeFundsFlowManager
+from src.subnet.validator.database.session_manager import DatabaseSessionManager
+
+NETWORK = "benchmark_sampling"
+
+ORDER_BY_RANDOM_QUERY = text("""
+    SELECT challenge, tx_id
+    FROM challenge_funds_flow
+    WHERE network = :network
+    ORDER BY RANDOM()
+    LIMIT 1
+""")
+
+
+async def fill(session_manager: DatabaseSessionManager, rows: int):
+    async with session_manager.session() as session:
+        async with session.begin():
+            await session.execute(text("DELETE FROM challenge_funds_flow WHERE network = :network"), {"network": NETWORK})
+            await session.execute(text("""
+                INSERT INTO challenge_funds_flow (challenge, tx_id, network, created_at, slot)
+                SELECT '{"kind": "funds_flow", "in_total_amount": 100000, "out_total_amount": 99000}',
+                       md5(:network || i::text), :network, now() - (:rows - i) * interval '1 second', i
+                FROM generate_series(0, :rows - 1) AS i
+            """), {"network": NETWORK, "rows": rows})
+            await session.execute(text("ANALYZE challenge_funds_flow"))
+
+
+async def time_query(session_manager: DatabaseSessionManager, query, samples: int) -> float:
+    async with session_manager.session() as session:
+        start_time = time.perf_counter()
+        for _ in range(samples):
+            (await session.execute(query, {"network": NETWORK})).fetchone()
+        return (time.perf_counter() - start_time) / samples
+
+
+async def time_manager(manager: ChallengeFundsFlowManager, samples: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(samples):
+        await manager.get_random_challenge(NETWORK)
+    return (time.perf_counter() - start_time) / samples
+
+
+async def time_ring_buffer(manager: ChallengeFundsFlowManager, rows: int, batches: int = 10, batch_size: int = 100) -> float:
+    # the oldest rows hold the lowest slots, every batch moves batch_size rows into the slots it frees
+    start_time = time.perf_counter()
+    for batch in range(batches):
+        challenges = [('{"kind": "funds_flow"}', f"benchmark_{batch}_{i}") for i in range(batch_size)]
+        await manager.store_challenges(challenges, NETWORK, rows)
+    return (time.perf_counter() - start_time) / batches
+
+
+async def check_slots(session_manager: DatabaseSessionManager) -> bool:
+    async with session_manager.session() as session:
+        result = await session.execute(text("SELECT COUNT(*), COALESCE(MAX(slot) + 1, 0) FROM challenge_funds_flow WHERE network = :network"), {"network": NETWORK})
+        count, slot_count = result.fetchone()
+        return count == slot_count
+
+
+async def run(sizes, samples: int):
+    session_manager = DatabaseSessionManager()
+    session_manager.init(os.environ["DATABASE_URL"])
+    manager = ChallengeFundsFlowManager(session_manager)
+
+    print(f"{'rows':>9} {'slot ms':>9} {'random ms':>10} {'speedup':>8} {'store 100 ms':>13} {'dense':>6}")
+    try:
+        for rows in sizes:
+            await fill(session_manager, rows)
+            slot_time = await time_manager(manager, samples)
+            # ORDER BY RANDOM() is too slow for as many samples on the large pools
+            random_time = await time_query(session_manager, ORDER_BY_RANDOM_QUERY, max(1, samples // 20))
+            store_time = await time_ring_buffer(manager, rows)
+            dense = await check_slots(session_manager)
+            print(f"{rows:>9} {slot_time * 1000:>9.3f} {random_time * 1000:>10.3f} {random_time / slot_time:>7.0f}x {store_time * 1000:>13.3f} {str(dense):>6}")
+    finally:
+        async with session_manager.session() as session:
+            async with session.begin():
+                await session.execute(text("DELETE FROM challenge_funds_flow WHERE network = :network"), {"network": NETWORK})
+        await session_manager.close()
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000]
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(run(sizes, samples))
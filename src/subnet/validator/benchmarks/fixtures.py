@@ -0,0 +1,331 @@
+"""
+Deterministic synthetic chain used by the benchmarks (and tests) in place of recorded mainnet blocks.
+
+Every block exists both serialized (getblock verbosity 0) and rendered as bitcoind's verbose JSON
+(verbosity 1, 2 and 3, getrawtransaction), so the JSON and raw code paths can be compared on identical data.
+Transactions spend outputs of earlier blocks, so inputs resolve like they do on a real chain.
+"""
+import hashlib
+import json
+import random
+import struct
+from decimal import Decimal
+
+from src.subnet.validator.nodes.bitcoin.node_utils import SATOSHI, pubkey_to_address, create_p2sh_address, \
+    create_p2pkh_address, create_segwit_address, construct_redeem_script, hash_redeem_script
+
+BLOCK_SUBSIDY = 50 * 100_000_000
+GENESIS_TIME = 1231006505
+BITS = 0x1D00FFFF
+
+SCRIPT_WEIGHTS = {
+    "pubkeyhash": 30,
+    "scripthash": 15,
+    "witness_v0_keyhash": 30,
+    "witness_v1_taproot": 10,
+    "pubkey": 5,
+    "multisig": 3,
+    "nulldata": 2,
+    "nonstandard": 1,
+}
+# early blocks pay almost exclusively to bare public keys
+EARLY_CHAIN_SCRIPT_WEIGHTS = {"pubkey": 90, "pubkeyhash": 10}
+
+
+def double_sha256(data: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def varint(n: int) -> bytes:
+    if n < 0xFD:
+        return bytes([n])
+    if n <= 0xFFFF:
+        return b"\xfd" + struct.pack("<H", n)
+    return b"\xfe" + struct.pack("<I", n)
+
+
+def btc(satoshi: int) -> Decimal:
+    return Decimal(satoshi) / SATOSHI
+
+
+class FixtureOutput:
+    __slots__ = ("value", "script", "script_type", "asm", "address")
+
+    def __init__(self, value, script, script_type, asm, address):
+        self.value = value
+        self.script = script
+        self.script_type = script_type
+        self.asm = asm
+        # the address as derived by parse_block_data, None for nulldata and nonstandard
+        self.address = address
+
+    def get_script_pub_key(self):
+        script_pub_key = {"asm": self.asm, "hex": self.script.hex(), "type": self.script_type}
+        # like bitcoind, bare public keys and bare multisig have no address field
+        if self.address and self.script_type not in ("pubkey", "multisig"):
+            script_pub_key["address"] = self.address
+        return script_pub_key
+
+
+class FixtureTransaction:
+    __slots__ = ("txid", "raw", "vins", "vouts", "fee", "is_coinbase")
+
+    def __init__(self, txid, raw, vins, vouts, fee, is_coinbase):
+        self.txid = txid
+        self.raw = raw
+        # (spent txid, spent vout, spent FixtureOutput, height of the spent output) per input
+        self.vins = vins
+        self.vouts = vouts
+        self.fee = fee
+        self.is_coinbase = is_coinbase
+
+
+class FixtureBlock:
+    __slots__ = ("height", "hash", "previous_hash", "time", "nonce", "raw", "transactions")
+
+    def __init__(self, height, block_hash, previous_hash, time, nonce, raw, transactions):
+        self.height = height
+        self.hash = block_hash
+        self.previous_hash = previous_hash
+        self.time = time
+        self.nonce = nonce
+        self.raw = raw
+        self.transactions = transactions
+
+
+class FixtureChain:
+
+    def __init__(self, block_count: int = 10, txs_per_block: int = 200, seed: int = 7, script_weights: dict = None, pubkey_pool_size: int = None):
+        self.rng = random.Random(seed)
+        # P2PK outputs pay to this many distinct public keys when set, like the reused keys of early blocks
+        self.pubkey_pool = [self._make_pubkey() for _ in range(pubkey_pool_size)] if pubkey_pool_size else None
+        self.script_types = list((script_weights or SCRIPT_WEIGHTS).keys())
+        self.script_type_weights = list((script_weights or SCRIPT_WEIGHTS).values())
+        self.blocks = []
+        self.transactions = {}
+        self.tx_heights = {}
+        self.block_heights = {}
+        self._unspent = []  # (txid, vout, FixtureOutput, height)
+        for _ in range(block_count):
+            self._add_block(txs_per_block)
+
+    @property
+    def tip_height(self) -> int:
+        return len(self.blocks) - 1
+
+    # chain generation
+
+    def _make_output(self, value: int) -> FixtureOutput:
+        rng = self.rng
+        script_type = rng.choices(self.script_types, self.script_type_weights)[0]
+        if script_type == "pubkeyhash":
+            pubkey_hash = rng.randbytes(20)
+            script = b"\x76\xa9\x14" + pubkey_hash + b"\x88\xac"
+            return FixtureOutput(value, script, script_type, f"OP_DUP OP_HASH160 {pubkey_hash.hex()} OP_EQUALVERIFY OP_CHECKSIG", create_p2pkh_address(pubkey_hash))
+        if script_type == "scripthash":
+            script_hash = rng.randbytes(20)
+            script = b"\xa9\x14" + script_hash + b"\x87"
+            return FixtureOutput(value, script, script_type, f"OP_HASH160 {script_hash.hex()} OP_EQUAL", create_p2sh_address(script_hash))
+        if script_type == "witness_v0_keyhash":
+            program = rng.randbytes(20)
+            return FixtureOutput(value, b"\x00\x14" + program, script_type, f"0 {program.hex()}", create_segwit_address(0, program))
+        if script_type == "witness_v1_taproot":
+            program = rng.randbytes(32)
+            return FixtureOutput(value, b"\x51\x20" + program, script_type, f"1 {program.hex()}", create_segwit_address(1, program))
+        if script_type == "pubkey":
+            pubkey = rng.choice(self.pubkey_pool) if self.pubkey_pool else self._make_pubkey()
+            script = bytes([len(pubkey)]) + pubkey + b"\xac"
+            return FixtureOutput(value, script, script_type, f"{pubkey.hex()} OP_CHECKSIG", pubkey_to_address(pubkey.hex()))
+        if script_type == "multisig":
+            pubkeys = [bytes([rng.choice((2, 3))]) + rng.randbytes(32) for _ in range(3)]
+            script = b"\x51" + b"".join(b"\x21" + pubkey for pubkey in pubkeys) + b"\x53\xae"
+            asm = "1 " + " ".join(pubkey.hex() for pubkey in pubkeys) + " 3 OP_CHECKMULTISIG"
+            address = create_p2sh_address(hash_redeem_script(construct_redeem_script([pubkey.hex() for pubkey in pubkeys], 1)))
+            return FixtureOutput(value, script, script_type, asm, address)
+        if script_type == "nulldata":
+            data = rng.randbytes(20)
+            return FixtureOutput(0, b"\x6a\x14" + data, script_type, f"OP_RETURN {data.hex()}", None)
+        return FixtureOutput(value, b"\x51", "nonstandard", "1", None)
+
+    def _make_pubkey(self) -> bytes:
+        rng = self.rng
+        return (b"\x04" + rng.randbytes(64)) if rng.random() < 0.5 else (bytes([rng.choice((2, 3))]) + rng.randbytes(32))
+
+    def _serialize_tx(self, vins, vouts, witness: bool):
+        body = varint(len(vins))
+        for prev_txid, prev_vout, script_sig in vins:
+            body += bytes.fromhex(prev_txid)[::-1] + struct.pack("<I", prev_vout) + varint(len(script_sig)) + script_sig + b"\xff\xff\xff\xff"
+        body += varint(len(vouts))
+        for vout in vouts:
+            body += struct.pack("<q", vout.value) + varint(len(vout.script)) + vout.script
+        version, locktime = struct.pack("<i", 2), b"\x00\x00\x00\x00"
+        txid = double_sha256(version + body + locktime)[::-1].hex()
+        if witness:
+            witnesses = b"".join(b"\x02" + varint(71) + self.rng.randbytes(71) + varint(33) + self.rng.randbytes(33) for _ in vins)
+            return txid, version + b"\x00\x01" + body + witnesses + locktime
+        return txid, version + body + locktime
+
+    def _add_block(self, txs_per_block: int):
+        rng = self.rng
+        height = len(self.blocks)
+        transactions = []
+        fees = 0
+
+        spendable = len(self._unspent)
+        for _ in range(min(txs_per_block - 1, spendable // 2)):
+            if not self._unspent:
+                break
+            inputs = []
+            for _ in range(rng.randint(1, min(3, len(self._unspent)))):
+                inputs.append(self._unspent.pop(rng.randrange(len(self._unspent))))
+            in_value = sum(output.value for _, _, output, _ in inputs)
+            fee = min(in_value, rng.randint(200, 5000))
+            out_value = in_value - fee
+            output_count = rng.randint(1, 4)
+            vouts = []
+            for i in range(output_count):
+                value = out_value // output_count + (out_value % output_count if i == 0 else 0)
+                vouts.append(self._make_output(value))
+            # nulldata outputs carry no value, their share goes to the first spendable output or to the fee
+            receiver = next((vout for vout in vouts if vout.script_type != "nulldata"), None)
+            if receiver is not None:
+                receiver.value += out_value - sum(vout.value for vout in vouts)
+            fee = in_value - sum(vout.value for vout in vouts)
+            vins = [(txid, vout, rng.randbytes(rng.randint(70, 107))) for txid, vout, _, _ in inputs]
+            txid, raw = self._serialize_tx(vins, vouts, witness=rng.random() < 0.6)
+            transactions.append(FixtureTransaction(txid, raw, inputs, vouts, fee, False))
+            fees += fee
+
+        coinbase_script = struct.pack("<I", height)[:3] + rng.randbytes(8)
+        # while there are not enough outputs to spend, the coinbase fans out to fill the next blocks
+        coinbase_output_count = 2 * txs_per_block if len(self._unspent) < 2 * txs_per_block else 1
+        coinbase_value = BLOCK_SUBSIDY + fees
+        coinbase_vouts = []
+        while len(coinbase_vouts) < coinbase_output_count:
+            vout = self._make_output(coinbase_value // coinbase_output_count)
+            if vout.script_type not in ("nulldata", "nonstandard"):
+                coinbase_vouts.append(vout)
+        coinbase_vouts[0].value += coinbase_value - sum(vout.value for vout in coinbase_vouts)
+        coinbase_txid, coinbase_raw = self._serialize_tx([("00" * 32, 0xFFFFFFFF, bytes([len(coinbase_script)]) + coinbase_script)], coinbase_vouts, witness=False)
+        transactions.insert(0, FixtureTransaction(coinbase_txid, coinbase_raw, [], coinbase_vouts, 0, True))
+
+        hashes = [bytes.fromhex(tx.txid)[::-1] for tx in transactions]
+        while len(hashes) > 1:
+            if len(hashes) % 2:
+                hashes.append(hashes[-1])
+            hashes = [double_sha256(hashes[i] + hashes[i + 1]) for i in range(0, len(hashes), 2)]
+        previous_hash = self.blocks[-1].hash if self.blocks else "00" * 32
+        block_time = GENESIS_TIME + height * 600
+        nonce = rng.getrandbits(32)
+        header = struct.pack("<i", 1) + bytes.fromhex(previous_hash)[::-1] + hashes[0] + struct.pack("<III", block_time, BITS, nonce)
+        raw = header + varint(len(transactions)) + b"".join(tx.raw for tx in transactions)
+        block_hash = double_sha256(header)[::-1].hex()
+
+        self.blocks.append(FixtureBlock(height, block_hash, previous_hash if height else None, block_time, nonce, raw, transactions))
+        self.block_heights[block_hash] = height
+        for tx in transactions:
+            self.transactions[tx.txid] = tx
+            self.tx_heights[tx.txid] = height
+            for n, vout in enumerate(tx.vouts):
+                if vout.script_type not in ("nulldata", "nonstandard"):
+                    self._unspent.append((tx.txid, n, vout, height))
+
+    # bitcoind renderings
+
+    def get_block_hash(self, height: int) -> str:
+        return self.blocks[height].hash
+
+    def get_raw_block(self, height: int) -> bytes:
+        return self.blocks[height].raw
+
+    def _render_transaction(self, tx: FixtureTransaction, verbosity: int) -> dict:
+        if tx.is_coinbase:
+            vins = [{"coinbase": tx.raw[42: 42 + tx.raw[41]].hex(), "sequence": 4294967295}]
+        else:
+            vins = []
+            for prev_txid, prev_vout, output, height in tx.vins:
+                vin = {"txid": prev_txid, "vout": prev_vout, "scriptSig": {"asm": "", "hex": ""}, "sequence": 4294967295}
+                if verbosity >= 3:
+                    vin["prevout"] = {"generated": self.transactions[prev_txid].is_coinbase, "height": height,
+                                      "value": btc(output.value), "scriptPubKey": output.get_script_pub_key()}
+                vins.append(vin)
+        rendered = {
+            "txid": tx.txid,
+            "hash": tx.txid,
+            "version": 2,
+            "size": len(tx.raw),
+            "locktime": 0,
+            "vin": vins,
+            "vout": [{"value": btc(vout.value), "n": n, "scriptPubKey": vout.get_script_pub_key()} for n, vout in enumerate(tx.vouts)],
+        }
+        if verbosity >= 2 and not tx.is_coinbase:
+            rendered["fee"] = btc(tx.fee)
+        rendered["hex"] = tx.raw.hex()
+        return rendered
+
+    def get_verbose_block(self, height: int, verbosity: int = 2) -> dict:
+        block = self.blocks[height]
+        rendered = {
+            "hash": block.hash,
+            "confirmations": self.tip_height - height + 1,
+            "height": height,
+            "version": 1,
+            "time": block.time,
+            "mediantime": block.time,
+            "nonce": block.nonce,
+            "bits": f"{BITS:08x}",
+            "difficulty": 1,
+            "nTx": len(block.transactions),
+        }
+        if block.previous_hash:
+            rendered["previousblockhash"] = block.previous_hash
+        if verbosity == 1:
+            rendered["tx"] = [tx.txid for tx in block.transactions]
+        else:
+            rendered["tx"] = [self._render_transaction(tx, verbosity) for tx in block.transactions]
+        return rendered
+
+    def get_verbose_transaction(self, txid: str, verbosity: int = 1) -> dict:
+        tx = self.transactions[txid]
+        height = self.tx_heights[txid]
+        rendered = self._render_transaction(tx, 3 if verbosity >= 2 else 1)
+        rendered.update({"blockhash": self.blocks[height].hash, "confirmations": self.tip_height - height + 1,
+                         "time": self.blocks[height].time, "blocktime": self.blocks[height].time})
+        return rendered
+
+    def get_block_stats(self, height: int) -> dict:
+        transactions = self.blocks[height].transactions[1:]
+        return {
+            "blockhash": self.blocks[height].hash,
+            "height": height,
+            "subsidy": BLOCK_SUBSIDY,
+            "totalfee": sum(tx.fee for tx in transactions),
+            "total_out": sum(vout.value for tx in transactions for vout in tx.vouts),
+            "txs": len(transactions) + 1,
+        }
+
+    def call(self, method: str, *params):
+        """
+        Answers a bitcoind RPC call from the chain, for fake RPC pools and servers.
+        """
+        if method == "getblockcount":
+            return self.tip_height
+        if method == "getblockhash":
+            return self.get_block_hash(params[0])
+        if method == "getblock":
+            height = self.block_heights[params[0]]
+            verbosity = params[1] if len(params) > 1 else 1
+            return self.get_raw_block(height).hex() if verbosity == 0 else self.get_verbose_block(height, verbosity)
+        if method == "getblockstats":
+            height = params[0] if isinstance(params[0], int) else self.block_heights[params[0]]
+            stats = self.get_block_stats(height)
+            return {key: stats[key] for key in params[1]} if len(params) > 1 else stats
+        if method == "getrawtransaction":
+            verbosity = int(params[1]) if len(params) > 1 else 0
+            return self.transactions[params[0]].raw.hex() if verbosity == 0 else self.get_verbose_transaction(params[0], verbosity)
+        raise ValueError(f"Unsupported method: {method}")
+
+
+def to_json_text(data) -> str:
+    # bitcoind prints amounts as JSON numbers
+    return json.dumps(data, default=lambda value: float(value) if isinstance(value, Decimal) else str(value))
@@ -0,0 +1,69 @@
+"""
+Measures the transactions per second of tx_decoder.parse_block_data starting from the RPC response body,
+for the response decoders RpcConnection can use: the standard library with Decimal floats (AuthServiceProxy),
+the standard library with floats and orjson (BITCOIN_NODE_RPC_FAST_JSON), the last two in strict and lenient mode.
+
+Usage:
+    python -m src.subnet.validator.benchmarks.tx_decoding [<blocks>] [<txs_per_block>]
+    python -m src.subnet.validator.benchmarks.tx_decoding replay <fixture_dir>
+
+`replay` uses the verbose blocks recorded by `block_parsing record`.
+"""
+import json
+import sys
+import time
+from decimal import Decimal
+
+from src.subnet.validator.benchmarks.block_parsing import generate, load_recorded
+from src.subnet.validator.nodes.bitcoin import tx_decoder
+from src.subnet.validator.nodes.bitcoin.tx_decoder import parse_block_data
+
+
+def get_decoders():
+    decoders = [
+        ("json Decimal", lambda body: json.loads(body, parse_float=Decimal), True),
+        ("json float", json.loads, True),
+        ("json float (lenient)", json.loads, False),
+    ]
+    if tx_decoder.orjson is not None:
+        decoders.append(("orjson", tx_decoder.orjson.loads, True))
+        decoders.append(("orjson (lenient)", tx_decoder.orjson.loads, False))
+    else:
+        print("orjson is not installed, skipping its decoder")
+    return decoders
+
+
+def run(fixtures, repeat: int = 3):
+    bodies = [json_text.encode() for _, json_text, _ in fixtures]
+    transaction_count = sum(len(json.loads(body)["tx"]) for body in bodies)
+    print(f"blocks={len(bodies)} transactions={transaction_count}")
+    print(f"{'decoder':<22} {'decode (s)':>11} {'parse (s)':>10} {'tx/s':>10}")
+
+    baseline = None
+    for name, loads, strict in get_decoders():
+        decode_time = parse_time = 0.0
+        for body in bodies:
+            best_decode = best_parse = float("inf")
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                block_data = loads(body)
+                decoded_time = time.perf_counter()
+                parse_block_data(block_data, strict)
+                end_time = time.perf_counter()
+                best_decode = min(best_decode, decoded_time - start_time)
+                best_parse = min(best_parse, end_time - decoded_time)
+            decode_time += best_decode
+            parse_time += best_parse
+
+        elapsed = decode_time + parse_time
+        baseline = baseline or elapsed
+        print(f"{name:<22} {decode_time:>11.3f} {parse_time:>10.3f} {transaction_count / elapsed:>10.0f}  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        run(load_recorded(sys.argv[2]))
+    else:
+        blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+        txs_per_block = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        run(generate(blocks, txs_per_block))
@@ -0,0 +1,114 @@
+"""
+Compares the pickled 4096-shard tx_out hash table with the memory-mapped TxOutIndex.
+
+Usage: python -m src.subnet.validator.benchmarks.tx_out_index [<records>] [<pickle_files>] [<lookups>]
+
+Every variant is loaded in a fresh process, so the reported RSS is the cost of that variant alone.
+"""
+import multiprocessing
+import os
+import pickle
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from src.subnet.validator.nodes.bitcoin.node_utils import initialize_tx_out_hash_table, get_tx_out_hash_table_sub_keys
+from src.subnet.validator.nodes.bitcoin.tx_out_index import TxOutIndex, convert_pickles
+
+
+def get_rss_mb():
+    with open("/proc/self/statm") as file:
+        resident_pages = int(file.read().split()[1])
+    return resident_pages * resource.getpagesize() / (1024 * 1024)
+
+
+def generate_keys(records: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [(rng.randbytes(32).hex(), str(rng.randint(0, 3))) for _ in range(records)]
+
+
+def write_pickles(keys, pickle_files: int, tmp_dir: str):
+    paths = []
+    chunk = (len(keys) + pickle_files - 1) // pickle_files
+    for part in range(pickle_files):
+        hash_table = initialize_tx_out_hash_table()
+        for i, (txid, vout) in enumerate(keys[part * chunk: (part + 1) * chunk]):
+            hash_table[txid[:3]][(txid, vout)] = (f"1Address{i % 50000}", i)
+        path = os.path.join(tmp_dir, f"tx_out_{part}.pkl")
+        with open(path, "wb") as file:
+            pickle.dump(hash_table, file)
+        paths.append(path)
+    return paths
+
+
+def measure_pickles(pickle_paths, lookup_keys, results):
+    rss_before = get_rss_mb()
+    start_time = time.perf_counter()
+    tx_out_hash_table = initialize_tx_out_hash_table()
+    for path in pickle_paths:
+        with open(path, "rb") as file:
+            hash_table = pickle.load(file)
+        for sub_key in get_tx_out_hash_table_sub_keys():
+            tx_out_hash_table[sub_key].update(hash_table[sub_key])
+        del hash_table
+    load_time = time.perf_counter() - start_time
+    rss = get_rss_mb() - rss_before
+
+    start_time = time.perf_counter()
+    for txid, vout in lookup_keys:
+        tx_out_hash_table[txid[:3]].get((txid, vout))
+    lookup_time = time.perf_counter() - start_time
+    results.put(("pickle", load_time, rss, lookup_time / len(lookup_keys)))
+
+
+def measure_index(index_path, lookup_keys, results):
+    rss_before = get_rss_mb()
+    start_time = time.perf_counter()
+    index = TxOutIndex(index_path)
+    load_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for txid, vout in lookup_keys:
+        index.get(txid, vout)
+    lookup_time = time.perf_counter() - start_time
+    # pages touched by the lookups are file backed and shared with every other process mapping the index
+    rss = get_rss_mb() - rss_before
+    results.put(("mmap index", load_time, rss, lookup_time / len(lookup_keys)))
+
+
+def run(records: int, pickle_files: int, lookups: int):
+    keys = generate_keys(records)
+    lookup_keys = random.Random(11).sample(keys, min(lookups, len(keys)))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pickle_paths = write_pickles(keys, pickle_files, tmp_dir)
+        index_path = os.path.join(tmp_dir, "tx_out.idx")
+
+        start_time = time.perf_counter()
+        convert_pickles(pickle_paths, index_path)
+        convert_time = time.perf_counter() - start_time
+
+        pickle_size = sum(os.path.getsize(path) for path in pickle_paths) / (1024 * 1024)
+        index_size = os.path.getsize(index_path) / (1024 * 1024)
+
+        results = multiprocessing.Queue()
+        for target, path in ((measure_pickles, pickle_paths), (measure_index, index_path)):
+            process = multiprocessing.Process(target=target, args=(path, lookup_keys, results))
+            process.start()
+            process.join()
+
+        print(f"records={records} pickle_files={pickle_files} lookups={len(lookup_keys)}")
+        print(f"pickle size {pickle_size:.1f} MB, index size {index_size:.1f} MB, conversion {convert_time:.2f} s")
+        print(f"{'variant':<12} {'load (s)':>10} {'rss (MB)':>10} {'lookup (us)':>12}")
+        for _ in range(2):
+            name, load_time, rss, lookup_time = results.get()
+            print(f"{name:<12} {load_time:>10.3f} {rss:>10.1f} {lookup_time * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    pickle_files = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+    run(records, pickle_files, lookups)
@@ -1,31 +1,46 @@
+from functools import partial
 from loguru import logger
-from src.subnet.validator.nodes.bitcoin.node import BitcoinNode  # This can be substituted for EthereumNode if needed
+from src.subnet.validator.blockchain.common.challenge_batch import ChallengeBatchRunner, get_challenges_to_generate
 from src.subnet.validator.blockchain.common.funds_flow.base_challenge_generator import BaseChallengeGenerator
 from src.subnet.validator.database.models.challenge_funds_flow import ChallengeFundsFlowManager
+from src.subnet.validator.nodes.bitcoin.async_node import AsyncBitcoinNode
 
 
 class ChallengeGenerator(BaseChallengeGenerator):
-    def __init__(self, settings):
+    def __init__(self, settings, node):
         super().__init__(settings)
-        self.node = BitcoinNode()  # You can substitute this with EthereumNode for Ethereum challenges
+        self.node = node  # shared BitcoinNode, see NodeFactory.get_shared_node
+        self.async_node = AsyncBitcoinNode(node)
         self.network = "bitcoin"  # You can change this to "ethereum" for Ethereum challenges
+        self.batch_runner = ChallengeBatchRunner(settings.CHALLENGE_BATCH_WORKERS)
 
-    async def generate_and_store(self, challenge_manager: ChallengeFundsFlowManager, threshold: int):
-        # Retrieve block details
-        last_block_height = self.node.get_current_block_height() - 6
+    async def warm_up(self):
+        self.node.warm_up()
+
+    async def shutdown(self):
+        self.batch_runner.shutdown()
+        await self.async_node.close()
 
-        # Generate a funds flow challenge
-        funds_flow_challenge, tx_id = self.node.create_funds_flow_challenge(0, last_block_height)
+    async def create_challenge(self, last_block_height: int):
+        funds_flow_challenge, tx_id = await self.async_node.create_funds_flow_challenge(0, last_block_height)
+        return funds_flow_challenge.json(), tx_id
 
-        # Convert the challenge object to JSON string
-        challenge_json = funds_flow_challenge.json()
-        logger.debug(f"Generated Funds Flow Challenge: {challenge_json}")
+    async def generate_and_store(self, challenge_manager: ChallengeFundsFlowManager, threshold: int):
+        # Retrieve block details
+        last_block_height = await self.async_node.get_current_block_height() - 6
 
-        # Check if the current challenge count has exceeded the threshold
         current_challenge_count = await challenge_manager.get_challenge_count(self.network)
-        if current_challenge_count >= threshold:
-            await challenge_manager.try_delete_oldest_challenge(self.network)
+        count = get_challenges_to_generate(current_challenge_count, threshold, self.settings.CHALLENGE_BATCH_SIZE)
+        batch_size = max(self.settings.CHALLENGE_BATCH_SIZE, self.batch_runner.workers)
+        stored = 0
+
+        # Generate funds flow challenges concurrently and store every batch at once
+        async for challenge_rows in self.batch_runner.iter_batches(partial(self.create_challenge, last_block_height), count, batch_size):
+            for challenge_json, _ in challenge_rows:
+                logger.debug(f"Generated Funds Flow Challenge: {challenge_json}")
 
-        # Store the challenge JSON and transaction ID in the database
-        await challenge_manager.store_challenge(challenge_json, tx_id, self.network)
-        logger.info(f"Challenge stored in the database successfully.")
+            # Store the challenge JSONs and transaction IDs, evicting the oldest challenges above the threshold
+            await challenge_manager.store_challenges(challenge_rows, self.network, threshold)
+            logger.info(f"Challenges stored in the database successfully.", count=len(challenge_rows), requested=count)
+            stored += len(challenge_rows)
+        return stored
@@ -1,11 +1,12 @@
+import asyncio
 import random
 from src.subnet.protocol.llm_engine import MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BALANCE_TRACKING
 from loguru import logger
-from src.subnet.validator.nodes.bitcoin.node import BitcoinNode
 from src.subnet.validator.blockchain.common.base_prompt_generator import BasePromptGenerator
 from src.subnet.validator.database.models.validation_prompt import ValidationPromptManager
 from src.subnet.validator.llm.base_llm import BaseLLM
-from src.subnet.validator.nodes.bitcoin.node_utils import parse_block_data
+from src.subnet.validator.nodes.bitcoin.async_node import AsyncBitcoinNode
+from src.subnet.validator.nodes.bitcoin.tx_decoder import parse_block_data_columnar
 
 
 class PromptGenerator(BasePromptGenerator):
@@ -19,14 +20,23 @@ class PromptGenerator(BasePromptGenerator):
         "Identify all addresses involved in the transaction with txid {txid} in block {block}."
     ]
 
-    def __init__(self, settings, llm: BaseLLM):
+    def __init__(self, settings, llm: BaseLLM, node):
         super().__init__(settings)
-        self.node = BitcoinNode()  # Bitcoin-specific node
+        self.node = node  # shared BitcoinNode, see NodeFactory.get_shared_node
+        self.async_node = AsyncBitcoinNode(node)
         self.llm = llm  # LLM instance passed to use for prompt generation
         self.network = "bitcoin"  # Store network as a class member
 
-    def create_graph_funds_flow_graph(self, block_data, batch_size=8):
+    async def warm_up(self):
+        self.node.warm_up()
+
+    async def shutdown(self):
+        await self.async_node.close()
+
+    def create_graph_funds_flow_graph(self, block_data, batch_size=8, resolved_inputs: dict = None):
         transactions = block_data.transactions
+        if resolved_inputs is None:
+            resolved_inputs = self.node.resolve_block_inputs(transactions)
 
         # Initialize an empty dictionary to hold the graph data
         graph_data = {
@@ -43,7 +53,7 @@ class PromptGenerator(BasePromptGenerator):
                 batch_transactions = transactions[i: i + batch_size]
 
                 for tx in batch_transactions:
-                    in_amount_by_address, out_amount_by_address, input_addresses, output_addresses, in_total_amount, out_total_amount = self.node.process_in_memory_txn_for_indexing(tx)
+                    in_amount_by_address, out_amount_by_address, input_addresses, output_addresses, in_total_amount, out_total_amount = self.node.process_in_memory_txn_for_indexing(tx, resolved_inputs)
 
                     # Create nodes for all input addresses
                     for address in input_addresses:
@@ -100,9 +110,9 @@ class PromptGenerator(BasePromptGenerator):
 
     async def generate_and_store(self, validation_prompt_manager: ValidationPromptManager, threshold: int):
         # Retrieve block details
-        last_block_height = self.node.get_current_block_height() - 6
+        last_block_height = await self.async_node.get_current_block_height() - 6
         random_block_height = random.randint(0, last_block_height)
-        tx_id, block_data = self.node.get_random_txid_from_block(random_block_height)
+        tx_id, block_data = await self.async_node.get_random_txid_from_block(random_block_height)
         logger.debug(f"Random Txid: {tx_id}")
 
         selected_template = random.choice(self.PROMPT_TEMPLATES)
@@ -110,10 +120,11 @@ class PromptGenerator(BasePromptGenerator):
         logger.debug(f"Generated Challenge Prompt: {prompt}")
         prompt_model_type = self.llm.determine_model_type(prompt, self.network)
 
-        parsed_block_data = parse_block_data(block_data)
+        parsed_block_data = await asyncio.to_thread(parse_block_data_columnar, block_data)
         transformed_block_data = None
         if prompt_model_type == MODEL_TYPE_FUNDS_FLOW:
-            transformed_block_data = self.create_graph_funds_flow_graph(parsed_block_data)
+            resolved_inputs = await self.async_node.resolve_block_inputs(parsed_block_data.transactions)
+            transformed_block_data = self.create_graph_funds_flow_graph(parsed_block_data, resolved_inputs=resolved_inputs)
         if prompt_model_type == MODEL_TYPE_BALANCE_TRACKING:
             transformed_block_data = None
             # TODO: Implement balance tracking graph generation
@@ -124,3 +135,4 @@ class PromptGenerator(BasePromptGenerator):
 
         await validation_prompt_manager.store_prompt(prompt, prompt_model_type, transformed_block_data, self.network)
         logger.info(f"Prompt stored in the database successfully.")
+        return 1
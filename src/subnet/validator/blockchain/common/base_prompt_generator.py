@@ -7,9 +7,22 @@ class BasePromptGenerator(ABC):
     def __init__(self, settings: ValidatorSettings):
         self.settings = settings
 
+    async def warm_up(self):
+        """
+        Called once by the worker before the first generate_and_store, to open connections and fill caches.
+        """
+        pass
+
+    async def shutdown(self):
+        """
+        Called once by the worker after the last generate_and_store. Shared resources, like the node, stay open.
+        """
+        pass
+
     @abstractmethod
     async def generate_and_store(self, validation_prompt_manager: ValidationPromptManager, threshold: int):
         """
         This method should be implemented by all subclasses to generate prompts specific to a network.
+        Returns the number of prompts stored.
         """
         pass
\ No newline at end of file
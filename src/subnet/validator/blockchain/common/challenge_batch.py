@@ -0,0 +1,54 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+
+class ChallengeBatchRunner:
+    """
+    Runs a challenge constructor concurrently: blocking ones on a bounded thread pool, coroutine functions
+    on the event loop. At most `workers` challenges are built at once, which bounds the RPC requests the
+    generator sends to the node.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="challenge-batch")
+
+    async def run(self, create_challenge, count: int) -> list:
+        if inspect.iscoroutinefunction(create_challenge):
+            semaphore = asyncio.Semaphore(self.workers)
+
+            async def run_one():
+                async with semaphore:
+                    return await create_challenge()
+
+            results = await asyncio.gather(*(run_one() for _ in range(count)), return_exceptions=True)
+        else:
+            loop = asyncio.get_running_loop()
+            results = await asyncio.gather(*(loop.run_in_executor(self._executor, create_challenge) for _ in range(count)), return_exceptions=True)
+
+        challenges = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to create challenge", error={'exception_type': result.__class__.__name__, 'exception_message': str(result)})
+            else:
+                challenges.append(result)
+        return challenges
+
+    async def iter_batches(self, create_challenge, count: int, batch_size: int):
+        """
+        Yields `count` challenges in batches of up to `batch_size`, so every batch can be stored while the pool fills.
+        """
+        while count > 0:
+            size = min(count, batch_size)
+            count -= size
+            yield await self.run(create_challenge, size)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def get_challenges_to_generate(challenge_count: int, threshold: int, batch_size: int) -> int:
+    # fills an empty or partial pool in one cycle, then refreshes batch_size challenges per cycle
+    return max(threshold - challenge_count, batch_size)
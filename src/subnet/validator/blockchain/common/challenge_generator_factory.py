@@ -9,7 +9,7 @@ from src.subnet.protocol.llm_engine import MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BAL
 
 class ChallengeGeneratorFactory:
     @classmethod
-    def create_challenge_generator(cls, network: str, model: str, settings) -> funds_flow.BaseChallengeGenerator | balance_tracking.BaseChallengeGenerator:
+    def create_challenge_generator(cls, network: str, model: str, settings, node) -> funds_flow.BaseChallengeGenerator | balance_tracking.BaseChallengeGenerator:
         # Dictionary mapping network and model types to their corresponding challenge generator classes
         challenge_generator_class = {
             (NETWORK_BITCOIN, MODEL_TYPE_FUNDS_FLOW): bitcoin_funds_flow.ChallengeGenerator,
@@ -22,5 +22,5 @@ class ChallengeGeneratorFactory:
         if challenge_generator_class is None:
             raise ValueError(f"Unsupported combination of network: {network} and model: {model}")
 
-        # Instantiate the appropriate challenge generator class with settings and llm
-        return challenge_generator_class(settings=settings)
+        # Instantiate the appropriate challenge generator class with settings and the shared node
+        return challenge_generator_class(settings=settings, node=node)
@@ -6,9 +6,22 @@ class BaseChallengeGenerator(ABC):
     def __init__(self, settings: ValidatorSettings):
         self.settings = settings
 
+    async def warm_up(self):
+        """
+        Called once by the worker before the first generate_and_store, to open connections and fill caches.
+        """
+        pass
+
+    async def shutdown(self):
+        """
+        Called once by the worker after the last generate_and_store. Shared resources, like the node, stay open.
+        """
+        pass
+
     @abstractmethod
     async def generate_and_store(self, challenge_manager: ChallengeFundsFlowManager, threshold: int):
         """
         This method should be implemented by all subclasses to generate challenges specific to a network and model type.
+        Returns the number of challenges stored.
         """
         pass
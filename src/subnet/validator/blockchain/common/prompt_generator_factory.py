@@ -6,7 +6,7 @@ from src.subnet.protocol.blockchain import NETWORK_BITCOIN, NETWORK_ETHEREUM
 
 class PromptGeneratorFactory:
     @classmethod
-    def create_prompt_generator(cls, network: str, settings, llm) -> BasePromptGenerator:
+    def create_prompt_generator(cls, network: str, settings, llm, node) -> BasePromptGenerator:
         # Dictionary mapping network types to their corresponding prompt generator classes
         prompt_generator_class = {
             NETWORK_BITCOIN: bitcoin.PromptGenerator,
@@ -17,5 +17,5 @@ class PromptGeneratorFactory:
         if prompt_generator_class is None:
             raise ValueError(f"Unsupported network type: {network}")
 
-        # Instantiate the appropriate prompt generator class with settings, llm, and network
-        return prompt_generator_class(settings=settings, llm=llm)
+        # Instantiate the appropriate prompt generator class with settings, llm, and the shared node
+        return prompt_generator_class(settings=settings, llm=llm, node=node)
@@ -4,9 +4,9 @@ from loguru import logger
 
 
 class ChallengeGenerator(BaseChallengeGenerator):
-    def __init__(self, settings):
+    def __init__(self, settings, node):
         super().__init__(settings)
-        #self.node = EthereumNode()  # Use Ethereum-specific node
+        self.node = node  # Use Ethereum-specific node
         self.network = "ethereum"  # Set network to Ethereum
 
     async def generate_and_store(self, challenge_manager: ChallengeFundsFlowManager, threshold: int):
@@ -16,9 +16,9 @@ class PromptGenerator(BasePromptGenerator):
         "Identify all addresses involved in the transaction with txid {txid} in block {block}."
     ]
 
-    def __init__(self, settings, llm: BaseLLM):
+    def __init__(self, settings, llm: BaseLLM, node):
         super().__init__(settings)
-        #self.node = EthereumNode()  # Ethereum-specific node (commented as per your instruction)
+        self.node = node  # Ethereum-specific node
         self.llm = llm  # LLM instance passed to use for prompt generation
         self.network = 'ethereum'  # Store the network as a member variable
 
@@ -0,0 +1,77 @@
+import asyncio
+import random
+import zlib
+
+from loguru import logger
+
+ASSIGNMENT_RANDOM = "random"
+ASSIGNMENT_COHORT = "cohort"
+
+
+class ChallengeSampler:
+    """
+    Challenges and prompts of one validation step, loaded with one query per pool and network the first time a
+    miner of the network needs them, instead of an ORDER BY RANDOM() query per miner.
+
+    With the "random" assignment every miner gets a challenge and a prompt drawn independently from the pools.
+    With "cohort", `cohorts` of each are drawn for the step and a miner gets the ones of its cohort (a hash of
+    its key), so the miners of a cohort answer the same challenges and prompt and their answers are
+    directly comparable.
+
+    The pools are random samples of up to `sample_size` rows (0 loads them whole), drawn by slot.
+    """
+
+    def __init__(self, challenge_funds_flow_manager, challenge_balance_tracking_manager, validation_prompt_manager, assignment: str = ASSIGNMENT_RANDOM, cohorts: int = 4, sample_size: int = 0):
+        if assignment not in (ASSIGNMENT_RANDOM, ASSIGNMENT_COHORT):
+            raise ValueError(f"Unknown challenge assignment: {assignment}")
+        self.managers = {
+            'funds_flow': challenge_funds_flow_manager.get_challenges,
+            'balance_tracking': challenge_balance_tracking_manager.get_challenges,
+            'prompt': validation_prompt_manager.get_prompts,
+        }
+        self.assignment = assignment
+        self.cohorts = cohorts
+        self.sample_size = sample_size
+        self.seed = random.getrandbits(32)
+        self._pools = {}  # (pool, network) -> drawn items
+        self._locks = {}
+
+    async def _get_pool(self, pool: str, network: str) -> list:
+        key = (pool, network)
+        if key not in self._pools:
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                if key not in self._pools:
+                    if self.assignment == ASSIGNMENT_COHORT:
+                        items = await self.managers[pool](network, limit=self.cohorts)
+                        items = random.sample(items, min(self.cohorts, len(items)))
+                    else:
+                        items = await self.managers[pool](network, limit=self.sample_size)
+                    self._pools[key] = items
+                    logger.debug(f"Loaded challenge pool", pool=pool, network=network, size=len(items))
+        return self._pools[key]
+
+    async def _sample(self, pool: str, network: str, miner_key: str):
+        items = await self._get_pool(pool, network)
+        if not items:
+            return None
+        if self.assignment == ASSIGNMENT_COHORT:
+            return items[zlib.crc32(f"{self.seed}:{miner_key}".encode()) % len(items)]
+        return random.choice(items)
+
+    async def get_funds_flow_challenge(self, network: str, miner_key: str):
+        """
+        Returns (challenge, tx_id), like ChallengeFundsFlowManager.get_random_challenge.
+        """
+        return await self._sample('funds_flow', network, miner_key) or (None, None)
+
+    async def get_balance_tracking_challenge(self, network: str, miner_key: str):
+        """
+        Returns (challenge, expected response), like ChallengeBalanceTrackingManager.get_random_challenge.
+        """
+        return await self._sample('balance_tracking', network, miner_key) or (None, None)
+
+    async def get_prompt(self, network: str, miner_key: str):
+        """
+        Returns (id, prompt, prompt_model_type, responses), like ValidationPromptManager.get_random_prompt.
+        """
+        return await self._sample('prompt', network, miner_key) or (None, None, None, None)
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+from loguru import logger
+
+
+class MinerChallengeRun:
+    """
+    State of one miner in a validation step: when it was queued and started, how long each phase took, and
+    the partial result the miner has earned so far, which is scored when the step deadline cuts it short.
+    """
+
+    def __init__(self, uid: int, miner_info, phase_timeouts: dict):
+        self.uid = uid
+        self.miner_info = miner_info
+        self.phase_timeouts = phase_timeouts
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.phase_durations = {}
+        self.timed_out_phase = None
+        self.deadline_exceeded = False
+        self.partial_result = None
+        self.result = None
+
+    @property
+    def queue_wait(self) -> float:
+        return (self.started_at or self.finished_at or time.monotonic()) - self.queued_at
+
+    async def phase(self, name: str, awaitable):
+        """
+        Awaits one phase of the challenge within its timeout (none when `phase_timeouts` has no entry for it).
+        """
+        start_time = time.monotonic()
+        try:
+            return await asyncio.wait_for(awaitable, self.phase_timeouts.get(name))
+        except asyncio.TimeoutError:
+            self.timed_out_phase = name
+            logger.warning(f"Miner challenge phase timed out", uid=self.uid, phase=name, timeout=self.phase_timeouts.get(name))
+            raise
+        finally:
+            self.phase_durations[name] = time.monotonic() - start_time
+
+
+class ChallengeScheduler:
+    """
+    Challenges the miners of a validation step with at most `max_concurrency` of them in flight, which bounds
+    the sockets and database sessions the step holds at once.
+
+    Every phase of a challenge runs within its timeout (see MinerChallengeRun.phase), and the whole step within
+    `step_timeout`: the miners still queued or running then are cancelled and get their partial result, so a
+    few slow miners can't stall the weights of all the others.
+    """
+
+    def __init__(self, max_concurrency: int, phase_timeouts: dict = None, step_timeout: float = None):
+        self.max_concurrency = max_concurrency
+        self.phase_timeouts = phase_timeouts or {}
+        self.step_timeout = step_timeout
+        self.last_stats = {}
+
+    async def run(self, miners: dict, challenge_miner) -> dict:
+        """
+        Runs `challenge_miner(run)` for every uid -> miner_info of `miners`, returns uid -> result, the partial
+        result for the miners the deadline cut short.
+        """
+        start_time = time.monotonic()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        runs = [MinerChallengeRun(uid, miner_info, self.phase_timeouts) for uid, miner_info in miners.items()]
+
+        async def run_one(run: MinerChallengeRun):
+            async with semaphore:
+                run.started_at = time.monotonic()
+                try:
+                    run.result = await challenge_miner(run)
+                finally:
+                    run.finished_at = time.monotonic()
+
+        tasks = {asyncio.ensure_future(run_one(run)): run for run in runs}
+        pending = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.step_timeout)
+        for task in pending:
+            tasks[task].deadline_exceeded = True
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for task, run in tasks.items():
+            if task not in pending and task.exception() is not None:
+                e = task.exception()
+                logger.error(f"Failed to challenge miner", uid=run.uid, error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+        self.last_stats = self.get_stats(runs, time.monotonic() - start_time)
+        logger.info(f"Challenged miners", **self.last_stats)
+        return {run.uid: run.partial_result if run.deadline_exceeded else run.result for run in runs}
+
+    def get_stats(self, runs: list, step_duration: float) -> dict:
+        queue_waits = [run.queue_wait for run in runs]
+        phase_durations = {}
+        timed_out_phases = {}
+        for run in runs:
+            for name, duration in run.phase_durations.items():
+                phase_durations.setdefault(name, []).append(duration)
+            if run.timed_out_phase:
+                timed_out_phases[run.timed_out_phase] = timed_out_phases.get(run.timed_out_phase, 0) + 1
+
+        return {
+            'miners': len(runs),
+            'completed': sum(1 for run in runs if not run.deadline_exceeded and run.result is not None),
+            'failed': sum(1 for run in runs if not run.deadline_exceeded and run.result is None),
+            'deadline_exceeded': sum(1 for run in runs if run.deadline_exceeded),
+            'partial': sum(1 for run in runs if run.deadline_exceeded and run.partial_result is not None),
+            'not_started': sum(1 for run in runs if run.started_at is None),
+            'timed_out_phases': timed_out_phases,
+            'step_duration': step_duration,
+            'queue_wait': get_duration_stats(queue_waits),
+            'phases': {name: get_duration_stats(durations) for name, durations in phase_durations.items()},
+        }
+
+
+def get_duration_stats(durations: list) -> dict:
+    if not durations:
+        return {'count': 0}
+    return {'count': len(durations), 'avg': sum(durations) / len(durations), 'max': max(durations)}
@@ -4,15 +4,14 @@ from src.subnet.validator._config import ValidatorSettings, load_environment
 from src.subnet.validator.database.session_manager import DatabaseSessionManager
 from src.subnet.validator.blockchain.common.challenge_generator_factory import ChallengeGeneratorFactory
 from src.subnet.protocol.llm_engine import MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BALANCE_TRACKING
+from src.subnet.validator.nodes.factory import NodeFactory
 from loguru import logger
 
 
-async def generate_challenge_and_store(settings: ValidatorSettings, network: str, model: str, challenge_manager, threshold: int):
-    challenge_generator = ChallengeGeneratorFactory.create_challenge_generator(network, model, settings)
-    await challenge_generator.generate_and_store(challenge_manager, threshold)
+async def main(settings: ValidatorSettings, network: str, model: str, frequency: int, threshold: int, terminate_event: threading.Event, node=None, generated=None):
+    if node is None:
+        node = NodeFactory.get_shared_node(network)
 
-
-async def main(settings: ValidatorSettings, network: str, model: str, frequency: int, threshold: int, terminate_event: threading.Event):
     session_manager = DatabaseSessionManager()
     session_manager.init(settings.DATABASE_URL)
 
@@ -26,16 +25,26 @@ async def main(settings: ValidatorSettings, network: str, model: str, frequency:
     else:
         raise ValueError(f"Unsupported model type: {model}")
 
+    # created once per worker and reused by every cycle, together with the node and its caches
+    challenge_generator = ChallengeGeneratorFactory.create_challenge_generator(network, model, settings, node)
+    await challenge_generator.warm_up()
+
     try:
         while not terminate_event.is_set():
             try:
                 # Generate and store challenges
-                await generate_challenge_and_store(settings, network, model, challenge_manager, threshold)
+                stored = await challenge_generator.generate_and_store(challenge_manager, threshold)
+                if generated is not None and stored:
+                    # shared with the GeneratorSupervisor for its throughput reports
+                    with generated.get_lock():
+                        generated.value += stored
                 terminate_event.wait(frequency * 60)  # Wait for the specified frequency
             except asyncio.TimeoutError:
                 logger.error("Timeout occurred while generating or storing the challenge.")
     except Exception as e:
         logger.error(f"An error occurred while generating or storing the challenge: {e}")
+    finally:
+        await challenge_generator.shutdown()
 
 
 if __name__ == "__main__":
@@ -80,5 +89,6 @@ if __name__ == "__main__":
 
     # Run the main function
     asyncio.run(main(settings, network, model, frequency, threshold, terminate_event))
+    NodeFactory.close_shared_nodes()
 
     logger.info("Challenge Utility stopped.")
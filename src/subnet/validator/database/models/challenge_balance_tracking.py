@@ -1,5 +1,5 @@
-from typing import Optional, Tuple
-from sqlalchemy import Column, Integer, String, DateTime, insert, delete
+from typing import List, Optional, Tuple
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, insert, delete
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.future import select
 from sqlalchemy.dialects.postgresql import insert
@@ -9,6 +9,7 @@ from datetime import datetime
 
 from src.subnet.validator.database import OrmBase
 from src.subnet.validator.database.session_manager import DatabaseSessionManager
+from src.subnet.validator.database.slots import lock_slots, get_slot_count, get_random_slot_clause, get_random_slots_clause, compact_slots
 from loguru import logger
 
 Base = declarative_base()
@@ -21,6 +22,9 @@ class ChallengeBalanceTracking(OrmBase):
     balance_tracking_expected_response = Column(String, nullable=False)  # Added expected response field
     network = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    slot = Column(Integer, nullable=False)  # dense per network, see database.slots
+
+    __table_args__ = (UniqueConstraint('network', 'slot'),)
 
 
 class ChallengeBalanceTrackingManager:
@@ -30,12 +34,14 @@ class ChallengeBalanceTrackingManager:
     async def store_challenge(self, challenge: str, block_height: int, expected_response: str, network: str):
         async with self.session_manager.session() as session:
             async with session.begin():
+                await lock_slots(session, ChallengeBalanceTracking.__tablename__, network)
                 stmt = insert(ChallengeBalanceTracking).values(
                     challenge=challenge,
                     block_height=str(block_height),
                     balance_tracking_expected_response=str(expected_response),
                     network=network,
-                    created_at=datetime.utcnow()  # Automatically set the created_at field
+                    created_at=datetime.utcnow(),  # Automatically set the created_at field
+                    slot=await get_slot_count(session, ChallengeBalanceTracking.__tablename__, network)  # an existing row keeps its slot
                 ).on_conflict_do_update(
                     index_elements=['block_height'],  # Conflict on block_height
                     set_=dict(
@@ -47,14 +53,76 @@ class ChallengeBalanceTrackingManager:
                 )
                 await session.execute(stmt)
 
+    async def store_challenges(self, challenges: List[Tuple[str, int, str]], network: str, threshold: int):
+        """
+        Upserts (challenge, block_height, expected_response) tuples in one statement, then deletes the oldest
+        challenges of the network above threshold so the table behaves as a ring buffer.
+        """
+        if not challenges:
+            return
+
+        created_at = datetime.utcnow()
+        # a statement can't update the same row twice, keep the last challenge of a duplicated block height
+        rows = {
+            str(block_height): dict(
+                challenge=challenge,
+                block_height=str(block_height),
+                balance_tracking_expected_response=str(expected_response),
+                network=network,
+                created_at=created_at
+            )
+            for challenge, block_height, expected_response in challenges
+        }
+
+        async with self.session_manager.session() as session:
+            async with session.begin():
+                await lock_slots(session, ChallengeBalanceTracking.__tablename__, network)
+                # the new rows take the next slots, the existing ones keep theirs
+                result = await session.execute(select(ChallengeBalanceTracking.block_height, ChallengeBalanceTracking.slot).where(ChallengeBalanceTracking.block_height.in_(list(rows))))
+                existing_slots = dict(result.all())
+                next_slot = await get_slot_count(session, ChallengeBalanceTracking.__tablename__, network)
+                for row_key, row in rows.items():
+                    if row_key in existing_slots:
+                        row['slot'] = existing_slots[row_key]
+                    else:
+                        row['slot'] = next_slot
+                        next_slot += 1
+
+                stmt = insert(ChallengeBalanceTracking).values(list(rows.values()))
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['block_height'],
+                    set_=dict(
+                        challenge=stmt.excluded.challenge,
+                        balance_tracking_expected_response=stmt.excluded.balance_tracking_expected_response,
+                        network=stmt.excluded.network,
+                        created_at=stmt.excluded.created_at
+                    )
+                )
+                await session.execute(stmt)
+
+                query = text("""
+                    DELETE FROM challenge_balance_tracking
+                    WHERE id IN (
+                        SELECT id FROM challenge_balance_tracking
+                        WHERE network = :network
+                        ORDER BY created_at DESC, id DESC
+                        OFFSET :threshold
+                    )
+                    RETURNING id, slot
+                """)
+                result = await session.execute(query, {"network": network, "threshold": threshold})
+                deleted_ids = result.fetchall()
+                await compact_slots(session, ChallengeBalanceTracking.__tablename__, network, [row[1] for row in deleted_ids])
+
+                if deleted_ids:
+                    logger.info(f"Deleted oldest challenges", network=network, count=len(deleted_ids))
+
     async def get_random_challenge(self, network: str) -> Tuple[str, str]:
         async with self.session_manager.session() as session:
-            query = text("""
-                SELECT challenge, balance_tracking_expected_response 
-                FROM challenge_balance_tracking 
-                WHERE network = :network 
-                ORDER BY RANDOM() 
-                LIMIT 1
+            query = text(f"""
+                SELECT challenge, balance_tracking_expected_response
+                FROM challenge_balance_tracking
+                WHERE network = :network AND {get_random_slot_clause('challenge_balance_tracking')}
             """)
             result = await session.execute(query, {"network": network})
             row = result.fetchone()
@@ -64,6 +132,20 @@ class ChallengeBalanceTrackingManager:
                 return row[0], row[1]
             return None, None
 
+    async def get_challenges(self, network: str, limit: int = None) -> List[Tuple[str, str]]:
+        """
+        Returns the (challenge, expected response) pairs of the network, or up to `limit` random ones, the pool a
+        ChallengeSampler assigns from.
+        """
+        async with self.session_manager.session() as session:
+            query = text(f"""
+                SELECT challenge, balance_tracking_expected_response
+                FROM challenge_balance_tracking
+                WHERE network = :network {f"AND {get_random_slots_clause('challenge_balance_tracking')}" if limit else ""}
+            """)
+            result = await session.execute(query, {"network": network, "limit": limit} if limit else {"network": network})
+            return [(row[0], row[1]) for row in result.fetchall()]
+
     async def get_challenge_count(self, network: str):
         async with self.session_manager.session() as session:
             result = await session.execute(
@@ -74,6 +156,7 @@ class ChallengeBalanceTrackingManager:
     async def try_delete_oldest_challenge(self, network: str):
         async with self.session_manager.session() as session:
             async with session.begin():
+                await lock_slots(session, ChallengeBalanceTracking.__tablename__, network)
                 # Raw SQL query to delete the oldest challenge and return the deleted ID
                 query = text("""
                        DELETE FROM challenge_balance_tracking
@@ -83,11 +166,12 @@ class ChallengeBalanceTrackingManager:
                            ORDER BY created_at ASC
                            LIMIT 1
                        )
-                       RETURNING id
+                       RETURNING id, slot
                    """)
                 result = await session.execute(query, {"network": network})
                 deleted_id = result.fetchone()
 
                 if deleted_id:
+                    await compact_slots(session, ChallengeBalanceTracking.__tablename__, network, [deleted_id[1]])
                     logger.info(f"Deleted oldest challenge with ID: {deleted_id[0]}")
 
@@ -1,5 +1,5 @@
-from typing import Tuple
-from sqlalchemy import Column, Integer, String, DateTime, insert
+from typing import List, Tuple
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.future import select
 from sqlalchemy.dialects.postgresql import insert
@@ -9,6 +9,7 @@ from datetime import datetime
 
 from src.subnet.validator.database import OrmBase
 from src.subnet.validator.database.session_manager import DatabaseSessionManager
+from src.subnet.validator.database.slots import lock_slots, get_slot_count, get_random_slot_clause, get_random_slots_clause, compact_slots
 from loguru import logger
 
 Base = declarative_base()
@@ -20,6 +21,9 @@ class ChallengeFundsFlow(OrmBase):
     tx_id = Column(String, nullable=False, unique=True)
     network = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    slot = Column(Integer, nullable=False)  # dense per network, see database.slots
+
+    __table_args__ = (UniqueConstraint('network', 'slot'),)
 
 class ChallengeFundsFlowManager:
     def __init__(self, session_manager: DatabaseSessionManager):
@@ -28,11 +32,13 @@ class ChallengeFundsFlowManager:
     async def store_challenge(self, challenge: str, tx_id: str, network: str):
         async with self.session_manager.session() as session:
             async with session.begin():
+                await lock_slots(session, ChallengeFundsFlow.__tablename__, network)
                 stmt = insert(ChallengeFundsFlow).values(
                     challenge=challenge,
                     tx_id=tx_id,
                     network=network,
-                    created_at=datetime.utcnow()  # Automatically set the created_at field
+                    created_at=datetime.utcnow(),  # Automatically set the created_at field
+                    slot=await get_slot_count(session, ChallengeFundsFlow.__tablename__, network)  # an existing row keeps its slot
                 ).on_conflict_do_update(
                     index_elements=['tx_id'],  # Conflict on tx_id
                     set_=dict(
@@ -43,14 +49,66 @@ class ChallengeFundsFlowManager:
                 )
                 await session.execute(stmt)
 
+    async def store_challenges(self, challenges: List[Tuple[str, str]], network: str, threshold: int):
+        """
+        Upserts (challenge, tx_id) pairs in one statement, then deletes the oldest challenges of the network
+        above threshold so the table behaves as a ring buffer.
+        """
+        if not challenges:
+            return
+
+        created_at = datetime.utcnow()
+        # a statement can't update the same row twice, keep the last challenge of a duplicated tx_id
+        rows = {tx_id: dict(challenge=challenge, tx_id=tx_id, network=network, created_at=created_at) for challenge, tx_id in challenges}
+
+        async with self.session_manager.session() as session:
+            async with session.begin():
+                await lock_slots(session, ChallengeFundsFlow.__tablename__, network)
+                # the new rows take the next slots, the existing ones keep theirs
+                result = await session.execute(select(ChallengeFundsFlow.tx_id, ChallengeFundsFlow.slot).where(ChallengeFundsFlow.tx_id.in_(list(rows))))
+                existing_slots = dict(result.all())
+                next_slot = await get_slot_count(session, ChallengeFundsFlow.__tablename__, network)
+                for row_key, row in rows.items():
+                    if row_key in existing_slots:
+                        row['slot'] = existing_slots[row_key]
+                    else:
+                        row['slot'] = next_slot
+                        next_slot += 1
+
+                stmt = insert(ChallengeFundsFlow).values(list(rows.values()))
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['tx_id'],
+                    set_=dict(
+                        challenge=stmt.excluded.challenge,
+                        network=stmt.excluded.network,
+                        created_at=stmt.excluded.created_at
+                    )
+                )
+                await session.execute(stmt)
+
+                query = text("""
+                    DELETE FROM challenge_funds_flow
+                    WHERE id IN (
+                        SELECT id FROM challenge_funds_flow
+                        WHERE network = :network
+                        ORDER BY created_at DESC, id DESC
+                        OFFSET :threshold
+                    )
+                    RETURNING id, slot
+                """)
+                result = await session.execute(query, {"network": network, "threshold": threshold})
+                deleted_ids = result.fetchall()
+                await compact_slots(session, ChallengeFundsFlow.__tablename__, network, [row[1] for row in deleted_ids])
+
+                if deleted_ids:
+                    logger.info(f"Deleted oldest challenges", network=network, count=len(deleted_ids))
+
     async def get_random_challenge(self, network: str) -> Tuple[str, str]:
         async with self.session_manager.session() as session:
-            query = text("""
-                SELECT challenge, tx_id 
-                FROM challenge_funds_flow 
-                WHERE network = :network 
-                ORDER BY RANDOM() 
-                LIMIT 1
+            query = text(f"""
+                SELECT challenge, tx_id
+                FROM challenge_funds_flow
+                WHERE network = :network AND {get_random_slot_clause('challenge_funds_flow')}
             """)
             result = await session.execute(query, {"network": network})
             row = result.fetchone()
@@ -60,6 +118,20 @@ class ChallengeFundsFlowManager:
                 return row[0], row[1]
             return None, None
 
+    async def get_challenges(self, network: str, limit: int = None) -> List[Tuple[str, str]]:
+        """
+        Returns the (challenge, tx_id) pairs of the network, or up to `limit` random ones, the pool a
+        ChallengeSampler assigns from.
+        """
+        async with self.session_manager.session() as session:
+            query = text(f"""
+                SELECT challenge, tx_id
+                FROM challenge_funds_flow
+                WHERE network = :network {f"AND {get_random_slots_clause('challenge_funds_flow')}" if limit else ""}
+            """)
+            result = await session.execute(query, {"network": network, "limit": limit} if limit else {"network": network})
+            return [(row[0], row[1]) for row in result.fetchall()]
+
     async def get_challenge_count(self, network: str):
         async with self.session_manager.session() as session:
             result = await session.execute(
@@ -70,6 +142,7 @@ class ChallengeFundsFlowManager:
     async def try_delete_oldest_challenge(self, network: str):
         async with self.session_manager.session() as session:
             async with session.begin():
+                await lock_slots(session, ChallengeFundsFlow.__tablename__, network)
                 # Raw SQL query to delete the oldest challenge and return the deleted ID
                 query = text("""
                     DELETE FROM challenge_funds_flow
@@ -79,10 +152,11 @@ class ChallengeFundsFlowManager:
                         ORDER BY created_at ASC
                         LIMIT 1
                     )
-                    RETURNING id
+                    RETURNING id, slot
                 """)
                 result = await session.execute(query, {"network": network})
                 deleted_id = result.fetchone()
 
                 if deleted_id:
+                    await compact_slots(session, ChallengeFundsFlow.__tablename__, network, [deleted_id[1]])
                     logger.info(f"Deleted oldest challenge with ID: {deleted_id[0]}")
@@ -1,6 +1,6 @@
 import json
 from decimal import Decimal
-from sqlalchemy import Column, Integer, String, DateTime, insert, Text
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, insert, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.future import select
 from sqlalchemy.dialects.postgresql import insert
@@ -12,6 +12,7 @@ from sqlalchemy.orm import relationship, joinedload
 
 from src.subnet.validator.database import OrmBase
 from src.subnet.validator.database.session_manager import DatabaseSessionManager
+from src.subnet.validator.database.slots import lock_slots, get_slot_count, get_random_slot_clause, get_random_slots_clause, compact_slots
 from loguru import logger
 
 Base = declarative_base()
@@ -25,6 +26,9 @@ class ValidationPrompt(OrmBase):
     data = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     network = Column(String, nullable=False)
+    slot = Column(Integer, nullable=False)  # dense per network, see database.slots
+
+    __table_args__ = (UniqueConstraint('network', 'slot'),)
 
     # Use back_populates to explicitly define the relationship
     responses = relationship("ValidationPromptResponse", back_populates="validation_prompt", cascade="all, delete", lazy="joined")
@@ -47,12 +51,14 @@ class ValidationPromptManager:
         data_json = json.dumps(data)
         async with self.session_manager.session() as session:
             async with session.begin():
+                await lock_slots(session, ValidationPrompt.__tablename__, network)
                 stmt = insert(ValidationPrompt).values(
                     prompt=prompt,
                     prompt_model_type=prompt_model_type,
                     data=data_json,
                     network=network,
-                    created_at=datetime.utcnow()
+                    created_at=datetime.utcnow(),
+                    slot=await get_slot_count(session, ValidationPrompt.__tablename__, network)
                 )
                 await session.execute(stmt)
 
@@ -65,12 +71,11 @@ class ValidationPromptManager:
                 select(ValidationPrompt)
                 .options(joinedload(ValidationPrompt.responses))  # Eagerly load responses
                 .where(ValidationPrompt.network == network)
-                .order_by(func.random())  # Get a random prompt
-                .limit(1)
+                .where(text(get_random_slot_clause(ValidationPrompt.__tablename__)).bindparams(network=network))  # Get a random prompt
             )
 
             result = await session.execute(stmt)
-            validation_prompt = result.scalars().first()
+            validation_prompt = result.unique().scalars().first()
 
             if validation_prompt:
                 return (
@@ -82,6 +87,26 @@ class ValidationPromptManager:
 
             return None, None, None
 
+    async def get_prompts(self, network: str, limit: int = None):
+        """
+        Returns the (id, prompt, prompt_model_type, responses) of the network, or of up to `limit` random prompts,
+        with their responses in one DB roundtrip.
+        """
+        async with self.session_manager.session() as session:
+            stmt = (
+                select(ValidationPrompt)
+                .options(joinedload(ValidationPrompt.responses))
+                .where(ValidationPrompt.network == network)
+            )
+            if limit:
+                stmt = stmt.where(text(get_random_slots_clause(ValidationPrompt.__tablename__)).bindparams(network=network, limit=limit))
+
+            result = await session.execute(stmt)
+            return [
+                (validation_prompt.id, validation_prompt.prompt, validation_prompt.prompt_model_type, validation_prompt.responses)
+                for validation_prompt in result.unique().scalars().all()
+            ]
+
     async def get_prompt_count(self, network: str):
         async with self.session_manager.session() as session:
             result = await session.execute(
@@ -91,19 +116,22 @@ class ValidationPromptManager:
 
     async def try_delete_oldest_prompt(self, network: str):
         async with self.session_manager.session() as session:
-            query = text("""
-                DELETE FROM validation_prompt
-                WHERE id = (
-                    SELECT id 
-                    FROM validation_prompt
-                    WHERE network = :network
-                    ORDER BY created_at ASC
-                    LIMIT 1
-                )
-                RETURNING id
-            """)
-            result = await session.execute(query, {"network": network})
-            deleted_id = result.fetchone()
-
-            if deleted_id:
-                logger.info(f"Deleted oldest prompt with ID: {deleted_id[0]}")
+            async with session.begin():
+                await lock_slots(session, ValidationPrompt.__tablename__, network)
+                query = text("""
+                    DELETE FROM validation_prompt
+                    WHERE id = (
+                        SELECT id 
+                        FROM validation_prompt
+                        WHERE network = :network
+                        ORDER BY created_at ASC
+                        LIMIT 1
+                    )
+                    RETURNING id, slot
+                """)
+                result = await session.execute(query, {"network": network})
+                deleted_id = result.fetchone()
+
+                if deleted_id:
+                    await compact_slots(session, ValidationPrompt.__tablename__, network, [deleted_id[1]])
+                    logger.info(f"Deleted oldest prompt with ID: {deleted_id[0]}")
@@ -0,0 +1,66 @@
+"""
+Dense slot numbering for the challenge and prompt pools, for constant time random selection.
+
+The rows of a network hold the slots 0 to count - 1 (unique per network), so a random row is the one with
+slot floor(random() * (max(slot) + 1)): two lookups of the (network, slot) index instead of the full scan
+and sort of ORDER BY RANDOM(). Writers keep the numbering dense under a transaction level advisory lock per
+table and network: inserted rows take the next slots, and the rows with the highest slots are moved into the
+slots deleted rows leave behind (swap-delete).
+"""
+from typing import List, Tuple
+
+from sqlalchemy import text
+
+
+async def lock_slots(session, table: str, network: str):
+    """
+    Serializes the writers of the table's network until the end of the transaction.
+    """
+    await session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table), hashtext(:network))"), {"table": table, "network": network})
+
+
+async def get_slot_count(session, table: str, network: str) -> int:
+    result = await session.execute(text(f"SELECT COALESCE(MAX(slot) + 1, 0) FROM {table} WHERE network = :network"), {"network": network})
+    return result.scalar()
+
+
+def get_random_slot_clause(table: str) -> str:
+    # an uncorrelated subquery, random() is evaluated once
+    return f"slot = (SELECT FLOOR(RANDOM() * (MAX(slot) + 1))::integer FROM {table} WHERE network = :network)"
+
+
+def get_random_slots_clause(table: str) -> str:
+    # up to :limit random slots (fewer when some are drawn twice), the max is evaluated once and random() per row
+    return (f"slot IN (SELECT FLOOR(RANDOM() * (SELECT MAX(slot) + 1 FROM {table} WHERE network = :network))::integer "
+            f"FROM generate_series(1, :limit))")
+
+
+def get_slot_moves(deleted_slots: List[int], slot_count: int) -> List[Tuple[int, int]]:
+    """
+    Returns the (from, to) slot moves that make the numbering dense again after the rows holding
+    `deleted_slots` were deleted from `slot_count` dense slots.
+    """
+    deleted = set(deleted_slots)
+    remaining_count = slot_count - len(deleted)
+    holes = sorted(slot for slot in deleted if slot < remaining_count)
+    movers = [slot for slot in range(remaining_count, slot_count) if slot not in deleted]
+    return list(zip(movers, holes))
+
+
+async def compact_slots(session, table: str, network: str, deleted_slots: List[int]):
+    """
+    Moves the rows with the highest slots into the slots of the rows just deleted, under the lock_slots lock.
+    """
+    if not deleted_slots:
+        return
+    slot_count = max(await get_slot_count(session, table, network), max(deleted_slots) + 1)
+    moves = get_slot_moves(deleted_slots, slot_count)
+    if not moves:
+        return
+
+    values = ", ".join(f"({int(old_slot)}, {int(new_slot)})" for old_slot, new_slot in moves)
+    await session.execute(text(f"""
+        UPDATE {table} AS t SET slot = moves.new_slot
+        FROM (VALUES {values}) AS moves(old_slot, new_slot)
+        WHERE t.network = :network AND t.slot = moves.old_slot
+    """), {"network": network})
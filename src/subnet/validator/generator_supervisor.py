@@ -0,0 +1,204 @@
+"""
+Runs the prompt and challenge generators in worker processes, so their CPU heavy block parsing and
+address derivation does not hold the GIL of the process timing the miner responses.
+
+Workers are spawned (not forked, the validator process runs threads and database connections), restarted
+with an exponential backoff whenever they exit before the supervisor stops, and count the prompts and
+challenges they store in shared memory for the throughput reports.
+
+Every worker process creates its own node: the memory-mapped tx_out index (BITCOIN_V2_TX_OUT_INDEX) is
+shared between them through the page cache, pickled tx_out hash tables are loaded by each worker, which is
+why the generators only run in worker processes by default with an index and no pickles.
+"""
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+from loguru import logger
+
+
+def get_generator_worker_mode(worker_mode: str = None) -> str:
+    """
+    Returns `worker_mode` ('process' or 'thread'), or when not set 'process' if the nodes use a tx_out index
+    and no tx_out hash table pickles, 'thread' otherwise.
+    """
+    uses_pickles = bool(os.environ.get("BITCOIN_V2_TX_OUT_HASHMAP_PICKLES"))
+    if not worker_mode:
+        return 'process' if os.environ.get("BITCOIN_V2_TX_OUT_INDEX") and not uses_pickles else 'thread'
+    if worker_mode == 'process' and uses_pickles:
+        logger.warning(f"Every generator worker process loads the tx_out hash table pickles, set BITCOIN_V2_TX_OUT_INDEX instead or use the thread worker mode")
+    return worker_mode
+
+
+class GeneratorWorker:
+
+    def __init__(self, name: str, target, args: tuple, generated):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.generated = generated  # multiprocessing.Value, prompts or challenges stored by the worker
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.restart_delay = 0.0
+        self.restart_at = None
+
+        # throughput since the previous report
+        self.reported_generated = 0
+        self.reported_at = time.monotonic()
+
+
+class GeneratorSupervisor:
+
+    def __init__(self, restart_delay: float = 5, max_restart_delay: float = 300, report_interval: float = 300, poll_interval: float = 1):
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.report_interval = report_interval
+        self.poll_interval = poll_interval
+
+        self._context = multiprocessing.get_context("spawn")
+        self.stop_event = self._context.Event()
+        self.workers = []
+        self._lock = threading.Lock()
+        self._monitor_thread = None
+
+    def add_worker(self, name: str, target, *args):
+        """
+        Registers a worker running `target(*args, stop_event, generated)`, the target must be a module level function.
+        """
+        self.workers.append(GeneratorWorker(name, target, args, self._context.Value('q', 0)))
+
+    def _start_worker(self, worker: GeneratorWorker):
+        worker.process = self._context.Process(target=worker.target, args=(*worker.args, self.stop_event, worker.generated), name=worker.name)
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        logger.info(f"Started generator worker", worker=worker.name, pid=worker.process.pid, restarts=worker.restarts)
+
+    def start(self):
+        with self._lock:
+            for worker in self.workers:
+                self._start_worker(worker)
+        self._monitor_thread = threading.Thread(target=self._monitor, name="generator-supervisor", daemon=True)
+        self._monitor_thread.start()
+
+    def _monitor(self):
+        last_report_at = time.monotonic()
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                self.check_workers()
+                if time.monotonic() - last_report_at >= self.report_interval:
+                    self.report()
+                    last_report_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Failed to supervise generator workers", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+    def check_workers(self):
+        """
+        Schedules the restart of exited workers and restarts the ones whose backoff elapsed.
+        """
+        with self._lock:
+            if self.stop_event.is_set():
+                return
+            now = time.monotonic()
+            for worker in self.workers:
+                if worker.process.is_alive():
+                    continue
+                if worker.restart_at is None:
+                    # the backoff starts over once a worker stayed up longer than the longest delay
+                    if now - worker.started_at > self.max_restart_delay:
+                        worker.restart_delay = self.restart_delay
+                    else:
+                        worker.restart_delay = min(max(worker.restart_delay * 2, self.restart_delay), self.max_restart_delay)
+                    worker.restart_at = now + worker.restart_delay
+                    logger.error(f"Generator worker exited, restarting", worker=worker.name, exitcode=worker.process.exitcode, restart_delay=worker.restart_delay)
+                elif now >= worker.restart_at:
+                    worker.restart_at = None
+                    worker.restarts += 1
+                    self._start_worker(worker)
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        stats = {}
+        for worker in self.workers:
+            generated = worker.generated.value
+            elapsed = now - worker.reported_at
+            stats[worker.name] = {
+                'alive': worker.process is not None and worker.process.is_alive(),
+                'pid': worker.process.pid if worker.process is not None else None,
+                'restarts': worker.restarts,
+                'generated': generated,
+                'generated_per_hour': (generated - worker.reported_generated) * 3600 / elapsed if elapsed else 0.0,
+            }
+        return stats
+
+    def report(self):
+        stats = self.get_stats()
+        now = time.monotonic()
+        for worker in self.workers:
+            worker.reported_generated = stats[worker.name]['generated']
+            worker.reported_at = now
+        logger.info(f"Generator workers", workers=stats)
+
+    def stop(self, timeout: float = 60):
+        self.stop_event.set()
+        if self._monitor_thread is not None:
+            self._monitor_thread.join()
+        with self._lock:
+            for worker in self.workers:
+                if worker.process is None:
+                    continue
+                worker.process.join(timeout)
+                if worker.process.is_alive():
+                    logger.warning(f"Generator worker did not stop, terminating", worker=worker.name, pid=worker.process.pid)
+                    worker.process.terminate()
+                    worker.process.join()
+                logger.info(f"Generator worker stopped", worker=worker.name, exitcode=worker.process.exitcode)
+
+
+def _init_worker(environment: str, name: str):
+    from src.subnet.validator._config import ValidatorSettings, load_environment
+
+    # the supervisor stops the workers through the stop event, ctrl-c reaches the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    logger.remove()
+    logger.add(
+        f"../logs/generator_{name}.log",
+        rotation="500 MB",
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message} | {extra}",
+        level="DEBUG",
+    )
+    logger.add(
+        sys.stdout,
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | " + name + " | {message} | {extra}",
+        level="DEBUG",
+    )
+
+    load_environment(environment)
+    return ValidatorSettings()
+
+
+def run_prompt_generator_worker(environment: str, network: str, frequency: int, threshold: int, stop_event, generated):
+    from src.subnet.validator.llm_prompt_utility import main as llm_main
+    from src.subnet.validator.nodes.factory import NodeFactory
+
+    settings = _init_worker(environment, f"prompt_{network}")
+    try:
+        asyncio.run(llm_main(settings, network, frequency, threshold, stop_event, generated=generated))
+    finally:
+        NodeFactory.close_shared_nodes()
+
+
+def run_challenge_generator_worker(environment: str, network: str, model: str, frequency: int, threshold: int, stop_event, generated):
+    from src.subnet.validator.challenge_utility import main as challenge_main
+    from src.subnet.validator.nodes.factory import NodeFactory
+
+    settings = _init_worker(environment, f"{model}_{network}")
+    try:
+        asyncio.run(challenge_main(settings, network, model, frequency, threshold, stop_event, generated=generated))
+    finally:
+        NodeFactory.close_shared_nodes()
@@ -5,32 +5,40 @@ from src.subnet.validator._config import ValidatorSettings, load_environment
 from src.subnet.validator.database.session_manager import DatabaseSessionManager
 from src.subnet.validator.database.models.validation_prompt import ValidationPromptManager
 from src.subnet.validator.blockchain.common.prompt_generator_factory import PromptGeneratorFactory
+from src.subnet.validator.nodes.factory import NodeFactory
 from loguru import logger
 
 
-async def generate_prompt_and_store(settings: ValidatorSettings, network: str, validation_prompt_manager, llm, threshold: int):
-    prompt_generator = PromptGeneratorFactory.create_prompt_generator(network, settings, llm)
-    await prompt_generator.generate_and_store(validation_prompt_manager, threshold)
-
-
-async def main(settings: ValidatorSettings, network: str, frequency: int, threshold: int, terminate_event: threading.Event):
+async def main(settings: ValidatorSettings, network: str, frequency: int, threshold: int, terminate_event: threading.Event, node=None, generated=None):
     llm = LLMFactory.create_llm(settings)  # LLM setup
+    if node is None:
+        node = NodeFactory.get_shared_node(network)
 
     # Initialize the session manager and the validation prompt manager
     session_manager = DatabaseSessionManager()
     session_manager.init(settings.DATABASE_URL)
     validation_prompt_manager = ValidationPromptManager(session_manager)
 
+    # created once per worker and reused by every cycle, together with the node and its caches
+    prompt_generator = PromptGeneratorFactory.create_prompt_generator(network, settings, llm, node)
+    await prompt_generator.warm_up()
+
     try:
         while not terminate_event.is_set():
             try:
                 # Generate and store prompts
-                await generate_prompt_and_store(settings, network, validation_prompt_manager, llm, threshold)
+                stored = await prompt_generator.generate_and_store(validation_prompt_manager, threshold)
+                if generated is not None and stored:
+                    # shared with the GeneratorSupervisor for its throughput reports
+                    with generated.get_lock():
+                        generated.value += stored
                 terminate_event.wait(frequency * 60)  # Wait for the specified frequency
             except asyncio.TimeoutError:
                 logger.error("Timeout occurred while generating or storing the prompt.")
     except Exception as e:
         logger.error(f"An error occurred while generating or storing the prompt: {e}")
+    finally:
+        await prompt_generator.shutdown()
 
 
 if __name__ == "__main__":
@@ -75,5 +83,6 @@ if __name__ == "__main__":
 
     # Run the main function
     asyncio.run(main(settings, network, frequency, threshold, terminate_event))
+    NodeFactory.close_shared_nodes()
 
     logger.info("LLM Prompt Utility stopped.")
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import aiohttp
+from communex.errors import NetworkTimeoutError  # type: ignore
+from communex.module._protocol import create_method_endpoint, create_request_data  # type: ignore
+from communex.module.client import ModuleClient  # type: ignore
+from loguru import logger
+from substrateinterface import Keypair  # type: ignore
+
+
+class PooledModuleClient(ModuleClient):
+    """
+    ModuleClient that keeps its HTTP connections to the miner alive between calls, instead of opening a
+    session (and a connection) per call. Created and closed by a ModuleClientPool.
+    """
+
+    def __init__(self, host: str, port: int, key: Keypair, idle_timeout: float = 600, max_connections: int = 8):
+        super().__init__(host, port, key)
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+        self.last_used = time.monotonic()
+        self.in_flight = 0
+        self.reconnects = 0
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=self.idle_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def call(self, fn: str, target_key, params=None, timeout: int = 16):
+        self.in_flight += 1
+        self.last_used = time.monotonic()
+        try:
+            try:
+                return await self._post(fn, target_key, params, timeout)
+            except aiohttp.ServerDisconnectedError:
+                # the miner closed a kept alive connection (its keep-alive is shorter than ours), send on a new one
+                self.reconnects += 1
+                return await self._post(fn, target_key, params, timeout)
+        except asyncio.TimeoutError as e:
+            raise NetworkTimeoutError(f"The call took longer than the timeout of {timeout} second(s)").with_traceback(e.__traceback__)
+        finally:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+
+    async def _post(self, fn: str, target_key, params, timeout: int):
+        serialized_data, headers = create_request_data(self.key, target_key, dict(params or {}))
+        async with self._get_session().post(
+            create_method_endpoint(self.host, self.port, fn),
+            data=serialized_data,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            if response.status != 200:
+                response_j = await response.json()
+                raise Exception(f"Unexpected status code: {response.status}, response: {response_j}")
+            if response.content_type != "application/json":
+                raise Exception(f"Unknown content type: {response.content_type}")
+            return await response.json()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+class ModuleClientPool:
+    """
+    Validator wide PooledModuleClients keyed by miner address, so the discovery, challenge and prompt calls of
+    a step, the following steps and the organic queries reuse the connections to a miner.
+
+    Clients idle for `idle_timeout` seconds are closed, and at most `max_clients` are kept: the least recently
+    used client without a call in flight is closed to make room.
+    """
+
+    def __init__(self, key: Keypair, max_clients: int = 512, idle_timeout: float = 600, max_connections_per_client: int = 8):
+        self.key = key
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.max_connections_per_client = max_connections_per_client
+        self._clients = OrderedDict()  # (host, port) -> PooledModuleClient, least recently used first
+        self._loop = None
+        self._last_eviction = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._clients)
+
+    async def get(self, host: str, port: int) -> PooledModuleClient:
+        self._check_loop()
+        await self._evict_idle()
+
+        address = (host, int(port))
+        client = self._clients.get(address)
+        if client is not None:
+            self.hits += 1
+            self._clients.move_to_end(address)
+            client.last_used = time.monotonic()
+            return client
+
+        self.misses += 1
+        client = self._clients[address] = PooledModuleClient(host, int(port), self.key, self.idle_timeout, self.max_connections_per_client)
+        await self._evict_least_recently_used(address)
+        return client
+
+    def _check_loop(self):
+        # sessions belong to the loop they were created in
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._clients:
+                logger.warning(f"Module client pool used from another event loop, dropping its clients", clients=len(self._clients))
+            self._clients.clear()
+            self._loop = loop
+
+    async def _evict_idle(self):
+        now = time.monotonic()
+        if now - self._last_eviction < self.idle_timeout / 4:
+            return
+        self._last_eviction = now
+        idle = [address for address, client in self._clients.items() if client.in_flight == 0 and now - client.last_used > self.idle_timeout]
+        await self._evict(idle)
+
+    async def _evict_least_recently_used(self, keep: tuple):
+        excess = len(self._clients) - self.max_clients
+        if excess > 0:
+            await self._evict([address for address, client in self._clients.items() if client.in_flight == 0 and address != keep][:excess])
+
+    async def _evict(self, addresses: list):
+        clients = [self._clients.pop(address) for address in addresses]
+        self.evicted += len(clients)
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        return {
+            'clients': len(self._clients),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evicted': self.evicted,
+            'reconnects': sum(client.reconnects for client in self._clients.values()),
+        }
+
+    async def close(self):
+        await self._evict(list(self._clients))
@@ -5,6 +5,15 @@ class Node(ABC):
     def __init__(self):
        pass
 
+    def warm_up(self):
+        """
+        Opens the connections of the node ahead of the first request.
+        """
+        pass
+
+    def close(self):
+        pass
+
     @abstractmethod
     def get_current_block_height(self):
         ...
@@ -0,0 +1,185 @@
+import asyncio
+import os
+
+from bitcoinrpc.authproxy import JSONRPCException
+from loguru import logger
+
+from src.subnet.protocol.llm_engine import Challenge, MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BALANCE_TRACKING
+from .async_rpc import AsyncRpcClient
+from .node import BitcoinNode, is_unsupported_verbosity_error
+from .node_utils import get_address_cache_stats
+from .raw_block import parse_raw_block_columnar, get_raw_block_output_totals
+from .tx_decoder import parse_block_data_columnar, get_block_output_totals
+
+
+class AsyncBitcoinNode:
+    """
+    Coroutine variant of BitcoinNode for the challenge and prompt generators.
+
+    Wraps a BitcoinNode and shares its settings, tx_out index, prevout cache and block cache, but sends its
+    requests with an AsyncRpcClient, so a generator can overlap many RPC calls (up to
+    BITCOIN_NODE_ASYNC_MAX_CONCURRENCY) without blocking the event loop. Block parsing and the other CPU
+    heavy steps run in the default executor for the same reason.
+    """
+
+    def __init__(self, node: BitcoinNode, max_concurrency: int = None):
+        self.node = node
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("BITCOIN_NODE_ASYNC_MAX_CONCURRENCY", 16))
+        self.rpc_client = AsyncRpcClient(node.node_rpc_url, max_concurrency=max_concurrency, timeout=node.rpc_pool.timeout)
+
+    async def close(self):
+        await self.rpc_client.close()
+
+    async def get_current_block_height(self):
+        try:
+            return await self.rpc_client.call('getblockcount')
+        except Exception as e:
+            logger.error(f"RPC Provider with Error", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+    async def get_block_by_height(self, block_height):
+        node = self.node
+        try:
+            block_hash = await self.rpc_client.call('getblockhash', block_height)
+            if node.block_cache is None:
+                return await self._get_block_by_hash(block_hash)
+
+            block = await asyncio.to_thread(node.block_cache.get, block_height, block_hash, node.block_verbosity)
+            if block is None:
+                block = await self._get_block_by_hash(block_hash)
+                await asyncio.to_thread(node.block_cache.put, block_height, block_hash, node.block_verbosity, block)
+            return block
+        except Exception as e:
+            logger.error(f"RPC Provider with Error", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+    async def _get_block_by_hash(self, block_hash):
+        node = self.node
+        try:
+            return await self.rpc_client.call('getblock', block_hash, node.block_verbosity)
+        except JSONRPCException as e:
+            if node.block_verbosity < 3 or not is_unsupported_verbosity_error(e):
+                raise
+            logger.warning(f"Node does not support getblock verbosity 3, falling back to verbosity 2", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+            node.block_verbosity = 2
+            return await self.rpc_client.call('getblock', block_hash, node.block_verbosity)
+
+    async def get_raw_block_by_height(self, block_height):
+        node = self.node
+        try:
+            block_hash = await self.rpc_client.call('getblockhash', block_height)
+            raw_block = await asyncio.to_thread(node.block_cache.get, block_height, block_hash, 0) if node.block_cache is not None else None
+            if raw_block is None:
+                raw_block = bytes.fromhex(await self.rpc_client.call('getblock', block_hash, 0))
+                if node.block_cache is not None:
+                    confirmations = await self.rpc_client.call('getblockcount') - block_height + 1
+                    await asyncio.to_thread(node.block_cache.put, block_height, block_hash, 0, raw_block, confirmations)
+            return raw_block
+        except Exception as e:
+            logger.error(f"RPC Provider with Error", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+    async def get_parsed_block_by_height(self, block_height):
+        """
+        Returns the block at `block_height` as a node_utils.ColumnarBlock, see BitcoinNode.get_parsed_block_by_height.
+        """
+        if self.node.block_format == "raw":
+            raw_block = await self.get_raw_block_by_height(block_height)
+            block = await asyncio.to_thread(parse_raw_block_columnar, raw_block, block_height) if raw_block is not None else None
+        else:
+            block = await self.get_block_by_height(block_height)
+            block = await asyncio.to_thread(parse_block_data_columnar, block) if block is not None else None
+        return block
+
+    async def get_txn_data_by_id(self, txn_id: str):
+        try:
+            return await self.rpc_client.call('getrawtransaction', txn_id, 2 if self.node.block_verbosity >= 3 else 1)
+        except Exception as e:
+            logger.error(f"Failed to get transaction data by id", error={'exception_type': e.__class__.__name__, 'exception_message': str(e), 'exception_args': e.args})
+            return None
+
+    async def get_addresses_and_amounts_by_txn_vouts(self, txn_vouts, known_outputs: dict = None) -> dict:
+        """
+        Same as BitcoinNode.get_addresses_and_amounts_by_txn_vouts, but the JSON-RPC batches are sent concurrently.
+        """
+        node = self.node
+        resolved, missing_vouts_by_txn_id = node._lookup_txn_vouts(txn_vouts, known_outputs)
+
+        missing_txn_ids = list(missing_vouts_by_txn_id.keys())
+        chunks = [missing_txn_ids[i: i + node.rpc_batch_size] for i in range(0, len(missing_txn_ids), node.rpc_batch_size)]
+        results = await asyncio.gather(*(self.rpc_client.batch([('getrawtransaction', txn_id, 1) for txn_id in chunk]) for chunk in chunks), return_exceptions=True)
+
+        for chunk, chunk_results in zip(chunks, results):
+            if isinstance(chunk_results, Exception):
+                logger.error(f"Failed to fetch transactions in batch", batch_size=len(chunk), error={'exception_type': chunk_results.__class__.__name__, 'exception_message': str(chunk_results)})
+                chunk_results = [None] * len(chunk)
+            node._resolve_fetched_txn_vouts(resolved, missing_vouts_by_txn_id, chunk, chunk_results)
+
+        return resolved
+
+    async def resolve_block_inputs(self, transactions) -> dict:
+        return await self.get_addresses_and_amounts_by_txn_vouts(self.node._get_txn_vouts_spent_by(transactions), self.node._get_block_outputs(transactions))
+
+    async def process_in_memory_txn_for_indexing(self, tx):
+        resolved_inputs = await self.get_addresses_and_amounts_by_txn_vouts(self.node._get_txn_vouts_spent_by([tx]))
+        return self.node.process_in_memory_txn_for_indexing(tx, resolved_inputs)
+
+    async def get_random_txid_from_block(self, block_height):
+        logger.info(f"Fetching random tx_id from", block_height=block_height)
+
+        block_data = await self.get_block_by_height(block_height)
+        return self.node._select_random_txid(block_data, block_height), block_data
+
+    async def create_funds_flow_challenge(self, start_block_height, last_block_height):
+        node = self.node
+        block_height, offsets = node._select_funds_flow_block(start_block_height, last_block_height)
+        block_data = await self.get_block_by_height(block_height)
+
+        for offset, txn_id in node._iter_funds_flow_candidates(block_height, block_data, offsets):
+            tx = node.create_in_memory_txn(await self.get_txn_data_by_id(txn_id))
+            *_, in_total_amount, out_total_amount = await self.process_in_memory_txn_for_indexing(tx)
+            if out_total_amount != 0:
+                break
+            node._discard_funds_flow_candidate(block_height, offset)
+
+        challenge = Challenge(kind=MODEL_TYPE_FUNDS_FLOW,
+                              in_total_amount=in_total_amount,
+                              out_total_amount=out_total_amount,
+                              tx_id_last_6_chars=txn_id[-6:])
+        return challenge, txn_id
+
+    async def create_balance_tracking_challenge(self, block_height):
+        logger.info(f"Creating balance tracking challenge", block_height=block_height)
+
+        challenge = Challenge(kind=MODEL_TYPE_BALANCE_TRACKING, block_height=block_height)
+        if self.node.balance_tracking_fast_path:
+            try:
+                total_balance_change = await self.get_total_balance_change(block_height)
+                logger.info(f"Created balance tracking challenge from block stats", block_height=block_height)
+                return challenge, total_balance_change
+            except Exception as e:
+                logger.warning(f"Failed to get block stats, resolving every input instead", block_height=block_height, error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+        total_balance_change = await self.get_total_balance_change_from_inputs(block_height)
+        logger.info(f"Created balance tracking challenge", block_height=block_height, rpc_client=self.rpc_client.get_stats(), prevout_cache=self.node.prevout_cache.get_stats(), address_cache=get_address_cache_stats())
+
+        return challenge, total_balance_change
+
+    async def get_total_balance_change(self, block_height) -> int:
+        """
+        See BitcoinNode.get_total_balance_change, the block stats and the block are fetched concurrently.
+        """
+        if self.node.block_format == "raw":
+            get_block, get_output_totals = self.get_raw_block_by_height, get_raw_block_output_totals
+        else:
+            get_block, get_output_totals = self.get_block_by_height, get_block_output_totals
+
+        block_stats, block = await asyncio.gather(self.rpc_client.call('getblockstats', block_height, ['totalfee']), get_block(block_height))
+        if block is None:
+            raise Exception(f"Failed to get block {block_height}")
+        coinbase_out_satoshi, skipped_out_satoshi = await asyncio.to_thread(get_output_totals, block)
+        return coinbase_out_satoshi - int(block_stats['totalfee']) - skipped_out_satoshi
+
+    async def get_total_balance_change_from_inputs(self, block_height) -> int:
+        block_data = await self.get_parsed_block_by_height(block_height)
+        transactions = block_data.transactions
+        resolved_inputs = await self.resolve_block_inputs(transactions)
+        return await asyncio.to_thread(self.node._sum_balance_changes, transactions, resolved_inputs)
@@ -0,0 +1,133 @@
+import asyncio
+import base64
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+from bitcoinrpc.authproxy import JSONRPCException
+from loguru import logger
+
+from . import tx_decoder
+
+# Errors raised by the HTTP transport (as opposed to JSONRPCException raised by bitcoind itself).
+CONNECTION_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+class AsyncRpcClient:
+    """
+    asyncio JSON-RPC client for bitcoind, the counterpart of RpcConnectionPool for coroutines.
+
+    Requests share one aiohttp session with keep-alive connections; at most `max_concurrency` are in flight
+    at once, further callers wait on a semaphore without blocking the event loop. Responses are decoded
+    with tx_decoder.loads, so amounts are floats (see tx_decoder.parse_satoshi).
+    """
+
+    def __init__(self, node_rpc_url: str, max_concurrency: int = 16, timeout: int = 30, max_retries: int = 1):
+        url = urlparse(node_rpc_url)
+        self.url = f"{url.scheme}://{url.hostname}:{url.port or 8332}{url.path or '/'}"
+        self.headers = {'Authorization': 'Basic ' + base64.b64encode(f"{url.username or ''}:{url.password or ''}".encode()).decode()}
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        # created on first use, inside the event loop running the generator
+        self._session = None
+        self._semaphore = None
+        self._request_id = 0
+
+        # metrics
+        self._requests = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._total_wait_time = 0.0
+        self._reconnects = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _post(self, data):
+        session = self._get_session()
+        start_time = time.monotonic()
+        async with self._semaphore:
+            self._total_wait_time += time.monotonic() - start_time
+            self._requests += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        async with session.post(self.url, json=data) as response:
+                            if response.content_type != 'application/json':
+                                raise JSONRPCException({'code': -342, 'message': f"non-JSON HTTP response with '{response.status} {response.reason}' from server"})
+                            return tx_decoder.loads(await response.read())
+                    except CONNECTION_ERRORS as e:
+                        if attempt >= self.max_retries:
+                            raise
+                        attempt += 1
+                        self._reconnects += 1
+                        logger.warning(f"RPC connection failed, retrying", attempt=attempt, error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+            finally:
+                self._in_flight -= 1
+
+    def _next_id(self) -> int:
+        self._request_id += 1
+        return self._request_id
+
+    async def call(self, method: str, *params):
+        """
+        Performs a single RPC call. RPC level errors are raised as JSONRPCException, like RpcConnectionPool.call.
+        """
+        response = await self._post({'version': '1.1', 'method': method, 'params': params, 'id': self._next_id()})
+        if response.get('error') is not None:
+            raise JSONRPCException(response['error'])
+        if 'result' not in response:
+            raise JSONRPCException({'code': -343, 'message': 'missing JSON-RPC result'})
+        return response['result']
+
+    async def batch(self, rpc_calls: list) -> list:
+        """
+        Sends every call in `rpc_calls` (tuples of method and params) as one JSON-RPC batch request,
+        failed calls are returned as JSONRPCException instances, see RpcConnection.batch_call.
+        """
+        if not rpc_calls:
+            return []
+
+        batch_data = [{'version': '1.1', 'method': method, 'params': params, 'id': self._next_id()} for method, *params in rpc_calls]
+        responses = await self._post(batch_data)
+        if not isinstance(responses, list):
+            raise JSONRPCException(responses.get('error') or {'code': -342, 'message': 'invalid batch response'})
+
+        responses_by_id = {response.get('id'): response for response in responses}
+        results = []
+        for request in batch_data:
+            response = responses_by_id.get(request['id'])
+            if response is None:
+                results.append(JSONRPCException({'code': -343, 'message': 'missing JSON-RPC result'}))
+            elif response.get('error') is not None:
+                results.append(JSONRPCException(response['error']))
+            else:
+                results.append(response.get('result'))
+        return results
+
+    def get_stats(self) -> dict:
+        return {
+            'max_concurrency': self.max_concurrency,
+            'requests': self._requests,
+            'in_flight': self._in_flight,
+            'max_in_flight': self._max_in_flight,
+            'avg_wait_time': self._total_wait_time / self._requests if self._requests else 0.0,
+            'reconnects': self._reconnects,
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
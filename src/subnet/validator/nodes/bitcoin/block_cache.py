@@ -0,0 +1,124 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+import zlib
+
+from loguru import logger
+
+# blocks with this many confirmations are treated as immutable, so cached entries are never invalidated
+MIN_CONFIRMATIONS = 6
+
+
+class BlockCache:
+    """
+    On-disk cache of getblock results, one zlib compressed pickle per block, bounded by total size.
+
+    Entries are content addressed by height, hash and verbosity, so a stale entry can never be returned
+    for a reorganized height. The least recently used entries (by file mtime, refreshed on every hit) are
+    evicted once the cache grows past `max_size_bytes`. Writes are atomic, so several validator processes
+    can share a directory; the directory is rescanned before evicting, so the bound holds for all of them.
+    """
+
+    def __init__(self, directory: str, max_size_bytes: int = 2 << 30, compression_level: int = 6):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+        self._entries = {}  # file name -> (size, last used)
+        self._total_size = 0
+        self._scan()
+
+    def _scan(self):
+        # the entries written by every process sharing the directory
+        entries = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".blk"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries[entry.name] = (stat.st_size, stat.st_mtime)
+        self._entries = entries
+        self._total_size = sum(size for size, _ in entries.values())
+
+    @staticmethod
+    def _get_file_name(block_height: int, block_hash: str, verbosity: int) -> str:
+        return f"{block_height}-{block_hash}-v{verbosity}.blk"
+
+    def get(self, block_height: int, block_hash: str, verbosity: int):
+        file_name = self._get_file_name(block_height, block_hash, verbosity)
+        path = os.path.join(self.directory, file_name)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            block = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read cached block", path=path, error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if file_name in self._entries:
+                self._entries[file_name] = (self._entries[file_name][0], now)
+        return block
+
+    def put(self, block_height: int, block_hash: str, verbosity: int, block, confirmations: int = None):
+        # serialized blocks (verbosity 0) carry no confirmations, the caller passes them instead
+        if confirmations is None:
+            confirmations = block.get("confirmations", 0)
+        if confirmations < MIN_CONFIRMATIONS:
+            return
+        file_name = self._get_file_name(block_height, block_hash, verbosity)
+        data = zlib.compress(pickle.dumps(block, protocol=pickle.HIGHEST_PROTOCOL), self.compression_level)
+
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, os.path.join(self.directory, file_name))
+
+        with self._lock:
+            self._scan()
+            self._evict()
+
+    def _evict(self):
+        if self._total_size <= self.max_size_bytes:
+            return
+        for file_name, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, file_name))
+            except FileNotFoundError:
+                pass
+            del self._entries[file_name]
+            self._total_size -= size
+            self.evictions += 1
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._total_size,
+                "max_size_bytes": self.max_size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
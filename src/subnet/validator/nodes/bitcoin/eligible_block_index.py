@@ -0,0 +1,201 @@
+"""
+Index of the blocks and transactions a funds flow challenge can be built from.
+
+A block is eligible when it has at least one non-coinbase transaction with a nonzero output amount; its
+candidate offsets are the positions of such transactions in the block (a random sample of up to
+`max_offsets_per_block`, which bounds the index to a few tens of MB for the whole chain). The index only
+answers which transactions of a block to try, the block itself is drawn with random_block.select_block. Blocks
+are added as funds flow challenges are made from them or by scanning a range:
+
+Usage: python -m src.subnet.validator.nodes.bitcoin.eligible_block_index <index_path> <first_height> <last_height>
+"""
+import bisect
+import os
+import pickle
+import random
+import threading
+import time
+from array import array
+
+from loguru import logger
+
+from .node_utils import check_if_block_is_valid_for_challenge
+
+
+class EligibleBlockIndex:
+
+    def __init__(self, path: str = None, max_offsets_per_block: int = 16):
+        self.path = path
+        self.max_offsets_per_block = max_offsets_per_block
+        self._lock = threading.Lock()
+        self._heights = array('I')  # sorted eligible heights
+        self._offsets = {}  # eligible height -> candidate offsets
+        self._scanned = bytearray()  # one bit per height added, eligible or not
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._heights)
+
+    def is_scanned(self, height: int) -> bool:
+        byte = height >> 3
+        return byte < len(self._scanned) and bool(self._scanned[byte] & (1 << (height & 7)))
+
+    def _mark_scanned(self, height: int):
+        byte = height >> 3
+        if byte >= len(self._scanned):
+            self._scanned.extend(bytes(byte + 1 - len(self._scanned)))
+        self._scanned[byte] |= 1 << (height & 7)
+
+    @staticmethod
+    def get_candidate_offsets(transactions) -> list:
+        return [offset for offset, tx in enumerate(transactions)
+                if not tx.is_coinbase and any(amount for _, _, amount in tx.iter_outputs())]
+
+    @staticmethod
+    def get_block_data_candidate_offsets(block_data) -> list:
+        # same as get_candidate_offsets for a verbose block, the skipped outputs are all but always zero
+        return [offset for offset, tx_data in enumerate(block_data["tx"])
+                if "coinbase" not in tx_data["vin"][0] and any(vout_data["value"] for vout_data in tx_data["vout"])]
+
+    def add_block(self, height: int, transactions):
+        """
+        Adds a parsed block (node_utils.Block or ColumnarBlock transactions), replacing a previous entry for the height.
+        """
+        self._add_offsets(height, self.get_candidate_offsets(transactions))
+
+    def add_block_data(self, height: int, block_data):
+        """
+        Same as add_block, for a verbose block (getblock verbosity 2 or 3).
+        """
+        self._add_offsets(height, self.get_block_data_candidate_offsets(block_data))
+
+    def get_offsets(self, height: int) -> list:
+        with self._lock:
+            return list(self._offsets.get(height, ()))
+
+    def discard(self, height: int, offset: int):
+        """
+        Removes a candidate that turned out not to make a challenge, the block too once it has none left.
+        """
+        with self._lock:
+            offsets = self._offsets.get(height)
+            if offsets is None or offset not in offsets:
+                return
+        self._set_offsets(height, [candidate for candidate in offsets if candidate != offset])
+
+    def _add_offsets(self, height: int, offsets: list):
+        if not check_if_block_is_valid_for_challenge(height):
+            offsets = []
+        if len(offsets) > self.max_offsets_per_block:
+            offsets = sorted(random.sample(offsets, self.max_offsets_per_block))
+        self._set_offsets(height, offsets)
+
+    def _set_offsets(self, height: int, offsets):
+        with self._lock:
+            self._mark_scanned(height)
+            if height in self._offsets:
+                if offsets:
+                    self._offsets[height] = array('I', offsets)
+                    return
+                del self._offsets[height]
+                del self._heights[bisect.bisect_left(self._heights, height)]
+            elif offsets:
+                self._offsets[height] = array('I', offsets)
+                if not self._heights or height > self._heights[-1]:
+                    self._heights.append(height)
+                else:
+                    self._heights.insert(bisect.bisect_left(self._heights, height), height)
+
+    def get_shuffled_offsets(self, height: int):
+        """
+        Returns the candidate offsets of `height` in random order, empty when the block isn't eligible, or None
+        when the index hasn't scanned it.
+        """
+        with self._lock:
+            if not self.is_scanned(height):
+                return None
+            offsets = list(self._offsets.get(height, ()))
+        random.shuffle(offsets)
+        return offsets
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'eligible_blocks': len(self._heights),
+                'candidates': sum(len(offsets) for offsets in self._offsets.values()),
+                'last_height': self._heights[-1] if self._heights else None,
+            }
+
+    def _get_state(self) -> dict:
+        return {'offsets': self._offsets, 'scanned': self._scanned}
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as file:
+                state = pickle.load(file)
+            with self._lock:
+                self._offsets = state['offsets']
+                self._scanned = state['scanned']
+                self._heights = array('I', sorted(self._offsets))
+            logger.info(f"Loaded eligible block index", path=self.path, eligible_blocks=len(self._heights))
+        except Exception as e:
+            logger.error(f"Failed to load eligible block index", path=self.path, error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+    def save(self):
+        """
+        Writes the index to `path`, merged with the blocks other processes saved there in the meantime.
+        """
+        if not self.path:
+            return
+        if os.path.exists(self.path):
+            saved = EligibleBlockIndex(self.path, self.max_offsets_per_block)
+            with self._lock:
+                for height, offsets in saved._offsets.items():
+                    if not self.is_scanned(height):
+                        self._mark_scanned(height)
+                        self._offsets[height] = offsets
+                self._scanned = bytearray(a | b for a, b in zip(self._scanned.ljust(len(saved._scanned), b'\0'), saved._scanned.ljust(len(self._scanned), b'\0')))
+                self._heights = array('I', sorted(self._offsets))
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(tmp_path, "wb") as file:
+                pickle.dump(self._get_state(), file)
+        os.replace(tmp_path, self.path)
+
+
+def build_eligible_block_index(node, index: EligibleBlockIndex, first_height: int, last_height: int, save_every: int = 1000) -> int:
+    """
+    Adds the blocks between `first_height` and `last_height` the index hasn't scanned yet, returns their number.
+    """
+    added = 0
+    start_time = time.time()
+    for height in range(first_height, last_height + 1):
+        if index.is_scanned(height):
+            continue
+        block = node.get_parsed_block_by_height(height)
+        if block is None:
+            raise Exception(f"Failed to get block {height}")
+        index.add_block(height, block.transactions)
+        added += 1
+        if added % save_every == 0:
+            index.save()
+            logger.info(f"Scanned blocks for the eligible block index", height=height, added=added, time_taken=time.time() - start_time, **index.get_stats())
+    index.save()
+    return added
+
+
+if __name__ == "__main__":
+    import sys
+    from .node import BitcoinNode
+
+    if len(sys.argv) != 4:
+        logger.info("Usage: python -m src.subnet.validator.nodes.bitcoin.eligible_block_index <index_path> <first_height> <last_height>")
+        sys.exit(1)
+
+    node = BitcoinNode()
+    index = EligibleBlockIndex(sys.argv[1])
+    added = build_eligible_block_index(node, index, int(sys.argv[2]), int(sys.argv[3]))
+    logger.info(f"Built eligible block index", added=added, **index.get_stats())
+    node.close()
@@ -1,9 +1,15 @@
-from decimal import Decimal
 from src.subnet.protocol.llm_engine import Challenge, MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BALANCE_TRACKING
-from .node_utils import initialize_tx_out_hash_table, get_tx_out_hash_table_sub_keys, construct_redeem_script, \
-    hash_redeem_script, create_p2sh_address, pubkey_to_address, check_if_block_is_valid_for_challenge, parse_block_data, \
-    Transaction, VIN, SATOSHI, VOUT
-from bitcoinrpc.authproxy import AuthServiceProxy
+from .node_utils import initialize_tx_out_hash_table, get_tx_out_hash_table_sub_keys, check_if_block_is_valid_for_challenge, \
+    get_address_cache_stats
+from .tx_decoder import parse_block_data_columnar, decode_transaction, decode_tx_outs, get_block_output_totals
+from bitcoinrpc.authproxy import JSONRPCException
+from .rpc_pool import RpcConnectionPool
+from .tx_out_index import TxOutIndex
+from .tx_out_follower import TxOutIndexFollower
+from .prevout_cache import PrevoutCache
+from .block_cache import BlockCache
+from .eligible_block_index import EligibleBlockIndex
+from .raw_block import parse_raw_block_columnar, get_raw_block_output_totals
 import pickle
 import time
 import os
@@ -12,9 +18,29 @@ from ..abstract_node import Node
 from ..random_block import select_block
 from loguru import logger
 
+RPC_TYPE_ERROR = -3
+RPC_INVALID_PARAMETER = -8
+
+
+def is_unsupported_verbosity_error(e: JSONRPCException) -> bool:
+    """
+    Tells a getblock rejecting verbosity 3 (the boolean `verbose` of nodes before 0.15, or an invalid verbosity)
+    from missing or pruned blocks and transient errors, which must not lower the verbosity of a shared node.
+    """
+    if e.code == RPC_TYPE_ERROR:
+        return True
+    return e.code == RPC_INVALID_PARAMETER and 'verbos' in (e.message or '').lower()
+
 
 class BitcoinNode(Node):
     def __init__(self, node_rpc_url: str = None):
+        # memory-mapped index built by tx_out_index.py, preferred over the pickled hash table
+        self.tx_out_index = None
+        tx_out_index_path = os.environ.get("BITCOIN_V2_TX_OUT_INDEX")
+        if tx_out_index_path:
+            self.tx_out_index = TxOutIndex(tx_out_index_path)
+            logger.info(f"Opened memory-mapped tx_out index", path=tx_out_index_path, records=len(self.tx_out_index))
+
         self.tx_out_hash_table = initialize_tx_out_hash_table()
         pickle_files_env = os.environ.get("BITCOIN_V2_TX_OUT_HASHMAP_PICKLES")
         pickle_files = []
@@ -33,6 +59,51 @@ class BitcoinNode(Node):
         else:
             self.node_rpc_url = node_rpc_url
 
+        # keep-alive connections shared by every thread using this node
+        self.rpc_pool = RpcConnectionPool(
+            self.node_rpc_url,
+            size=int(os.environ.get("BITCOIN_NODE_RPC_POOL_SIZE", 8)),
+            timeout=int(os.environ.get("BITCOIN_NODE_RPC_TIMEOUT", 30)),
+            # floats (orjson when installed) instead of Decimal, see RpcConnection
+            fast_json=os.environ.get("BITCOIN_NODE_RPC_FAST_JSON", "true").lower() == "true",
+        )
+        self.rpc_batch_size = int(os.environ.get("BITCOIN_NODE_RPC_BATCH_SIZE", 100))
+
+        # verbosity 3 embeds the spent outputs (prevout) into every vin, lowered to 2 for nodes older than 23.0
+        self.block_verbosity = int(os.environ.get("BITCOIN_NODE_BLOCK_VERBOSITY", 3))
+        # "raw" fetches serialized blocks (verbosity 0) and parses them with raw_block.py instead of verbose JSON
+        self.block_format = os.environ.get("BITCOIN_NODE_BLOCK_FORMAT", "json")
+        # balance tracking answers from getblockstats instead of resolving every input, see get_total_balance_change
+        self.balance_tracking_fast_path = os.environ.get("BITCOIN_BALANCE_TRACKING_FAST_PATH", "true").lower() == "true"
+
+        # compressed on-disk copies of confirmed blocks, shared by every generator using the same directory
+        self.block_cache = None
+        block_cache_dir = os.environ.get("BITCOIN_BLOCK_CACHE_DIR")
+        if block_cache_dir:
+            self.block_cache = BlockCache(block_cache_dir, int(os.environ.get("BITCOIN_BLOCK_CACHE_MAX_SIZE_MB", 2048)) << 20)
+
+        # outputs of parent transactions fetched over rpc, between the tx_out lookups and rpc
+        self.prevout_cache = PrevoutCache(int(os.environ.get("BITCOIN_PREVOUT_CACHE_SIZE", 100_000)))
+
+        # blocks and transactions funds flow challenges are sampled from, filled as blocks are parsed
+        self.eligible_block_index = EligibleBlockIndex(
+            os.environ.get("BITCOIN_ELIGIBLE_BLOCK_INDEX") or None,
+            max_offsets_per_block=int(os.environ.get("BITCOIN_ELIGIBLE_BLOCK_INDEX_OFFSETS", 16)),
+        )
+
+        # follows the chain tip so outputs created after the tx_out index was built are found without rpc
+        self.tx_out_follower = None
+        follower_checkpoint_path = os.environ.get("BITCOIN_TX_OUT_FOLLOWER_CHECKPOINT")
+        if follower_checkpoint_path:
+            self.tx_out_follower = TxOutIndexFollower.get_or_start(
+                self,
+                follower_checkpoint_path,
+                poll_interval=int(os.environ.get("BITCOIN_TX_OUT_FOLLOWER_POLL_INTERVAL", 30)),
+                reorg_depth=int(os.environ.get("BITCOIN_TX_OUT_FOLLOWER_REORG_DEPTH", 100)),
+                backfill_blocks=int(os.environ.get("BITCOIN_TX_OUT_FOLLOWER_BACKFILL_BLOCKS", 1008)),
+                max_blocks=int(os.environ.get("BITCOIN_TX_OUT_FOLLOWER_MAX_BLOCKS", 2016)),
+            )
+
     def load_tx_out_hash_table(self, pickle_path: str, reset: bool = False):
         logger.info(f"Loading tx_out hash table from pickle file", pickle_path=pickle_path)
         with open(pickle_path, 'rb') as file:
@@ -47,98 +118,258 @@ class BitcoinNode(Node):
             end_time = time.time()
             logger.info(f"Successfully loaded tx_out hash table from pickle file", pickle_path=pickle_path, time_taken=end_time - start_time)
 
+    def warm_up(self):
+        # opens a pooled connection and checks the node is reachable before the first challenge
+        try:
+            block_height = self.rpc_pool.call('getblockcount')
+            logger.info(f"Bitcoin node is reachable", block_height=block_height)
+        except Exception as e:
+            logger.warning(f"Bitcoin node is not reachable", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+    def close(self):
+        if self.tx_out_follower is not None:
+            self.tx_out_follower.close()
+        self.rpc_pool.close()
+        if self.tx_out_index is not None:
+            self.tx_out_index.close()
+        if self.eligible_block_index is not None:
+            self.eligible_block_index.save()
+
     def get_current_block_height(self):
-        rpc_connection = AuthServiceProxy(self.node_rpc_url)
         try:
-            return rpc_connection.getblockcount()
+            return self.rpc_pool.call('getblockcount')
         except Exception as e:
             logger.error(f"RPC Provider with Error")
-        finally:
-            rpc_connection._AuthServiceProxy__conn.close()  # Close the connection
 
     def get_block_by_height(self, block_height):
-        rpc_connection = AuthServiceProxy(self.node_rpc_url)
         try:
-            block_hash = rpc_connection.getblockhash(block_height)
-            return rpc_connection.getblock(block_hash, 2)
+            block_hash = self.rpc_pool.call('getblockhash', block_height)
+            if self.block_cache is None:
+                return self._get_block_by_hash(block_hash)
+
+            block = self.block_cache.get(block_height, block_hash, self.block_verbosity)
+            if block is None:
+                block = self._get_block_by_hash(block_hash)
+                self.block_cache.put(block_height, block_hash, self.block_verbosity, block)
+            return block
         except Exception as e:
             logger.error(f"RPC Provider with Error")
-        finally:
-            rpc_connection._AuthServiceProxy__conn.close()  # Close the connection
+
+    def _get_block_by_hash(self, block_hash):
+        try:
+            return self.rpc_pool.call('getblock', block_hash, self.block_verbosity)
+        except JSONRPCException as e:
+            if self.block_verbosity < 3 or not is_unsupported_verbosity_error(e):
+                raise
+            logger.warning(f"Node does not support getblock verbosity 3, falling back to verbosity 2", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+            self.block_verbosity = 2
+            return self.rpc_pool.call('getblock', block_hash, self.block_verbosity)
+
+    def get_raw_block_by_height(self, block_height):
+        try:
+            block_hash = self.rpc_pool.call('getblockhash', block_height)
+            raw_block = self.block_cache.get(block_height, block_hash, 0) if self.block_cache is not None else None
+            if raw_block is None:
+                raw_block = bytes.fromhex(self.rpc_pool.call('getblock', block_hash, 0))
+                if self.block_cache is not None:
+                    confirmations = self.rpc_pool.call('getblockcount') - block_height + 1
+                    self.block_cache.put(block_height, block_hash, 0, raw_block, confirmations)
+            return raw_block
+        except Exception as e:
+            logger.error(f"RPC Provider with Error", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+    def get_parsed_block_by_height(self, block_height):
+        """
+        Returns the block at `block_height` as a node_utils.ColumnarBlock, fetched in the configured BITCOIN_NODE_BLOCK_FORMAT.
+        """
+        if self.block_format == "raw":
+            raw_block = self.get_raw_block_by_height(block_height)
+            block = parse_raw_block_columnar(raw_block, block_height) if raw_block is not None else None
+        else:
+            block = self.get_block_by_height(block_height)
+            block = parse_block_data_columnar(block) if block is not None else None
+        return block
 
     def get_transaction_by_hash(self, tx_hash):
         logger.error(f"get_transaction_by_hash not implemented for BitcoinNode")
         raise NotImplementedError()
     
+    def get_tx_out(self, txn_id: str, vout_id: str):
+        if self.tx_out_index is not None:
+            tx_out = self.tx_out_index.get(txn_id, vout_id)
+            if tx_out is not None:
+                return tx_out
+        if self.tx_out_follower is not None:
+            tx_out = self.tx_out_follower.delta_index.get(txn_id, vout_id)
+            if tx_out is not None:
+                return tx_out
+        return self.tx_out_hash_table[txn_id[:3]].get((txn_id, vout_id))
+
     def get_address_and_amount_by_txn_id_and_vout_id(self, txn_id: str, vout_id: str):
-        # call rpc if not in hash table
-        if (txn_id, vout_id) not in self.tx_out_hash_table[txn_id[:3]]:
+        tx_out = self.get_tx_out(txn_id, vout_id)
+        if tx_out is None:
+            tx_out = self.prevout_cache.get(txn_id, vout_id)
+        # call rpc if not in the index, hash table or cache
+        if tx_out is None:
             # indexlogger.info(f"No entry is found in tx_out hash table: (tx_id, vout_id): ({txn_id}, {vout_id})")
-            rpc_connection = AuthServiceProxy(self.node_rpc_url)
             try:
-                txn_data = rpc_connection.getrawtransaction(str(txn_id), 1)
-                vout = next((x for x in txn_data['vout'] if str(x['n']) == vout_id), None)
-                amount = int(vout['value'] * 100000000)
-                address = vout["scriptPubKey"].get("address", "")
-                script_pub_key_asm = vout["scriptPubKey"].get("asm", "")
-                if not address:
-                    addresses = vout["scriptPubKey"].get("addresses", [])
-                    if addresses:
-                        address = addresses[0]
-                    elif "OP_CHECKSIG" in script_pub_key_asm:
-                        pubkey = script_pub_key_asm.split()[0]
-                        address = pubkey_to_address(pubkey)
-                    elif "OP_CHECKMULTISIG" in script_pub_key_asm:
-                        pubkeys = script_pub_key_asm.split()[1:-2]
-                        m = int(script_pub_key_asm.split()[0])
-                        redeem_script = construct_redeem_script(pubkeys, m)
-                        hashed_script = hash_redeem_script(redeem_script)
-                        address = create_p2sh_address(hashed_script)
-                    else:
-                        address = f"unknown-{txn_id}"
-                return address, amount
+                txn_data = self.rpc_pool.call('getrawtransaction', str(txn_id), 1)
+                self.prevout_cache.put_many(self._get_tx_outs_from_txn_data(txn_data, txn_id))
+                return self._get_address_and_amount_from_txn_data(txn_data, txn_id, str(vout_id))
             except Exception as e:
                 address = f"unknown-{txn_id}"
                 return address, 0
-            finally:
-                rpc_connection._AuthServiceProxy__conn.close()  # Close the connection
-        else: # get from hash table if exists
-            address, amount = self.tx_out_hash_table[txn_id[:3]][(txn_id, vout_id)]
+        else: # get from the index or hash table if exists
+            address, amount = tx_out
             return address, int(amount)
 
-    def create_funds_flow_challenge(self, start_block_height, last_block_height):
-        num_retries = 10 # to prevent infinite loop
-        is_valid_block = False
-        while num_retries and not is_valid_block:
-            block_to_check = select_block(start_block_height, last_block_height)
-            is_valid_block = check_if_block_is_valid_for_challenge(block_to_check)
-            num_retries -= 1
+    @classmethod
+    def _get_address_and_amount_from_txn_data(cls, txn_data, txn_id: str, vout_id: str):
+        return cls._get_tx_outs_from_txn_data(txn_data, txn_id).get((txn_id, vout_id), (f"unknown-{txn_id}", 0))
+
+    @staticmethod
+    def _get_tx_outs_from_txn_data(txn_data, txn_id: str) -> dict:
+        return decode_tx_outs(txn_data, txn_id)
+
+    def get_addresses_and_amounts_by_txn_vouts(self, txn_vouts, known_outputs: dict = None) -> dict:
+        """
+        Resolves many (txn_id, vout_id) pairs at once. Pairs are looked up in `known_outputs` (outputs
+        of the block being processed), the tx_out index, the tx_out hash table and the prevout cache first; the parent transactions of the
+        remaining pairs are fetched once each, using JSON-RPC batches of BITCOIN_NODE_RPC_BATCH_SIZE.
+        Returns a dict keyed by (txn_id, vout_id) with (address, amount) values.
+        """
+        resolved, missing_vouts_by_txn_id = self._lookup_txn_vouts(txn_vouts, known_outputs)
+
+        missing_txn_ids = list(missing_vouts_by_txn_id.keys())
+        for i in range(0, len(missing_txn_ids), self.rpc_batch_size):
+            chunk = missing_txn_ids[i: i + self.rpc_batch_size]
+            try:
+                results = self.rpc_pool.batch([('getrawtransaction', txn_id, 1) for txn_id in chunk])
+            except Exception as e:
+                logger.error(f"Failed to fetch transactions in batch", batch_size=len(chunk), error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+                results = [None] * len(chunk)
+            self._resolve_fetched_txn_vouts(resolved, missing_vouts_by_txn_id, chunk, results)
 
-        # if failed ot find valid block, return invalid response
-        if not num_retries:
-            raise Exception(
-                f"Failed to create a valid challenge."
-            )
-        
-        block_data = self.get_block_by_height(block_to_check)
-        num_transactions = len(block_data["tx"])
+        return resolved
 
-        out_total_amount = 0
-        while out_total_amount == 0:
-            selected_txn = block_data["tx"][random.randint(0, num_transactions - 1)]
-            txn_id = selected_txn.get('txid')
-        
+    def _lookup_txn_vouts(self, txn_vouts, known_outputs: dict = None):
+        # returns the pairs resolved without rpc and the remaining vout ids by parent transaction
+        resolved = {}
+        missing_vouts_by_txn_id = {}
+
+        for txn_id, vout_id in txn_vouts:
+            key = (txn_id, vout_id)
+            if key in resolved:
+                continue
+            if known_outputs and key in known_outputs:
+                resolved[key] = known_outputs[key]
+                continue
+            tx_out = self.get_tx_out(txn_id, vout_id)
+            if tx_out is None:
+                tx_out = self.prevout_cache.get(txn_id, vout_id)
+            if tx_out is not None:
+                address, amount = tx_out
+                resolved[key] = (address, int(amount))
+                continue
+            missing_vouts_by_txn_id.setdefault(txn_id, set()).add(vout_id)
+        return resolved, missing_vouts_by_txn_id
+
+    def _resolve_fetched_txn_vouts(self, resolved: dict, missing_vouts_by_txn_id: dict, txn_ids, results):
+        # results are the getrawtransaction responses for txn_ids, None or an exception when a fetch failed
+        for txn_id, txn_data in zip(txn_ids, results):
+            if txn_data is None or isinstance(txn_data, Exception):
+                for vout_id in missing_vouts_by_txn_id[txn_id]:
+                    resolved[(txn_id, vout_id)] = (f"unknown-{txn_id}", 0)
+                continue
+            tx_outs = self._get_tx_outs_from_txn_data(txn_data, txn_id)
+            self.prevout_cache.put_many(tx_outs)
+            for vout_id in missing_vouts_by_txn_id[txn_id]:
+                resolved[(txn_id, vout_id)] = tx_outs.get((txn_id, vout_id), (f"unknown-{txn_id}", 0))
+
+    @staticmethod
+    def _get_txn_vouts_spent_by(transactions):
+        # inputs carrying their prevout (getblock verbosity 3) need no lookup at all
+        return [(tx_id, str(vout_id)) for tx in transactions for tx_id, vout_id, prevout_address, _ in tx.iter_inputs()
+                if tx_id != 0 and prevout_address is None]
+
+    def resolve_block_inputs(self, transactions) -> dict:
+        """
+        Resolves the inputs of every transaction in a block with as few RPC calls as possible.
+        Inputs spending outputs created earlier in the same block are resolved from the block itself.
+        """
+        return self.get_addresses_and_amounts_by_txn_vouts(self._get_txn_vouts_spent_by(transactions), self._get_block_outputs(transactions))
+
+    @staticmethod
+    def _get_block_outputs(transactions) -> dict:
+        known_outputs = {}
+        for tx in transactions:
+            tx_id = tx.tx_id
+            for vout_id, address, amount in tx.iter_outputs():
+                known_outputs[(tx_id, str(vout_id))] = (address or f"unknown-{tx_id}", amount)
+        return known_outputs
+
+    def create_funds_flow_challenge(self, start_block_height, last_block_height):
+        block_height, offsets = self._select_funds_flow_block(start_block_height, last_block_height)
+        block_data = self.get_block_by_height(block_height)
+
+        for offset, txn_id in self._iter_funds_flow_candidates(block_height, block_data, offsets):
             txn_data = self.get_txn_data_by_id(txn_id)
             tx = self.create_in_memory_txn(txn_data)
 
             *_, in_total_amount, out_total_amount = self.process_in_memory_txn_for_indexing(tx)
-            
+            if out_total_amount != 0:
+                break
+            self._discard_funds_flow_candidate(block_height, offset)
+
         challenge = Challenge(kind=MODEL_TYPE_FUNDS_FLOW,
                               in_total_amount=in_total_amount,
                               out_total_amount=out_total_amount,
                               tx_id_last_6_chars=txn_id[-6:])
         return challenge, txn_id
 
+    def _select_funds_flow_block(self, start_block_height, last_block_height):
+        """
+        Returns a block height drawn with select_block and the offsets of its candidate transactions from the
+        eligible block index, None when the index hasn't scanned the block yet. Blocks the index knows have no
+        candidate are drawn again.
+        """
+        num_retries = 10 # to prevent infinite loop
+        while num_retries:
+            num_retries -= 1
+            block_to_check = select_block(start_block_height, last_block_height)
+            if not check_if_block_is_valid_for_challenge(block_to_check):
+                continue
+            offsets = self.eligible_block_index.get_shuffled_offsets(block_to_check) if self.eligible_block_index is not None else None
+            if offsets is None or offsets:
+                return block_to_check, offsets
+
+        # if failed ot find valid block, return invalid response
+        raise Exception(
+            f"Failed to create a valid challenge."
+        )
+
+    def _iter_funds_flow_candidates(self, block_height, block_data, offsets):
+        """
+        Yields the (offset, txn_id) of the transactions to try for a funds flow challenge: the candidates first,
+        then random transactions should every candidate send its outputs back to its inputs.
+        """
+        transactions = block_data["tx"]
+        if offsets is None:
+            offsets = EligibleBlockIndex.get_block_data_candidate_offsets(block_data)
+            random.shuffle(offsets)
+            if self.eligible_block_index is not None:
+                self.eligible_block_index.add_block_data(block_height, block_data)
+        for offset in offsets:
+            if offset < len(transactions):
+                yield offset, transactions[offset]['txid']
+        while True:
+            offset = random.randrange(len(transactions))
+            yield None, transactions[offset]['txid']
+
+    def _discard_funds_flow_candidate(self, block_height, offset):
+        if offset is not None and self.eligible_block_index is not None:
+            self.eligible_block_index.discard(block_height, offset)
+
     def validate_funds_flow_challenge_response_output(self, challenge: Challenge, response_output):
         if response_output[-6:] != challenge.tx_id_last_6_chars:
             return False
@@ -156,16 +387,53 @@ class BitcoinNode(Node):
 
         logger.info(f"Creating balance tracking challenge", block_height=block_height)
 
-        block = self.get_block_by_height(block_height)
-        block_data = parse_block_data(block)
+        challenge = Challenge(kind=MODEL_TYPE_BALANCE_TRACKING, block_height=block_height)
+        if self.balance_tracking_fast_path:
+            try:
+                total_balance_change = self.get_total_balance_change(block_height)
+                logger.info(f"Created balance tracking challenge from block stats", block_height=block_height)
+                return challenge, total_balance_change
+            except Exception as e:
+                logger.warning(f"Failed to get block stats, resolving every input instead", block_height=block_height, error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+        total_balance_change = self.get_total_balance_change_from_inputs(block_height)
+        logger.info(f"Created balance tracking challenge", block_height=block_height, rpc_pool=self.rpc_pool.get_stats(), prevout_cache=self.prevout_cache.get_stats(), address_cache=get_address_cache_stats())
+
+        return challenge, total_balance_change
+
+    def get_total_balance_change(self, block_height) -> int:
+        """
+        Returns the sum of the address balance changes of a block without resolving its inputs.
+
+        Every non-coinbase input is spent in full, so the inputs are the non-coinbase outputs plus the fees
+        and the sum reduces to the coinbase output minus the fees (getblockstats totalfee) minus the
+        nonstandard / nulldata outputs the indexer skips, which are the only outputs the block is scanned for.
+        """
+        total_fee_satoshi = self.rpc_pool.call('getblockstats', block_height, ['totalfee'])['totalfee']
+        if self.block_format == "raw":
+            raw_block = self.get_raw_block_by_height(block_height)
+            if raw_block is None:
+                raise Exception(f"Failed to get block {block_height}")
+            coinbase_out_satoshi, skipped_out_satoshi = get_raw_block_output_totals(raw_block)
+        else:
+            block = self.get_block_by_height(block_height)
+            if block is None:
+                raise Exception(f"Failed to get block {block_height}")
+            coinbase_out_satoshi, skipped_out_satoshi = get_block_output_totals(block)
+        return coinbase_out_satoshi - int(total_fee_satoshi) - skipped_out_satoshi
+
+    def get_total_balance_change_from_inputs(self, block_height) -> int:
+        block_data = self.get_parsed_block_by_height(block_height)
         transactions = block_data.transactions
+        return self._sum_balance_changes(transactions, self.resolve_block_inputs(transactions))
 
+    def _sum_balance_changes(self, transactions, resolved_inputs: dict) -> int:
         balance_changes_by_address = {}
         changed_addresses = []
 
         for tx in transactions:
             in_amount_by_address, out_amount_by_address, input_addresses, output_addresses, in_total_amount, out_total_amount = self.process_in_memory_txn_for_indexing(
-                tx)
+                tx, resolved_inputs)
 
             for address in input_addresses:
                 if not address in balance_changes_by_address:
@@ -179,92 +447,42 @@ class BitcoinNode(Node):
                     changed_addresses.append(address)
                 balance_changes_by_address[address] += out_amount_by_address[address]
 
-        challenge = Challenge(kind=MODEL_TYPE_BALANCE_TRACKING, block_height=block_height)
-        total_balance_change = sum(balance_changes_by_address.values())
-        logger.info(f"Created balance tracking challenge", block_height=block_height)
-
-        return challenge, total_balance_change
+        return sum(balance_changes_by_address.values())
 
 
     def get_txn_data_by_id(self, txn_id: str):
         try:
-            rpc_connection = AuthServiceProxy(self.node_rpc_url)
-            return rpc_connection.getrawtransaction(txn_id, 1)
+            # verbosity 2 adds prevout to the vins on 25.0+, older nodes treat any non-zero value as verbose
+            return self.rpc_pool.call('getrawtransaction', txn_id, 2 if self.block_verbosity >= 3 else 1)
         except Exception as e:
             logger.error(f"Failed to get transaction data by id", error={'exception_type': e.__class__.__name__, 'exception_message': str(e), 'exception_args': e.args})
             return None
 
     def create_in_memory_txn(self, tx_data):
-        tx = Transaction(
-            tx_id=tx_data.get('txid'),
-            block_height=0,
-            timestamp=0,
-            fee_satoshi=0
-        )
-        
-        for vin_data in tx_data["vin"]:
-            vin = VIN(
-                tx_id=vin_data.get("txid", 0),
-                vin_id=vin_data.get("sequence", 0),
-                vout_id=vin_data.get("vout", 0),
-                script_sig=vin_data.get("scriptSig", {}).get("asm", ""),
-                sequence=vin_data.get("sequence", 0),
-            )
-            tx.vins.append(vin)
-            tx.is_coinbase = "coinbase" in vin_data
-            
-        for vout_data in tx_data["vout"]:
-            script_type = vout_data["scriptPubKey"].get("type", "")
-            if "nonstandard" in script_type or script_type == "nulldata":
-                continue
-
-            value_satoshi = int(Decimal(vout_data["value"]) * SATOSHI)
-            n = vout_data["n"]
-            script_pub_key_asm = vout_data["scriptPubKey"].get("asm", "")
-
-            address = vout_data["scriptPubKey"].get("address", "")
-            if not address:
-                addresses = vout_data["scriptPubKey"].get("addresses", [])
-                if addresses:
-                    address = addresses[0]
-                elif "OP_CHECKSIG" in script_pub_key_asm:
-                    pubkey = script_pub_key_asm.split()[0]
-                    address = pubkey_to_address(pubkey)
-                elif "OP_CHECKMULTISIG" in script_pub_key_asm:
-                    pubkeys = script_pub_key_asm.split()[1:-2]
-                    m = int(script_pub_key_asm.split()[0])
-                    redeem_script = construct_redeem_script(pubkeys, m)
-                    hashed_script = hash_redeem_script(redeem_script)
-                    address = create_p2sh_address(hashed_script)
-                else:
-                    raise Exception(
-                        f"Unknown address type: {vout_data['scriptPubKey']}"
-                    )
-
-            vout = VOUT(
-                vout_id=n,
-                value_satoshi=value_satoshi,
-                script_pub_key=script_pub_key_asm,
-                is_spent=False,
-                address=address,
-            )
-            tx.vouts.append(vout)
-            
+        tx = decode_transaction(tx_data)
+        # looked up by id outside of a block: timestamp and fee stay 0 as they always have
+        tx.timestamp = tx.fee_satoshi = 0
         return tx
-    
-    def process_in_memory_txn_for_indexing(self, tx):
+
+    def process_in_memory_txn_for_indexing(self, tx, resolved_inputs: dict = None):
         input_amounts = {} # input amounts by address in satoshi
         output_amounts = {} # output amounts by address in satoshi
 
-        for vin in tx.vins:
-            if vin.tx_id == 0:
+        # inputs are resolved in one batch unless the caller already resolved the whole block
+        if resolved_inputs is None:
+            resolved_inputs = self.get_addresses_and_amounts_by_txn_vouts(self._get_txn_vouts_spent_by([tx]))
+
+        for tx_id, vout_id, prevout_address, prevout_value_satoshi in tx.iter_inputs():
+            if tx_id == 0:
                 continue
-            address, amount = self.get_address_and_amount_by_txn_id_and_vout_id(vin.tx_id, str(vin.vout_id))
+            if prevout_address is not None:
+                address, amount = prevout_address, prevout_value_satoshi
+            else:
+                address, amount = resolved_inputs[(tx_id, str(vout_id))]
             input_amounts[address] = input_amounts.get(address, 0) + amount
 
-        for vout in tx.vouts:
-            amount = vout.value_satoshi
-            address = vout.address or f"unknown-{tx.tx_id}"
+        for vout_id, address, amount in tx.iter_outputs():
+            address = address or f"unknown-{tx.tx_id}"
             output_amounts[address] = output_amounts.get(address, 0) + amount
 
 
@@ -293,6 +511,10 @@ class BitcoinNode(Node):
         logger.info(f"Fetching random tx_id from", block_height=block_height)
 
         block_data = self.get_block_by_height(block_height)
+        return self._select_random_txid(block_data, block_height), block_data
+
+    @staticmethod
+    def _select_random_txid(block_data, block_height) -> str:
         transactions = block_data.get('tx', [])
 
         if not transactions:
@@ -313,4 +535,4 @@ class BitcoinNode(Node):
 
         logger.info(f"Selected transaction tx_id: {txid} from block {block_height}", block_height=block_height, tx_id=txid)
 
-        return txid, block_data
+        return txid
@@ -1,7 +1,10 @@
 from Crypto.Hash import SHA256, RIPEMD160
 import base58
+import hashlib
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from decimal import Decimal, getcontext
 
 
@@ -41,10 +44,121 @@ def hash_redeem_script(redeem_script):
 def create_p2sh_address(hashed_script, mainnet=True):
     version_byte = b"\x05" if mainnet else b"\xc4"
     payload = version_byte + hashed_script
-    checksum = SHA256.new(SHA256.new(payload).digest()).digest()[:4]
+    checksum = hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
     return base58.b58encode(payload + checksum).decode()
 
 
+def create_p2pkh_address(pubkey_hash, mainnet=True):
+    version_byte = b"\x00" if mainnet else b"\x6f"
+    payload = version_byte + pubkey_hash
+    checksum = hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+    return base58.b58encode(payload + checksum).decode()
+
+
+# distinct public keys / multisig scripts whose address is memoized
+ADDRESS_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def get_pubkey_address(pubkey: str) -> str:
+    # memoized pubkey_to_address, early blocks pay to the same public keys over and over
+    return pubkey_to_address(pubkey)
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def get_multisig_address(pubkeys: Tuple[str, ...], m: int) -> str:
+    # P2SH address of a bare multisig output, memoized
+    return create_p2sh_address(hash_redeem_script(construct_redeem_script(list(pubkeys), m)))
+
+
+def get_script_address(script_pub_key_asm: str) -> Optional[str]:
+    """
+    Derives the address of a P2PK or bare multisig output, for which bitcoind reports none, from its
+    scriptPubKey asm. Returns None for any other script.
+    """
+    if "OP_CHECKSIG" in script_pub_key_asm:
+        return get_pubkey_address(script_pub_key_asm.split()[0])
+    if "OP_CHECKMULTISIG" in script_pub_key_asm:
+        parts = script_pub_key_asm.split()
+        return get_multisig_address(tuple(parts[1:-2]), int(parts[0]))
+    return None
+
+
+def derive_addresses(script_pub_key_asms) -> List[Optional[str]]:
+    """
+    get_script_address for many scripts at once, every distinct script is derived only once.
+    """
+    addresses = {}
+    for script_pub_key_asm in script_pub_key_asms:
+        if script_pub_key_asm not in addresses:
+            addresses[script_pub_key_asm] = get_script_address(script_pub_key_asm)
+    return [addresses[script_pub_key_asm] for script_pub_key_asm in script_pub_key_asms]
+
+
+def get_address_cache_stats() -> dict:
+    stats = {}
+    for name, cached in (('pubkey', get_pubkey_address), ('multisig', get_multisig_address)):
+        cache_info = cached.cache_info()
+        stats[name] = {'hits': cache_info.hits, 'misses': cache_info.misses, 'size': cache_info.currsize}
+    return stats
+
+
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BECH32_CONST = 1
+BECH32M_CONST = 0x2BC830A3
+
+
+BECH32_GENERATOR = [0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3]
+# xor of the generator terms selected by every possible 5 bit top value
+BECH32_GENERATOR_TABLE = [0] * 32
+for _top in range(32):
+    for _i in range(5):
+        if (_top >> _i) & 1:
+            BECH32_GENERATOR_TABLE[_top] ^= BECH32_GENERATOR[_i]
+
+
+def bech32_polymod(values):
+    table = BECH32_GENERATOR_TABLE
+    chk = 1
+    for value in values:
+        chk = ((chk & 0x1FFFFFF) << 5 ^ value) ^ table[chk >> 25]
+    return chk
+
+
+def convert_bits(data, from_bits, to_bits):
+    if from_bits == 8:
+        # bytes are regrouped through one big integer, padded with zero bits to a multiple of `to_bits`
+        bits = len(data) * 8
+        padding = -bits % to_bits
+        acc = int.from_bytes(data, "big") << padding
+        max_value = (1 << to_bits) - 1
+        return [(acc >> shift) & max_value for shift in range(bits + padding - to_bits, -1, -to_bits)]
+    acc = 0
+    bits = 0
+    result = []
+    max_value = (1 << to_bits) - 1
+    for value in data:
+        acc = (acc << from_bits) | value
+        bits += from_bits
+        while bits >= to_bits:
+            bits -= to_bits
+            result.append((acc >> bits) & max_value)
+    if bits:
+        result.append((acc << (to_bits - bits)) & max_value)
+    return result
+
+
+def create_segwit_address(witness_version, witness_program, mainnet=True):
+    # BIP173 (bech32) for witness v0, BIP350 (bech32m) for v1 and later
+    hrp = "bc" if mainnet else "tb"
+    data = [witness_version] + convert_bits(witness_program, 8, 5)
+    const = BECH32_CONST if witness_version == 0 else BECH32M_CONST
+    hrp_expanded = [ord(x) >> 5 for x in hrp] + [0] + [ord(x) & 31 for x in hrp]
+    polymod = bech32_polymod(hrp_expanded + data + [0, 0, 0, 0, 0, 0]) ^ const
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join([BECH32_CHARSET[d] for d in data + checksum])
+
+
 def get_tx_out_hash_table_sub_keys():
     hex_chars = "0123456789abcdef"
     return [h1 + h2 + h3 for h1 in hex_chars for h2 in hex_chars for h3 in hex_chars]
@@ -62,7 +176,7 @@ def check_if_block_is_valid_for_challenge(block_height: int) -> bool:
     return not block_height in blocks_to_avoid
 
 
-@dataclass
+@dataclass(slots=True)
 class Block:
     block_height: int
     block_hash: str
@@ -73,7 +187,7 @@ class Block:
     transactions: List["Transaction"] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     tx_id: str
     block_height: int
@@ -83,8 +197,18 @@ class Transaction:
     vouts: List["VOUT"] = field(default_factory=list)
     is_coinbase: bool = False
 
+    def iter_inputs(self):
+        # (spent tx_id, spent vout_id, prevout address, prevout value) per input, see TransactionView
+        for vin in self.vins:
+            yield vin.tx_id, vin.vout_id, vin.prevout_address, vin.prevout_value_satoshi
+
+    def iter_outputs(self):
+        # (vout_id, address, value in satoshi) per output
+        for vout in self.vouts:
+            yield vout.vout_id, vout.address, vout.value_satoshi
+
 
-@dataclass
+@dataclass(slots=True)
 class VOUT:
     vout_id: int
     value_satoshi: int
@@ -93,95 +217,152 @@ class VOUT:
     address: str
 
 
-@dataclass
+@dataclass(slots=True)
 class VIN:
     tx_id: str
     vin_id: int
     vout_id: int
     script_sig: Optional[str]
     sequence: Optional[int]
+    # spent output as embedded by getblock verbosity 3, None when it has to be looked up
+    prevout_address: Optional[str] = None
+    prevout_value_satoshi: Optional[int] = None
 
 
 getcontext().prec = 28
 SATOSHI = Decimal("100000000")
 
 
-def parse_block_data(block_data):
-    block_height = block_data["height"]
-    block_hash = block_data["hash"]
-    block_previous_hash = block_data.get("previousblockhash", "")
-    timestamp = int(block_data["time"])
-
-    block = Block(
-        block_height=block_height,
-        block_hash=block_hash,
-        timestamp=timestamp,
-        previous_block_hash=block_previous_hash,
-        nonce=block_data.get("nonce", 0),
-        difficulty=block_data.get("difficulty", 0),
-    )
-
-    for tx_data in block_data["tx"]:
-        tx_id = tx_data["txid"]
-        fee = Decimal(tx_data.get("fee", 0))
-        fee_satoshi = int(fee * SATOSHI)
-        tx_timestamp = int(tx_data.get("time", timestamp))
-
-        tx = Transaction(
-            tx_id=tx_id,
-            block_height=block_height,
-            timestamp=tx_timestamp,
-            fee_satoshi=fee_satoshi,
-        )
-
-        for vin_data in tx_data["vin"]:
-            vin = VIN(
-                tx_id=vin_data.get("txid", 0),
-                vin_id=vin_data.get("sequence", 0),
-                vout_id=vin_data.get("vout", 0),
-                script_sig=vin_data.get("scriptSig", {}).get("asm", ""),
-                sequence=vin_data.get("sequence", 0),
-            )
-            tx.vins.append(vin)
-            tx.is_coinbase = "coinbase" in vin_data
-
-        for vout_data in tx_data["vout"]:
-            script_type = vout_data["scriptPubKey"].get("type", "")
-            if "nonstandard" in script_type or script_type == "nulldata":
-                continue
-
-            value_satoshi = int(Decimal(vout_data["value"]) * SATOSHI)
-            n = vout_data["n"]
-            script_pub_key_asm = vout_data["scriptPubKey"].get("asm", "")
-
-            address = vout_data["scriptPubKey"].get("address", "")
-            if not address:
-                addresses = vout_data["scriptPubKey"].get("addresses", [])
-                if addresses:
-                    address = addresses[0]
-                elif "OP_CHECKSIG" in script_pub_key_asm:
-                    pubkey = script_pub_key_asm.split()[0]
-                    address = pubkey_to_address(pubkey)
-                elif "OP_CHECKMULTISIG" in script_pub_key_asm:
-                    pubkeys = script_pub_key_asm.split()[1:-2]
-                    m = int(script_pub_key_asm.split()[0])
-                    redeem_script = construct_redeem_script(pubkeys, m)
-                    hashed_script = hash_redeem_script(redeem_script)
-                    address = create_p2sh_address(hashed_script)
-                else:
-                    raise Exception(
-                        f"Unknown address type: {vout_data['scriptPubKey']}"
-                    )
-
-            vout = VOUT(
-                vout_id=n,
-                value_satoshi=value_satoshi,
-                script_pub_key=script_pub_key_asm,
-                is_spent=False,
-                address=address,
-            )
-            tx.vouts.append(vout)
-
-        block.transactions.append(tx)
-
-    return block
\ No newline at end of file
+class ColumnarBlock:
+    """
+    Compact alternative to Block: the inputs and outputs of all transactions are stored in parallel arrays
+    and every address once, instead of one object (with its own dict and lists) per transaction, input and output.
+
+    Only the fields read downstream are kept (no asm, script_sig or sequence). Transactions are exposed
+    through `transactions` as lazy TransactionView objects with the same tx_id / block_height / timestamp /
+    is_coinbase / iter_inputs / iter_outputs API as Transaction.
+    """
+
+    __slots__ = ("block_height", "block_hash", "timestamp", "previous_block_hash", "nonce", "difficulty",
+                 "tx_ids", "tx_timestamps", "tx_fees", "tx_is_coinbase", "tx_vin_starts", "tx_vout_starts",
+                 "vin_tx_ids", "vin_vout_ids", "vin_prevout_address_ids", "vin_prevout_values",
+                 "vout_ids", "vout_address_ids", "vout_values", "addresses", "_address_ids")
+
+    def __init__(self, block_height: int, block_hash: str, timestamp: int, previous_block_hash: str, nonce: int, difficulty):
+        self.block_height = block_height
+        self.block_hash = block_hash
+        self.timestamp = timestamp
+        self.previous_block_hash = previous_block_hash
+        self.nonce = nonce
+        self.difficulty = difficulty
+
+        self.tx_ids = []
+        self.tx_timestamps = array("q")
+        self.tx_fees = array("q")
+        self.tx_is_coinbase = bytearray()
+        self.tx_vin_starts = array("I")
+        self.tx_vout_starts = array("I")
+
+        self.vin_tx_ids = []  # 0 for coinbase inputs, like VIN.tx_id
+        self.vin_vout_ids = array("I")
+        self.vin_prevout_address_ids = array("i")  # -1 when the prevout is not known
+        self.vin_prevout_values = array("q")
+
+        self.vout_ids = array("I")
+        self.vout_address_ids = array("I")
+        self.vout_values = array("q")
+
+        self.addresses = []
+        self._address_ids = {}
+
+    def intern_address(self, address: str) -> int:
+        address_id = self._address_ids.get(address)
+        if address_id is None:
+            address_id = len(self.addresses)
+            self._address_ids[address] = address_id
+            self.addresses.append(address)
+        return address_id
+
+    def add_transaction(self, tx_id: str, timestamp: int, fee_satoshi: int = 0, is_coinbase: bool = False):
+        self.tx_ids.append(tx_id)
+        self.tx_timestamps.append(timestamp)
+        self.tx_fees.append(fee_satoshi)
+        self.tx_is_coinbase.append(1 if is_coinbase else 0)
+        self.tx_vin_starts.append(len(self.vin_vout_ids))
+        self.tx_vout_starts.append(len(self.vout_ids))
+
+    def set_coinbase(self, is_coinbase: bool):
+        self.tx_is_coinbase[-1] = 1 if is_coinbase else 0
+
+    def add_input(self, tx_id, vout_id: int, prevout_address: str = None, prevout_value_satoshi: int = None):
+        self.vin_tx_ids.append(tx_id)
+        self.vin_vout_ids.append(vout_id)
+        if prevout_address is None:
+            self.vin_prevout_address_ids.append(-1)
+            self.vin_prevout_values.append(0)
+        else:
+            self.vin_prevout_address_ids.append(self.intern_address(prevout_address))
+            self.vin_prevout_values.append(prevout_value_satoshi)
+
+    def add_output(self, vout_id: int, value_satoshi: int, address: str):
+        self.vout_ids.append(vout_id)
+        self.vout_address_ids.append(self.intern_address(address))
+        self.vout_values.append(value_satoshi)
+
+    def __len__(self):
+        return len(self.tx_ids)
+
+    @property
+    def transactions(self):
+        vin_ends = self.tx_vin_starts[1:] + array("I", [len(self.vin_vout_ids)])
+        vout_ends = self.tx_vout_starts[1:] + array("I", [len(self.vout_ids)])
+        return [TransactionView(self, index, vin_start, vin_end, vout_start, vout_end)
+                for index, (vin_start, vin_end, vout_start, vout_end)
+                in enumerate(zip(self.tx_vin_starts, vin_ends, self.tx_vout_starts, vout_ends))]
+
+
+class TransactionView:
+    __slots__ = ("block", "index", "vin_start", "vin_end", "vout_start", "vout_end")
+
+    def __init__(self, block: ColumnarBlock, index: int, vin_start: int, vin_end: int, vout_start: int, vout_end: int):
+        self.block = block
+        self.index = index
+        self.vin_start = vin_start
+        self.vin_end = vin_end
+        self.vout_start = vout_start
+        self.vout_end = vout_end
+
+    @property
+    def tx_id(self) -> str:
+        return self.block.tx_ids[self.index]
+
+    @property
+    def block_height(self) -> int:
+        return self.block.block_height
+
+    @property
+    def timestamp(self) -> int:
+        return self.block.tx_timestamps[self.index]
+
+    @property
+    def fee_satoshi(self) -> int:
+        return self.block.tx_fees[self.index]
+
+    @property
+    def is_coinbase(self) -> bool:
+        return bool(self.block.tx_is_coinbase[self.index])
+
+    def iter_inputs(self):
+        block = self.block
+        addresses = block.addresses
+        for i in range(self.vin_start, self.vin_end):
+            address_id = block.vin_prevout_address_ids[i]
+            if address_id < 0:
+                yield block.vin_tx_ids[i], block.vin_vout_ids[i], None, None
+            else:
+                yield block.vin_tx_ids[i], block.vin_vout_ids[i], addresses[address_id], block.vin_prevout_values[i]
+
+    def iter_outputs(self):
+        block = self.block
+        start, end = self.vout_start, self.vout_end
+        return zip(block.vout_ids[start:end], map(block.addresses.__getitem__, block.vout_address_ids[start:end]), block.vout_values[start:end])
@@ -0,0 +1,56 @@
+import threading
+from collections import OrderedDict
+
+
+class PrevoutCache:
+    """
+    Size-bounded LRU cache of (txn_id, vout_id) -> (address, amount) for outputs fetched over RPC.
+
+    Outputs of the same parent transaction are often spent by several inputs of a block, so every
+    output of a fetched parent is cached, not only the one that was asked for.
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, txn_id: str, vout_id: str):
+        key = (txn_id, str(vout_id))
+        with self._lock:
+            tx_out = self._entries.get(key)
+            if tx_out is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return tx_out
+
+    def put_many(self, tx_outs: dict):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for key, tx_out in tx_outs.items():
+                self._entries[key] = tx_out
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,362 @@
+"""
+Deserializer for Bitcoin blocks and transactions in their network serialization, as stored in
+blocks/blk*.dat and returned by `getblock <hash> 0`.
+
+Parsing works on a memoryview of the serialized data, scripts are returned as memoryview slices and
+txids are hashed from slices of the same buffer, so no part of the block is copied.
+"""
+import hashlib
+import struct
+from typing import List, Optional, Tuple
+
+from .node_utils import get_pubkey_address, get_multisig_address, create_p2sh_address, create_p2pkh_address, \
+    create_segwit_address, Block, Transaction, VIN, VOUT, ColumnarBlock
+
+OP_0 = 0x00
+OP_PUSHDATA1 = 0x4C
+OP_PUSHDATA2 = 0x4D
+OP_PUSHDATA4 = 0x4E
+OP_1 = 0x51
+OP_16 = 0x60
+OP_RETURN = 0x6A
+OP_DUP = 0x76
+OP_EQUAL = 0x87
+OP_EQUALVERIFY = 0x88
+OP_HASH160 = 0xA9
+OP_CHECKSIG = 0xAC
+OP_CHECKMULTISIG = 0xAE
+
+MAX_PUBKEYS_PER_MULTISIG = 20
+NULL_TXID = "0" * 64
+
+SCRIPT_TYPE_NONSTANDARD = "nonstandard"
+SCRIPT_TYPE_NULLDATA = "nulldata"
+SCRIPT_TYPE_PUBKEY = "pubkey"
+SCRIPT_TYPE_PUBKEYHASH = "pubkeyhash"
+SCRIPT_TYPE_SCRIPTHASH = "scripthash"
+SCRIPT_TYPE_MULTISIG = "multisig"
+SCRIPT_TYPE_WITNESS_V0_KEYHASH = "witness_v0_keyhash"
+SCRIPT_TYPE_WITNESS_V0_SCRIPTHASH = "witness_v0_scripthash"
+SCRIPT_TYPE_WITNESS_V1_TAPROOT = "witness_v1_taproot"
+SCRIPT_TYPE_WITNESS_UNKNOWN = "witness_unknown"
+
+
+class RawTransaction:
+    __slots__ = ("txid", "is_coinbase", "vins", "vouts")
+
+    def __init__(self, txid: str, is_coinbase: bool, vins: List[Tuple[str, int, int]], vouts: List[Tuple[int, memoryview]]):
+        self.txid = txid
+        self.is_coinbase = is_coinbase
+        # (spent txid, spent vout, sequence) per input
+        self.vins = vins
+        # (value in satoshi, scriptPubKey) per output, the output index is the list position
+        self.vouts = vouts
+
+
+def read_varint(data: memoryview, offset: int) -> Tuple[int, int]:
+    prefix = data[offset]
+    if prefix < 0xFD:
+        return prefix, offset + 1
+    if prefix == 0xFD:
+        return struct.unpack_from("<H", data, offset + 1)[0], offset + 3
+    if prefix == 0xFE:
+        return struct.unpack_from("<I", data, offset + 1)[0], offset + 5
+    return struct.unpack_from("<Q", data, offset + 1)[0], offset + 9
+
+
+def double_sha256(*parts) -> bytes:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part)
+    return hashlib.sha256(sha.digest()).digest()
+
+
+def parse_transaction(data: memoryview, offset: int) -> Tuple[RawTransaction, int]:
+    start = offset
+    offset += 4  # version
+
+    has_witness = data[offset] == 0 and data[offset + 1] != 0
+    if has_witness:
+        offset += 2  # marker and flag
+    body_start = offset
+
+    vin_count, offset = read_varint(data, offset)
+    vins = []
+    is_coinbase = False
+    for _ in range(vin_count):
+        prev_txid = bytes(data[offset: offset + 32])[::-1].hex()
+        prev_vout = struct.unpack_from("<I", data, offset + 32)[0]
+        script_length, offset = read_varint(data, offset + 36)
+        offset += script_length  # scriptSig
+        sequence = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        if prev_txid == NULL_TXID and prev_vout == 0xFFFFFFFF:
+            is_coinbase = True
+        vins.append((prev_txid, prev_vout, sequence))
+
+    vout_count, offset = read_varint(data, offset)
+    vouts = []
+    for _ in range(vout_count):
+        value = struct.unpack_from("<q", data, offset)[0]
+        script_length, offset = read_varint(data, offset + 8)
+        vouts.append((value, data[offset: offset + script_length]))
+        offset += script_length
+    body_end = offset
+
+    if has_witness:
+        for _ in range(vin_count):
+            item_count, offset = read_varint(data, offset)
+            for _ in range(item_count):
+                item_length, offset = read_varint(data, offset)
+                offset += item_length
+
+    locktime_start = offset
+    offset += 4
+
+    # the txid commits to the legacy serialization, i.e. without marker, flag and witnesses
+    txid = double_sha256(data[start: start + 4], data[body_start: body_end], data[locktime_start: offset])[::-1].hex()
+    return RawTransaction(txid, is_coinbase, vins, vouts), offset
+
+
+def parse_block(data) -> Tuple[bytes, List[RawTransaction]]:
+    """
+    Parses a serialized block, returns the 80 byte header and the transactions.
+    """
+    data = memoryview(data)
+    header = data[:80]
+    tx_count, offset = read_varint(data, 80)
+    transactions = []
+    for _ in range(tx_count):
+        tx, offset = parse_transaction(data, offset)
+        transactions.append(tx)
+    return header, transactions
+
+
+def get_block_hash(header) -> str:
+    return double_sha256(header)[::-1].hex()
+
+
+def is_valid_pubkey_size(pubkey) -> bool:
+    # CPubKey::ValidSize
+    if len(pubkey) == 33:
+        return pubkey[0] in (0x02, 0x03)
+    if len(pubkey) == 65:
+        return pubkey[0] in (0x04, 0x06, 0x07)
+    return False
+
+
+def get_script_op(script: memoryview, offset: int):
+    """
+    Reads the operation at `offset`, returns (opcode, pushed data or None, next offset),
+    or None if the push runs past the end of the script (CScript::GetOp failing).
+    """
+    length = len(script)
+    opcode = script[offset]
+    offset += 1
+    if opcode > OP_PUSHDATA4:
+        return opcode, None, offset
+    if opcode < OP_PUSHDATA1:
+        size = opcode
+    else:
+        width = {OP_PUSHDATA1: 1, OP_PUSHDATA2: 2, OP_PUSHDATA4: 4}[opcode]
+        if offset + width > length:
+            return None
+        size = int.from_bytes(script[offset: offset + width], "little")
+        offset += width
+    if offset + size > length:
+        return None
+    return opcode, script[offset: offset + size], offset + size
+
+
+def iterate_script(script: memoryview):
+    """
+    Yields (opcode, pushed data) for every operation of a script, stops at the first malformed push.
+    """
+    offset = 0
+    while offset < len(script):
+        operation = get_script_op(script, offset)
+        if operation is None:
+            return
+        opcode, data, offset = operation
+        yield opcode, data
+
+
+def get_multisig_number(opcode: int, data) -> Optional[int]:
+    if OP_1 <= opcode <= OP_16:
+        return opcode - OP_1 + 1
+    # numbers above 16 are minimally encoded single byte pushes
+    if data is not None and len(data) == 1 and 16 < data[0] <= MAX_PUBKEYS_PER_MULTISIG:
+        return data[0]
+    return None
+
+
+def match_multisig(script: memoryview) -> Optional[Tuple[int, List[bytes]]]:
+    if len(script) < 1 or script[-1] != OP_CHECKMULTISIG:
+        return None
+    operations = list(iterate_script(script))
+    if len(operations) < 3 or operations[-1][0] != OP_CHECKMULTISIG:
+        return None
+    m = get_multisig_number(*operations[0])
+    n = get_multisig_number(*operations[-2])
+    pubkeys = [data for opcode, data in operations[1:-2] if data is not None and is_valid_pubkey_size(data)]
+    if m is None or n is None or m > n or len(pubkeys) != n or len(operations) != n + 3:
+        return None
+    return m, [bytes(pubkey) for pubkey in pubkeys]
+
+
+def is_push_only(script: memoryview) -> bool:
+    offset = 0
+    while offset < len(script):
+        operation = get_script_op(script, offset)
+        if operation is None or operation[0] > OP_16:
+            return False
+        offset = operation[2]
+    return True
+
+
+def classify_script(script: memoryview) -> Tuple[str, Optional[str]]:
+    """
+    Classifies a scriptPubKey like Bitcoin Core's Solver and derives its address the way
+    parse_block_data does for the corresponding verbose JSON: the address field for standard types,
+    pubkey_to_address for P2PK and the P2SH of the redeem script for bare multisig (both memoized).
+    Returns (script type, address), the address is None for nonstandard and nulldata outputs.
+    """
+    length = len(script)
+
+    if length == 23 and script[0] == OP_HASH160 and script[1] == 20 and script[22] == OP_EQUAL:
+        return SCRIPT_TYPE_SCRIPTHASH, create_p2sh_address(bytes(script[2:22]))
+
+    if 4 <= length <= 42 and (script[0] == OP_0 or OP_1 <= script[0] <= OP_16) and script[1] + 2 == length:
+        witness_version = 0 if script[0] == OP_0 else script[0] - OP_1 + 1
+        witness_program = bytes(script[2:])
+        if witness_version == 0:
+            if len(witness_program) == 20:
+                return SCRIPT_TYPE_WITNESS_V0_KEYHASH, create_segwit_address(0, witness_program)
+            if len(witness_program) == 32:
+                return SCRIPT_TYPE_WITNESS_V0_SCRIPTHASH, create_segwit_address(0, witness_program)
+            return SCRIPT_TYPE_NONSTANDARD, None
+        if witness_version == 1 and len(witness_program) == 32:
+            return SCRIPT_TYPE_WITNESS_V1_TAPROOT, create_segwit_address(1, witness_program)
+        return SCRIPT_TYPE_WITNESS_UNKNOWN, create_segwit_address(witness_version, witness_program)
+
+    if length >= 1 and script[0] == OP_RETURN:
+        return (SCRIPT_TYPE_NULLDATA if is_push_only(script[1:]) else SCRIPT_TYPE_NONSTANDARD), None
+
+    if length in (35, 67) and script[0] == length - 2 and script[-1] == OP_CHECKSIG and is_valid_pubkey_size(script[1:-1]):
+        return SCRIPT_TYPE_PUBKEY, get_pubkey_address(bytes(script[1:-1]).hex())
+
+    if length == 25 and script[0] == OP_DUP and script[1] == OP_HASH160 and script[2] == 20 \
+            and script[23] == OP_EQUALVERIFY and script[24] == OP_CHECKSIG:
+        return SCRIPT_TYPE_PUBKEYHASH, create_p2pkh_address(bytes(script[3:23]))
+
+    multisig = match_multisig(script)
+    if multisig is not None:
+        m, pubkeys = multisig
+        return SCRIPT_TYPE_MULTISIG, get_multisig_address(tuple(pubkey.hex() for pubkey in pubkeys), m)
+
+    return SCRIPT_TYPE_NONSTANDARD, None
+
+
+def get_difficulty(bits: int) -> float:
+    # GetDifficulty: the genesis target (0x1d00ffff) divided by the target encoded in `bits`
+    shift = (bits >> 24) & 0xFF
+    difficulty = 0x0000FFFF / (bits & 0x00FFFFFF)
+    while shift < 29:
+        difficulty *= 256.0
+        shift += 1
+    while shift > 29:
+        difficulty /= 256.0
+        shift -= 1
+    return difficulty
+
+
+def get_raw_block_output_totals(raw_block) -> Tuple[int, int]:
+    """
+    Same as tx_decoder.get_block_output_totals for a serialized block.
+    """
+    coinbase_out_satoshi = skipped_out_satoshi = 0
+    _, raw_transactions = parse_block(raw_block)
+    for raw_tx in raw_transactions:
+        for value, script in raw_tx.vouts:
+            if raw_tx.is_coinbase:
+                coinbase_out_satoshi += value
+            if value and classify_script(script)[0] in (SCRIPT_TYPE_NONSTANDARD, SCRIPT_TYPE_NULLDATA):
+                skipped_out_satoshi += value
+    return coinbase_out_satoshi, skipped_out_satoshi
+
+
+def parse_raw_block_data(raw_block, block_height: int) -> Block:
+    """
+    Builds the same Block as parse_block_data from a serialized block (getblock verbosity 0).
+
+    Amounts are read as integer satoshi and addresses are derived by classify_script, so neither JSON
+    nor Decimal is involved. Fields the serialization does not carry are left empty: fee_satoshi is 0,
+    script_sig and script_pub_key are None and inputs have no prevout (see BitcoinNode.resolve_block_inputs).
+    """
+    header, raw_transactions = parse_block(raw_block)
+    timestamp, bits, nonce = struct.unpack_from("<III", header, 68)
+
+    block = Block(
+        block_height=block_height,
+        block_hash=get_block_hash(header),
+        timestamp=timestamp,
+        previous_block_hash=bytes(header[4:36])[::-1].hex() if block_height > 0 else "",
+        nonce=nonce,
+        difficulty=get_difficulty(bits),
+    )
+
+    for raw_tx in raw_transactions:
+        tx = Transaction(
+            tx_id=raw_tx.txid,
+            block_height=block_height,
+            timestamp=timestamp,
+            fee_satoshi=0,
+            is_coinbase=raw_tx.is_coinbase,
+        )
+
+        for prev_txid, prev_vout, sequence in raw_tx.vins:
+            # matches the verbose JSON, where coinbase inputs have no txid and vout
+            if raw_tx.is_coinbase:
+                prev_txid, prev_vout = 0, 0
+            tx.vins.append(VIN(tx_id=prev_txid, vin_id=sequence, vout_id=prev_vout, script_sig=None, sequence=sequence))
+
+        for n, (value, script) in enumerate(raw_tx.vouts):
+            script_type, address = classify_script(script)
+            if script_type in (SCRIPT_TYPE_NONSTANDARD, SCRIPT_TYPE_NULLDATA):
+                continue
+            tx.vouts.append(VOUT(vout_id=n, value_satoshi=value, script_pub_key=None, is_spent=False, address=address))
+
+        block.transactions.append(tx)
+
+    return block
+
+
+def parse_raw_block_columnar(raw_block, block_height: int) -> ColumnarBlock:
+    """
+    Same as parse_raw_block_data, but returns a ColumnarBlock.
+    """
+    header, raw_transactions = parse_block(raw_block)
+    timestamp, bits, nonce = struct.unpack_from("<III", header, 68)
+    block = ColumnarBlock(
+        block_height=block_height,
+        block_hash=get_block_hash(header),
+        timestamp=timestamp,
+        previous_block_hash=bytes(header[4:36])[::-1].hex() if block_height > 0 else "",
+        nonce=nonce,
+        difficulty=get_difficulty(bits),
+    )
+
+    for raw_tx in raw_transactions:
+        block.add_transaction(raw_tx.txid, timestamp, 0, raw_tx.is_coinbase)
+        for prev_txid, prev_vout, _ in raw_tx.vins:
+            if raw_tx.is_coinbase:
+                block.add_input(0, 0)
+            else:
+                block.add_input(prev_txid, prev_vout)
+        for n, (value, script) in enumerate(raw_tx.vouts):
+            script_type, address = classify_script(script)
+            if script_type in (SCRIPT_TYPE_NONSTANDARD, SCRIPT_TYPE_NULLDATA):
+                continue
+            block.add_output(n, value, address)
+
+    return block
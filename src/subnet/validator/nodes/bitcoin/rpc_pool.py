@@ -0,0 +1,241 @@
+import base64
+import contextlib
+import decimal
+import http.client
+import itertools
+import json
+import queue
+import threading
+import time
+import urllib.parse
+
+from bitcoinrpc.authproxy import HTTP_TIMEOUT, USER_AGENT, JSONRPCException, EncodeDecimal
+from loguru import logger
+
+from . import tx_decoder
+
+# Errors raised by the HTTP transport (as opposed to JSONRPCException raised by bitcoind itself).
+# When one of these happens the keep-alive connection is in an unknown state and has to be replaced.
+CONNECTION_ERRORS = (http.client.HTTPException, ConnectionError, OSError)
+
+# JSON-RPC request ids, shared by the connections of every thread (next() on a count is atomic)
+_request_ids = itertools.count(1)
+
+
+class RpcConnection:
+    """
+    One keep-alive HTTP/1.1 connection to bitcoind, with single calls, JSON-RPC batches and an optional fast
+    response decoder. Requests are encoded as AuthServiceProxy does, but the connection is held here instead
+    of in AuthServiceProxy's private attributes; like it, a connection is not thread safe.
+
+    With `fast_json` responses are decoded by tx_decoder.loads (orjson when installed) into floats instead of
+    Decimal; amounts are converted with tx_decoder.parse_satoshi, which is exact for both.
+    """
+
+    def __init__(self, service_url: str, fast_json: bool = False, timeout: int = HTTP_TIMEOUT):
+        self.url = urllib.parse.urlparse(service_url)
+        self.timeout = timeout
+        self.fast_json = fast_json
+        self.auth_header = b'Basic ' + base64.b64encode(f"{self.url.username}:{self.url.password}".encode('utf8'))
+        if self.url.scheme == 'https':
+            self.connection = http.client.HTTPSConnection(self.url.hostname, self.url.port or 443, timeout=timeout)
+        else:
+            self.connection = http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=timeout)
+
+    def close(self):
+        self.connection.close()
+
+    def _post(self, data):
+        self.connection.request('POST', self.url.path or '/', json.dumps(data, default=EncodeDecimal),
+                                {'Host': self.url.hostname,
+                                 'User-Agent': USER_AGENT,
+                                 'Authorization': self.auth_header,
+                                 'Content-type': 'application/json'})
+        self.connection.sock.settimeout(self.timeout)
+        return self._get_response()
+
+    def _get_response(self):
+        http_response = self.connection.getresponse()
+        if http_response is None:
+            raise JSONRPCException({'code': -342, 'message': 'missing HTTP response from server'})
+        if http_response.getheader('Content-Type') != 'application/json':
+            # the body has to be read for the connection to take the next request
+            http_response.read()
+            raise JSONRPCException({'code': -342, 'message': f"non-JSON HTTP response with '{http_response.status} {http_response.reason}' from server"})
+        if self.fast_json:
+            return tx_decoder.loads(http_response.read())
+        return json.loads(http_response.read().decode('utf8'), parse_float=decimal.Decimal)
+
+    def call(self, method: str, *params):
+        """
+        Performs a single call, same as AuthServiceProxy's `getattr(proxy, method)(*params)`.
+        """
+        response = self._post({'version': '1.1', 'method': method, 'params': params, 'id': next(_request_ids)})
+        if response.get('error') is not None:
+            raise JSONRPCException(response['error'])
+        if 'result' not in response:
+            raise JSONRPCException({'code': -343, 'message': 'missing JSON-RPC result'})
+        return response['result']
+
+    def batch_call(self, rpc_calls: list) -> list:
+        """
+        Sends every call in `rpc_calls` (tuples of method and params) as one JSON-RPC batch request.
+        Results are returned in request order; calls that failed on the bitcoind side are returned
+        as JSONRPCException instances instead of raising, so one bad entry does not void the batch.
+        """
+        if not rpc_calls:
+            return []
+
+        batch_data = [{'version': '1.1', 'method': method, 'params': params, 'id': next(_request_ids)} for method, *params in rpc_calls]
+
+        responses = self._post(batch_data)
+        if not isinstance(responses, list):
+            # bitcoind answers a rejected batch with a single error object
+            raise JSONRPCException(responses.get('error') or {'code': -342, 'message': 'invalid batch response'})
+
+        # responses are not guaranteed to come back in request order
+        responses_by_id = {response.get('id'): response for response in responses}
+        results = []
+        for request in batch_data:
+            response = responses_by_id.get(request['id'])
+            if response is None:
+                results.append(JSONRPCException({'code': -343, 'message': 'missing JSON-RPC result'}))
+            elif response.get('error') is not None:
+                results.append(JSONRPCException(response['error']))
+            else:
+                results.append(response.get('result'))
+        return results
+
+
+class RpcConnectionPool:
+    """
+    Bounded pool of keep-alive RpcConnections to bitcoind.
+
+    An RpcConnection keeps a single HTTP/1.1 connection open and is not thread safe, so every
+    caller checks out its own connection for the duration of a call and returns it afterwards.
+    Connections are created lazily up to `size`; further callers block until one is released.
+    """
+
+    def __init__(self, node_rpc_url: str, size: int = 8, timeout: int = HTTP_TIMEOUT, max_retries: int = 1, fast_json: bool = False):
+        self.node_rpc_url = node_rpc_url
+        self.size = size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.fast_json = fast_json
+
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+
+        # metrics
+        self._acquisitions = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._reconnects = 0
+
+    def _create_connection(self) -> RpcConnection:
+        return RpcConnection(self.node_rpc_url, fast_json=self.fast_json, timeout=self.timeout)
+
+    @staticmethod
+    def _close_connection(rpc_connection: RpcConnection):
+        try:
+            rpc_connection.close()
+        except Exception:
+            pass
+
+    def _acquire(self) -> RpcConnection:
+        start_time = time.monotonic()
+        try:
+            rpc_connection = self._idle.get_nowait()
+        except queue.Empty:
+            rpc_connection = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    rpc_connection = self._create_connection()
+            if rpc_connection is None:
+                rpc_connection = self._idle.get()
+
+        wait_time = time.monotonic() - start_time
+        with self._lock:
+            self._acquisitions += 1
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+        return rpc_connection
+
+    def _release(self, rpc_connection: RpcConnection):
+        self._idle.put_nowait(rpc_connection)
+
+    def _discard(self, rpc_connection: RpcConnection) -> RpcConnection:
+        self._close_connection(rpc_connection)
+        with self._lock:
+            self._reconnects += 1
+        return self._create_connection()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Checks out a connection for several calls in a row. Transport errors close and replace the
+        connection before being re-raised, so the pool never hands out a broken socket.
+        """
+        rpc_connection = self._acquire()
+        try:
+            yield rpc_connection
+        except CONNECTION_ERRORS:
+            rpc_connection = self._discard(rpc_connection)
+            raise
+        finally:
+            self._release(rpc_connection)
+
+    def _call_with_retry(self, method: str, fn):
+        rpc_connection = self._acquire()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    return fn(rpc_connection)
+                except CONNECTION_ERRORS as e:
+                    rpc_connection = self._discard(rpc_connection)
+                    if attempt >= self.max_retries:
+                        raise
+                    attempt += 1
+                    logger.warning(f"RPC connection failed, reconnecting", method=method, attempt=attempt, error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+        finally:
+            self._release(rpc_connection)
+
+    def call(self, method: str, *args):
+        """
+        Performs a single RPC call, reconnecting and retrying on transport failures.
+        RPC level errors (JSONRPCException) are raised to the caller unchanged.
+        """
+        return self._call_with_retry(method, lambda rpc_connection: rpc_connection.call(method, *args))
+
+    def batch(self, rpc_calls: list) -> list:
+        """
+        Performs a JSON-RPC batch request on one pooled connection, see RpcConnection.batch_call.
+        """
+        return self._call_with_retry('batch', lambda rpc_connection: rpc_connection.batch_call(rpc_calls))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            acquisitions = self._acquisitions
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': self._idle.qsize(),
+                'acquisitions': acquisitions,
+                'total_wait_time': self._total_wait_time,
+                'avg_wait_time': self._total_wait_time / acquisitions if acquisitions else 0.0,
+                'max_wait_time': self._max_wait_time,
+                'reconnects': self._reconnects,
+            }
+
+    def close(self):
+        while True:
+            try:
+                rpc_connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_connection(rpc_connection)
+            with self._lock:
+                self._created -= 1
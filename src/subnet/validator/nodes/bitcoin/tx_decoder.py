@@ -0,0 +1,211 @@
+"""
+Decoder for the verbose JSON transactions of bitcoind (getblock verbosity 2 and 3, verbose getrawtransaction),
+shared by the block parsers, BitcoinNode.create_in_memory_txn and the RPC fallback for spent outputs.
+
+Amounts are converted to satoshi by parse_satoshi, which is exact for the float, text and Decimal forms the
+RPC transports produce. Output addresses are decoded in one of two modes: strict raises on an output whose
+address can't be derived, lenient gives it the "unknown-<txid>" placeholder instead.
+"""
+import json
+from decimal import Decimal
+from typing import Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # the standard library decoder is used instead
+    orjson = None
+
+from .node_utils import Block, ColumnarBlock, Transaction, VIN, VOUT, SATOSHI, get_script_address
+
+
+def loads(data):
+    """
+    Decodes an RPC response body. Amounts are returned as float, not Decimal, see parse_satoshi.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_satoshi(value) -> int:
+    """
+    Converts an amount in BTC to satoshi.
+
+    Floats are exact: bitcoind prints at most 8 decimals and amounts stay below 2^53 satoshi, so the product
+    is within 0.5 of the intended integer. Text is split at the decimal point; Decimal (AuthServiceProxy's
+    own decoding) and anything else goes through Decimal, truncating like the previous conversion did.
+    """
+    value_type = type(value)
+    if value_type is float:
+        return round(value * 100_000_000)
+    if value_type is int:
+        return value * 100_000_000
+    if value_type is str and "e" not in value and "E" not in value:
+        negative = value.startswith("-")
+        whole, _, fraction = value.lstrip("-").partition(".")
+        if len(fraction) <= 8:
+            satoshi = int(whole or "0") * 100_000_000 + int(fraction.ljust(8, "0"))
+            return -satoshi if negative else satoshi
+    return int(Decimal(value) * SATOSHI)
+
+
+def is_skipped_output(script_type: str) -> bool:
+    # outputs without an owner, left out of blocks and the tx_out index
+    return "nonstandard" in script_type or script_type == "nulldata"
+
+
+def decode_address(script_pub_key: dict, tx_id: str, strict: bool = True) -> str:
+    address = script_pub_key.get("address")
+    if address:
+        return address
+    addresses = script_pub_key.get("addresses")
+    if addresses:
+        return addresses[0]
+    address = get_script_address(script_pub_key.get("asm", ""))
+    if address:
+        return address
+    if strict:
+        raise Exception(f"Unknown address type: {script_pub_key}")
+    return f"unknown-{tx_id}"
+
+
+def decode_prevout(vin_data) -> Tuple[Optional[str], Optional[int]]:
+    # Bitcoin Core 23+ embeds the spent output into every non-coinbase vin for getblock verbosity 3
+    # (and getrawtransaction verbosity 2), so the input can be resolved without any lookup.
+    prevout = vin_data.get("prevout")
+    if not prevout:
+        return None, None
+    return decode_address(prevout.get("scriptPubKey", {}), vin_data.get("txid"), strict=False), parse_satoshi(prevout["value"])
+
+
+def decode_vout(vout_data, tx_id: str, strict: bool = True) -> Optional[Tuple[int, int, str]]:
+    """
+    Returns (vout_id, value in satoshi, address) of an output, None for the outputs is_skipped_output leaves out.
+    """
+    script_pub_key = vout_data["scriptPubKey"]
+    if is_skipped_output(script_pub_key.get("type", "")):
+        return None
+    return vout_data["n"], parse_satoshi(vout_data["value"]), decode_address(script_pub_key, tx_id, strict)
+
+
+def decode_transaction(tx_data, block_height: int = 0, timestamp: int = 0, strict: bool = True) -> Transaction:
+    tx_id = tx_data["txid"]
+    tx = Transaction(
+        tx_id=tx_id,
+        block_height=block_height,
+        timestamp=int(tx_data.get("time", timestamp)),
+        fee_satoshi=parse_satoshi(tx_data.get("fee", 0)),
+    )
+
+    for vin_data in tx_data["vin"]:
+        prevout_address, prevout_value_satoshi = decode_prevout(vin_data)
+        sequence = vin_data.get("sequence", 0)
+        tx.vins.append(VIN(
+            tx_id=vin_data.get("txid", 0),
+            vin_id=sequence,
+            vout_id=vin_data.get("vout", 0),
+            script_sig=vin_data.get("scriptSig", {}).get("asm", ""),
+            sequence=sequence,
+            prevout_address=prevout_address,
+            prevout_value_satoshi=prevout_value_satoshi,
+        ))
+        tx.is_coinbase = "coinbase" in vin_data
+
+    for vout_data in tx_data["vout"]:
+        vout = decode_vout(vout_data, tx_id, strict)
+        if vout is None:
+            continue
+        vout_id, value_satoshi, address = vout
+        tx.vouts.append(VOUT(
+            vout_id=vout_id,
+            value_satoshi=value_satoshi,
+            script_pub_key=vout_data["scriptPubKey"].get("asm", ""),
+            is_spent=False,
+            address=address,
+        ))
+
+    return tx
+
+
+def decode_tx_outs(tx_data, tx_id: str) -> dict:
+    """
+    Returns every output of a transaction, skipped ones included, keyed by (tx_id, vout_id) with (address, amount)
+    values, in lenient mode. Used to resolve spent outputs from their parent transaction.
+    """
+    tx_outs = {}
+    for vout_data in tx_data.get("vout", []):
+        try:
+            tx_out = decode_address(vout_data["scriptPubKey"], tx_id, strict=False), parse_satoshi(vout_data["value"])
+        except Exception:
+            tx_out = f"unknown-{tx_id}", 0
+        tx_outs[(tx_id, str(vout_data["n"]))] = tx_out
+    return tx_outs
+
+
+def parse_block_data(block_data, strict: bool = True) -> Block:
+    block_height = block_data["height"]
+    timestamp = int(block_data["time"])
+
+    block = Block(
+        block_height=block_height,
+        block_hash=block_data["hash"],
+        timestamp=timestamp,
+        previous_block_hash=block_data.get("previousblockhash", ""),
+        nonce=block_data.get("nonce", 0),
+        difficulty=block_data.get("difficulty", 0),
+    )
+    block.transactions = [decode_transaction(tx_data, block_height, timestamp, strict) for tx_data in block_data["tx"]]
+    return block
+
+
+def parse_block_data_columnar(block_data, strict: bool = True) -> ColumnarBlock:
+    """
+    Same as parse_block_data, but returns a ColumnarBlock.
+    """
+    timestamp = int(block_data["time"])
+    block = ColumnarBlock(
+        block_height=block_data["height"],
+        block_hash=block_data["hash"],
+        timestamp=timestamp,
+        previous_block_hash=block_data.get("previousblockhash", ""),
+        nonce=block_data.get("nonce", 0),
+        difficulty=block_data.get("difficulty", 0),
+    )
+
+    for tx_data in block_data["tx"]:
+        tx_id = tx_data["txid"]
+        block.add_transaction(tx_id, int(tx_data.get("time", timestamp)), parse_satoshi(tx_data.get("fee", 0)))
+
+        is_coinbase = False
+        for vin_data in tx_data["vin"]:
+            prevout_address, prevout_value_satoshi = decode_prevout(vin_data)
+            block.add_input(vin_data.get("txid", 0), vin_data.get("vout", 0), prevout_address, prevout_value_satoshi)
+            is_coinbase = "coinbase" in vin_data
+        block.set_coinbase(is_coinbase)
+
+        for vout_data in tx_data["vout"]:
+            vout = decode_vout(vout_data, tx_id, strict)
+            if vout is not None:
+                block.add_output(*vout)
+
+    return block
+
+
+def get_block_output_totals(block_data) -> Tuple[int, int]:
+    """
+    Returns the coinbase output amount and the amount of the skipped (nonstandard / nulldata) outputs,
+    both in satoshi, of a verbose block.
+    """
+    coinbase_out_satoshi = skipped_out_satoshi = 0
+    for tx_data in block_data["tx"]:
+        is_coinbase = "coinbase" in tx_data["vin"][0]
+        for vout_data in tx_data["vout"]:
+            is_skipped = is_skipped_output(vout_data["scriptPubKey"].get("type", ""))
+            if not is_coinbase and not is_skipped:
+                continue
+            value_satoshi = parse_satoshi(vout_data["value"])
+            if is_coinbase:
+                coinbase_out_satoshi += value_satoshi
+            if is_skipped:
+                skipped_out_satoshi += value_satoshi
+    return coinbase_out_satoshi, skipped_out_satoshi
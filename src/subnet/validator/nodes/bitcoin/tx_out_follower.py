@@ -0,0 +1,358 @@
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # without fcntl (Windows) the checkpoint can't be locked, one process per checkpoint file
+    fcntl = None
+
+
+# the checkpoint log is rewritten once it holds this many records more than twice the blocks of the delta
+COMPACT_MIN_RECORDS = 100
+
+
+class TxOutDeltaIndex:
+    """
+    In-memory tx_out entries of the blocks appended after the static tx_out index was built.
+    Entries are grouped by block so the most recent blocks can be rolled back on a reorg, and the oldest
+    pruned. Every change is also journaled as a record, see `apply`, for the follower's checkpoint log.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._blocks = OrderedDict()  # height -> (block_hash, keys)
+        self._journal = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def block_count(self) -> int:
+        return len(self._blocks)
+
+    def get(self, txn_id: str, vout_id):
+        return self._entries.get((txn_id, str(vout_id)))
+
+    @property
+    def tip_height(self):
+        with self._lock:
+            return next(reversed(self._blocks)) if self._blocks else None
+
+    def get_block_hash(self, height: int):
+        with self._lock:
+            block = self._blocks.get(height)
+            return block[0] if block else None
+
+    def add_block(self, height: int, block_hash: str, entries: dict):
+        self.apply(("block", height, block_hash, entries), journal=True)
+
+    def rollback(self, height: int):
+        """
+        Removes the blocks above `height`.
+        """
+        self.apply(("rollback", height), journal=True)
+
+    def prune(self, height: int):
+        """
+        Removes the blocks at and below `height`.
+        """
+        with self._lock:
+            if self._blocks and next(iter(self._blocks)) <= height:
+                self.apply(("prune", height), journal=True)
+
+    def apply(self, record: tuple, journal: bool = False):
+        """
+        Applies a ("block", height, block_hash, entries), ("rollback", height) or ("prune", height) record.
+        Applying a record twice has no further effect.
+        """
+        with self._lock:
+            kind, height = record[0], record[1]
+            if kind == "block":
+                _, _, block_hash, entries = record
+                self._entries.update(entries)
+                self._blocks[height] = (block_hash, list(entries.keys()))
+            elif kind == "rollback":
+                while self._blocks and next(reversed(self._blocks)) > height:
+                    self._remove_block(last=True)
+            elif kind == "prune":
+                while self._blocks and next(iter(self._blocks)) <= height:
+                    self._remove_block(last=False)
+            else:
+                raise ValueError(f"Unknown tx_out delta record: {kind}")
+            if journal:
+                self._journal.append(record)
+
+    def _remove_block(self, last: bool):
+        _, (_, keys) = self._blocks.popitem(last=last)
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def drain_journal(self) -> list:
+        """
+        Returns the records of the changes since the last call.
+        """
+        with self._lock:
+            journal, self._journal = self._journal, []
+            return journal
+
+    def get_state(self):
+        with self._lock:
+            return {height: (block_hash, {key: self._entries[key] for key in keys if key in self._entries})
+                    for height, (block_hash, keys) in self._blocks.items()}
+
+    def set_state(self, state: dict):
+        with self._lock:
+            self._entries = {}
+            self._blocks = OrderedDict()
+            for height in sorted(state):
+                block_hash, entries = state[height]
+                self.apply(("block", height, block_hash, entries))
+
+
+class TxOutIndexFollower(threading.Thread):
+    """
+    Follows the chain tip and appends the outputs of every new block to a TxOutDeltaIndex.
+
+    Each new block is fetched once. The hashes of the followed blocks are kept, so when the node
+    reorganizes, the blocks that left the best chain (at most `reorg_depth`) are rolled back and
+    followed again. Only the last `max_blocks` blocks are kept, outputs of older blocks are found
+    through the prevout cache and rpc like any output missing from the static index.
+
+    The delta is persisted to a checkpoint file, so a restart resumes where the previous run stopped
+    instead of rescanning. The file is a log of TxOutDeltaIndex records, a save appends the changes
+    since the previous one, and it is rewritten from the delta once mostly made of superseded records.
+
+    Generator worker processes share the checkpoint file: the follower holding its lock file follows the
+    chain and writes the log, the others only read what it appends, and one of them takes over when
+    the writing process stops.
+    """
+
+    _followers = {}
+    _followers_lock = threading.Lock()
+
+    def __init__(self, node, checkpoint_path: str, poll_interval: int = 30, reorg_depth: int = 100, backfill_blocks: int = 1008, max_blocks: int = 2016):
+        super().__init__(daemon=True, name="tx-out-index-follower")
+        self.node = node
+        self.checkpoint_path = checkpoint_path
+        self.poll_interval = poll_interval
+        self.reorg_depth = reorg_depth
+        self.backfill_blocks = backfill_blocks
+        self.max_blocks = max(max_blocks, reorg_depth)
+        self.delta_index = TxOutDeltaIndex()
+        self.stop_event = threading.Event()
+        self._checkpoint_lock = threading.Lock()
+        self._lock_file = None
+        self.is_writer = False  # holds the checkpoint lock, see _lock_checkpoint
+        self._log_id = None  # header of the log read so far, a new one is written by every rewrite
+        self._log_offset = 0  # end of the last record read
+        self._log_records = 0  # records in the checkpoint log
+        self._lock_checkpoint()
+        self._load_checkpoint()
+
+    @classmethod
+    def get_or_start(cls, node, checkpoint_path: str, **kwargs) -> "TxOutIndexFollower":
+        # one follower per checkpoint file and process, shared by every node using it
+        with cls._followers_lock:
+            follower = cls._followers.get(checkpoint_path)
+            if follower is None or not follower.is_alive():
+                follower = cls(node, checkpoint_path, **kwargs)
+                follower.start()
+                cls._followers[checkpoint_path] = follower
+            return follower
+
+    def _lock_checkpoint(self) -> bool:
+        """
+        Makes this follower the writer of the checkpoint if no follower, of any process, is.
+        The lock is released with the lock file, when closed or when the process exits.
+        """
+        if fcntl is None:
+            self.is_writer = True
+            return True
+        lock_file = open(f"{self.checkpoint_path}.lock", "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        self.is_writer = True
+        return True
+
+    def _load_checkpoint(self):
+        try:
+            if not self._read_log() and self.is_writer:
+                with self._checkpoint_lock:
+                    self._rewrite_checkpoint()
+            if len(self.delta_index):
+                logger.info(f"Loaded tx_out follower checkpoint", checkpoint_path=self.checkpoint_path, writer=self.is_writer, tip_height=self.delta_index.tip_height, entries=len(self.delta_index))
+        except Exception as e:
+            logger.error(f"Failed to load tx_out follower checkpoint", checkpoint_path=self.checkpoint_path, error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+
+    def _read_log(self) -> bool:
+        """
+        Applies the records of the checkpoint log not read yet, from the start when the log was rewritten.
+        Returns whether new records can be appended to the log as it is, i.e. it starts with a header and
+        doesn't end with a partly written record.
+        """
+        try:
+            file = open(self.checkpoint_path, "rb")
+        except FileNotFoundError:
+            return False
+        with file:
+            size = os.fstat(file.fileno()).st_size
+            try:
+                header = pickle.load(file)
+            except Exception:
+                return False
+            log_id = header[1] if isinstance(header, tuple) and header[0] == "log" else None
+            if log_id != self._log_id or size < self._log_offset:
+                if self._log_offset:
+                    self.delta_index.set_state({})
+                self._log_id, self._log_offset, self._log_records = log_id, 0, 0
+            file.seek(self._log_offset)
+
+            appendable = log_id is not None
+            while file.tell() < size:
+                try:
+                    record = pickle.load(file)
+                except Exception:
+                    # the last record of an interrupted save, or of one in progress in the writing process
+                    return False
+                if isinstance(record, dict):
+                    # a whole delta, the checkpoint format before the log
+                    self.delta_index.set_state(record)
+                    appendable = False
+                elif record[0] != "log":
+                    self.delta_index.apply(record)
+                    self._log_records += 1
+                self._log_offset = file.tell()
+            return appendable
+
+    def save_checkpoint(self):
+        """
+        Appends the changes since the last save to the checkpoint log, when this follower is its writer.
+        """
+        with self._checkpoint_lock:
+            records = self.delta_index.drain_journal()
+            if not self.is_writer:
+                return
+            if self._log_records + len(records) > 2 * self.delta_index.block_count + COMPACT_MIN_RECORDS:
+                self._rewrite_checkpoint()
+            elif records:
+                with open(self.checkpoint_path, "ab") as file:
+                    for record in records:
+                        pickle.dump(record, file, protocol=pickle.HIGHEST_PROTOCOL)
+                self._log_records += len(records)
+
+    def _rewrite_checkpoint(self):
+        # records journaled meanwhile are appended by the next save again, applying them twice is harmless
+        state = self.delta_index.get_state()
+        self._log_id = uuid.uuid4().hex
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(("log", self._log_id), file, protocol=pickle.HIGHEST_PROTOCOL)
+            for height, (block_hash, entries) in state.items():
+                pickle.dump(("block", height, block_hash, entries), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._log_records = len(state)
+
+    def _find_fork_height(self, tip_height: int) -> int:
+        """
+        Returns the height of the last followed block that is still on the best chain.
+        """
+        height = tip_height
+        while height > tip_height - self.reorg_depth:
+            followed_hash = self.delta_index.get_block_hash(height)
+            if followed_hash is None:
+                break
+            if followed_hash == self.node.rpc_pool.call('getblockhash', height):
+                return height
+            height -= 1
+        return height
+
+    def follow(self) -> int:
+        """
+        Appends every block between the followed tip and the node tip, returns the number of blocks appended.
+        """
+        node_height = self.node.rpc_pool.call('getblockcount')
+        followed_height = self.delta_index.tip_height
+
+        if followed_height is None:
+            followed_height = max(node_height - self.backfill_blocks, -1)
+        elif followed_height > node_height or self.delta_index.get_block_hash(followed_height) != self.node.rpc_pool.call('getblockhash', followed_height):
+            fork_height = self._find_fork_height(min(followed_height, node_height))
+            logger.warning(f"Chain reorganization detected, rolling back tx_out delta", followed_height=followed_height, fork_height=fork_height)
+            self.delta_index.rollback(fork_height)
+            followed_height = fork_height
+
+        appended = 0
+        for height in range(followed_height + 1, node_height + 1):
+            if self.stop_event.is_set():
+                break
+            block_data = self.node.get_parsed_block_by_height(height)
+            if block_data is None:
+                break
+            entries = {}
+            for tx in block_data.transactions:
+                tx_id = tx.tx_id
+                for vout_id, address, amount in tx.iter_outputs():
+                    entries[(tx_id, str(vout_id))] = (address or f"unknown-{tx_id}", amount)
+            self.delta_index.add_block(height, block_data.block_hash, entries)
+            appended += 1
+            # a long catch-up (e.g. the initial backfill) is checkpointed as it goes
+            if appended % 100 == 0:
+                self.save_checkpoint()
+
+        tip_height = self.delta_index.tip_height
+        if tip_height is not None:
+            self.delta_index.prune(tip_height - self.max_blocks)
+        return appended
+
+    def poll(self) -> int:
+        """
+        Follows the chain tip as the writer of the checkpoint, or reads the blocks its writer appended.
+        Returns the number of blocks this follower appended.
+        """
+        if not self.is_writer and self._lock_checkpoint():
+            logger.info(f"Took over tx_out follower checkpoint", checkpoint_path=self.checkpoint_path)
+            self._load_checkpoint()
+        if not self.is_writer:
+            self._read_log()
+            return 0
+        appended = self.follow()
+        self.save_checkpoint()
+        return appended
+
+    def run(self):
+        logger.info(f"Started tx_out index follower", checkpoint_path=self.checkpoint_path, writer=self.is_writer, tip_height=self.delta_index.tip_height)
+        while not self.stop_event.is_set():
+            try:
+                start_time = time.time()
+                appended = self.poll()
+                if appended:
+                    logger.info(f"Appended blocks to tx_out delta", blocks=appended, tip_height=self.delta_index.tip_height, entries=len(self.delta_index), time_taken=time.time() - start_time)
+            except Exception as e:
+                logger.error(f"Failed to follow chain tip", error={'exception_type': e.__class__.__name__, 'exception_message': str(e)})
+            self.stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def close(self):
+        """
+        Stops following, saves the checkpoint and releases it to the followers of other processes.
+        """
+        self.stop()
+        self.save_checkpoint()
+        with self._checkpoint_lock:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            self.is_writer = False
@@ -0,0 +1,355 @@
+import heapq
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import time
+from typing import Iterable, Optional, Tuple
+
+from loguru import logger
+
+# On-disk layout (all integers little-endian unless stated otherwise):
+#
+#   header          MAGIC, version, record count, address count and the offsets of the sections below
+#   buckets         BUCKET_COUNT + 1 uint64 record indexes, bucket b holds the txids starting with the 2 bytes b
+#   records         RECORD_SIZE bytes each, sorted by (txid, vout):
+#                     txid (32 bytes, display order) | vout (uint32 big-endian) | address id (uint32) | amount (int64)
+#   address offsets address count + 1 uint64 offsets into the address data
+#   address data    utf-8 encoded addresses, each stored once
+#
+# The vout is stored big-endian so that the first KEY_SIZE bytes of a record sort lexicographically.
+
+MAGIC = b"TXOIDX01"
+VERSION = 1
+HEADER_FORMAT = "<8sIQQQQQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+KEY_SIZE = 36
+RECORD_SIZE = 48
+BUCKET_COUNT = 1 << 16
+VALUE_FORMAT = "<Iq"
+
+
+def encode_key(txid: str, vout: int) -> bytes:
+    return bytes.fromhex(txid) + int(vout).to_bytes(4, "big")
+
+
+class TxOutIndex:
+    """
+    Read-only, memory-mapped tx_out index: (txid, vout) -> (address, amount in satoshi).
+
+    The records are not loaded into the Python heap, the kernel page cache backs the mapping, so opening
+    the index is instant and several validator processes mapping the same file share its pages. A lookup
+    copies what it reads out of the mapping: the keys its binary search compares and the record it returns.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.record_count, self.address_count, self._buckets_offset, self._records_offset, \
+            self._address_offsets_offset, self._address_data_offset = struct.unpack_from(HEADER_FORMAT, self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a tx_out index file: {path}")
+
+        view = memoryview(self._mm)
+        self._buckets = view[self._buckets_offset: self._buckets_offset + (BUCKET_COUNT + 1) * 8].cast("Q")
+        self._address_offsets = view[self._address_offsets_offset: self._address_offsets_offset + (self.address_count + 1) * 8].cast("Q")
+
+    def __len__(self):
+        return self.record_count
+
+    def __contains__(self, item):
+        txid, vout = item
+        return self.get(txid, vout) is not None
+
+    def _find(self, key: bytes) -> int:
+        bucket = (key[0] << 8) | key[1]
+        lo, hi = self._buckets[bucket], self._buckets[bucket + 1]
+        mm = self._mm
+        records_offset = self._records_offset
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            offset = records_offset + mid * RECORD_SIZE
+            if mm[offset: offset + KEY_SIZE] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._buckets[bucket + 1]:
+            offset = records_offset + lo * RECORD_SIZE
+            if mm[offset: offset + KEY_SIZE] == key:
+                return offset
+        return -1
+
+    def get_address(self, address_id: int) -> str:
+        start = self._address_data_offset + self._address_offsets[address_id]
+        end = self._address_data_offset + self._address_offsets[address_id + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def get(self, txid: str, vout) -> Optional[Tuple[str, int]]:
+        try:
+            key = encode_key(txid, int(vout))
+        except (ValueError, TypeError):
+            return None
+        if len(key) != KEY_SIZE:
+            return None
+        offset = self._find(key)
+        if offset < 0:
+            return None
+        address_id, amount = struct.unpack_from(VALUE_FORMAT, self._mm, offset + KEY_SIZE)
+        return self.get_address(address_id), amount
+
+    def close(self):
+        self._buckets.release()
+        self._address_offsets.release()
+        self._mm.close()
+        self._file.close()
+
+
+RUN_ENTRY_FORMAT = "<36sQqH"
+RUN_ENTRY_SIZE = struct.calcsize(RUN_ENTRY_FORMAT)
+
+
+def write_run(entries, run_path: str):
+    """
+    Writes (key, sequence, amount, address) entries, sorted by key and sequence, to a run file.
+    Runs keep the address inline so they can be produced by independent worker processes.
+    """
+    with open(run_path, "wb") as file:
+        for key, sequence, amount, address in entries:
+            encoded = address.encode("utf-8")
+            file.write(struct.pack(RUN_ENTRY_FORMAT, key, sequence, amount, len(encoded)) + encoded)
+
+
+def read_run(run_path: str):
+    with open(run_path, "rb", buffering=1 << 20) as file:
+        while True:
+            header = file.read(RUN_ENTRY_SIZE)
+            if not header:
+                break
+            key, sequence, amount, address_length = struct.unpack(RUN_ENTRY_FORMAT, header)
+            yield key, sequence, amount, file.read(address_length).decode("utf-8")
+
+
+ADDRESS_RUN_ENTRY_FORMAT = "<QH"
+ADDRESS_RUN_ENTRY_SIZE = struct.calcsize(ADDRESS_RUN_ENTRY_FORMAT)
+ADDRESS_ID_RUN_ENTRY_FORMAT = "<QI"
+ADDRESS_ID_RUN_ENTRY_SIZE = struct.calcsize(ADDRESS_ID_RUN_ENTRY_FORMAT)
+
+
+def write_address_run(entries, run_path: str):
+    """
+    Writes (encoded address, record index) entries, sorted, to a run file.
+    """
+    with open(run_path, "wb", buffering=1 << 20) as file:
+        for address, record_index in entries:
+            file.write(struct.pack(ADDRESS_RUN_ENTRY_FORMAT, record_index, len(address)) + address)
+
+
+def read_address_run(run_path: str):
+    with open(run_path, "rb", buffering=1 << 20) as file:
+        while True:
+            header = file.read(ADDRESS_RUN_ENTRY_SIZE)
+            if not header:
+                break
+            record_index, address_length = struct.unpack(ADDRESS_RUN_ENTRY_FORMAT, header)
+            yield file.read(address_length), record_index
+
+
+def write_address_id_run(entries, run_path: str):
+    """
+    Writes (record index, address id) entries, sorted, to a run file.
+    """
+    with open(run_path, "wb", buffering=1 << 20) as file:
+        for entry in entries:
+            file.write(struct.pack(ADDRESS_ID_RUN_ENTRY_FORMAT, *entry))
+
+
+def read_address_id_run(run_path: str):
+    with open(run_path, "rb", buffering=1 << 20) as file:
+        while True:
+            entry = file.read(ADDRESS_ID_RUN_ENTRY_SIZE)
+            if not entry:
+                break
+            yield struct.unpack(ADDRESS_ID_RUN_ENTRY_FORMAT, entry)
+
+
+class TxOutIndexWriter:
+    """
+    Builds a TxOutIndex file from unordered (txid, vout, address, amount) entries.
+
+    Entries are buffered and spilled to sorted run files of `run_size` records, which are k-way merged
+    into the final file by `finish`. Addresses are deduplicated the same way, by sorting them on disk,
+    so memory use is bounded by the run size however many distinct addresses there are.
+    Runs produced elsewhere (see write_run) can be merged in with `add_run`.
+    When the same (txid, vout) is added twice the entry with the highest sequence number wins.
+    """
+
+    def __init__(self, path: str, run_size: int = 5_000_000, tmp_dir: str = None):
+        self.path = path
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir or os.path.dirname(os.path.abspath(path))
+        self._buffer = []
+        self._run_paths = []
+        self._sequence = 0
+
+    def add(self, txid: str, vout: int, address: str, amount: int, sequence: int = None):
+        if sequence is None:
+            sequence = self._sequence
+            self._sequence += 1
+        self._buffer.append((encode_key(txid, vout), sequence, int(amount), address))
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def add_many(self, entries: Iterable[Tuple[str, int, str, int]]):
+        for txid, vout, address, amount in entries:
+            self.add(txid, vout, address, amount)
+
+    def add_run(self, run_path: str):
+        # the run file is owned, and removed, by the writer from now on
+        self._run_paths.append(run_path)
+
+    def _make_tmp_path(self, prefix: str) -> str:
+        fd, tmp_path = tempfile.mkstemp(prefix=prefix, dir=self.tmp_dir)
+        os.close(fd)
+        self._run_paths.append(tmp_path)
+        return tmp_path
+
+    def _spill(self):
+        if not self._buffer:
+            return
+        self._buffer.sort()
+        write_run(self._buffer, self._make_tmp_path("tx_out_run_"))
+        self._buffer = []
+
+    def _spill_sorted(self, entries: list, write, prefix: str, run_paths: list):
+        entries.sort()
+        run_path = self._make_tmp_path(prefix)
+        write(entries, run_path)
+        run_paths.append(run_path)
+        entries.clear()
+
+    def _remove(self, run_paths: list):
+        for run_path in run_paths:
+            os.remove(run_path)
+            self._run_paths.remove(run_path)
+
+    def _merge_runs(self):
+        # yields (key, amount, address) in key order, the entry with the highest sequence of every key
+        pending = None
+        for entry in heapq.merge(*[read_run(run_path) for run_path in list(self._run_paths)]):
+            if pending is not None and pending[0] != entry[0]:
+                yield pending[0], pending[2], pending[3]
+            pending = entry
+        if pending is not None:
+            yield pending[0], pending[2], pending[3]
+
+    def finish(self):
+        self._spill()
+        start_time = time.time()
+        entry_run_paths = list(self._run_paths)
+
+        bucket_counts = [0] * BUCKET_COUNT
+        buckets_offset = HEADER_SIZE
+        records_offset = buckets_offset + (BUCKET_COUNT + 1) * 8
+        record_count = 0
+        address_count = 0
+
+        try:
+            # 1. keys and amounts of the records in key order, their addresses spilled sorted by address
+            records_path = self._make_tmp_path("tx_out_records_")
+            address_run_paths = []
+            addresses = []
+            with open(records_path, "wb", buffering=1 << 20) as records_file:
+                for key, amount, address in self._merge_runs():
+                    records_file.write(key + struct.pack("<q", amount))
+                    bucket_counts[(key[0] << 8) | key[1]] += 1
+                    addresses.append((address.encode("utf-8"), record_count))
+                    record_count += 1
+                    if len(addresses) >= self.run_size:
+                        self._spill_sorted(addresses, write_address_run, "tx_out_addresses_", address_run_paths)
+            if addresses:
+                self._spill_sorted(addresses, write_address_run, "tx_out_addresses_", address_run_paths)
+            self._remove(entry_run_paths)
+
+            # 2. every distinct address stored once, with the next id, and the ids spilled sorted by record
+            address_offsets_path = self._make_tmp_path("tx_out_address_offsets_")
+            address_data_path = self._make_tmp_path("tx_out_address_data_")
+            address_id_run_paths = []
+            address_ids = []
+            with open(address_offsets_path, "wb", buffering=1 << 20) as offsets_file, \
+                    open(address_data_path, "wb", buffering=1 << 20) as data_file:
+                offsets_file.write(struct.pack("<Q", 0))
+                data_size = 0
+                previous_address = None
+                for address, record_index in heapq.merge(*[read_address_run(run_path) for run_path in address_run_paths]):
+                    if address != previous_address:
+                        data_file.write(address)
+                        data_size += len(address)
+                        offsets_file.write(struct.pack("<Q", data_size))
+                        address_count += 1
+                        previous_address = address
+                    address_ids.append((record_index, address_count - 1))
+                    if len(address_ids) >= self.run_size:
+                        self._spill_sorted(address_ids, write_address_id_run, "tx_out_address_ids_", address_id_run_paths)
+            if address_ids:
+                self._spill_sorted(address_ids, write_address_id_run, "tx_out_address_ids_", address_id_run_paths)
+            self._remove(address_run_paths)
+
+            # 3. the records completed with their address id, then the address table
+            with open(self.path, "wb") as file:
+                file.seek(records_offset)
+                with open(records_path, "rb", buffering=1 << 20) as records_file:
+                    for _, address_id in heapq.merge(*[read_address_id_run(run_path) for run_path in address_id_run_paths]):
+                        record = records_file.read(KEY_SIZE + 8)
+                        file.write(record[:KEY_SIZE] + struct.pack("<I", address_id) + record[KEY_SIZE:])
+
+                address_offsets_offset = records_offset + record_count * RECORD_SIZE
+                address_data_offset = address_offsets_offset + (address_count + 1) * 8
+                for tmp_path in (address_offsets_path, address_data_path):
+                    with open(tmp_path, "rb") as tmp_file:
+                        shutil.copyfileobj(tmp_file, file, 1 << 20)
+
+                buckets = [0]
+                for count in bucket_counts:
+                    buckets.append(buckets[-1] + count)
+                file.seek(0)
+                file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, record_count, address_count, buckets_offset,
+                                       records_offset, address_offsets_offset, address_data_offset))
+                file.write(struct.pack(f"<{len(buckets)}Q", *buckets))
+        finally:
+            for run_path in self._run_paths:
+                os.remove(run_path)
+            self._run_paths = []
+
+        logger.info(f"Wrote tx_out index", path=self.path, records=record_count, addresses=address_count, time_taken=time.time() - start_time)
+        return record_count
+
+
+def convert_pickles(pickle_paths, output_path: str, run_size: int = 5_000_000):
+    """
+    Converts tx_out hash table pickles (see BitcoinNode.load_tx_out_hash_table) into a TxOutIndex file.
+    Pickles are loaded one at a time, so only one of them is held in memory during the conversion.
+    """
+    writer = TxOutIndexWriter(output_path, run_size=run_size)
+    for pickle_path in pickle_paths:
+        logger.info(f"Converting tx_out hash table pickle", pickle_path=pickle_path)
+        with open(pickle_path, "rb") as file:
+            hash_table = pickle.load(file)
+        for sub_table in hash_table.values():
+            for (txid, vout), (address, amount) in sub_table.items():
+                writer.add(txid, int(vout), address, int(amount))
+        del hash_table
+    return writer.finish()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        logger.info("Usage: python -m src.subnet.validator.nodes.bitcoin.tx_out_index <output_path> <pickle_file> [<pickle_file> ...]")
+        sys.exit(1)
+
+    convert_pickles(sys.argv[2:], sys.argv[1])
@@ -0,0 +1,147 @@
+"""
+Builds the tx_out index (see tx_out_index.py) straight from bitcoind's blocks/blk*.dat files.
+
+Every worker process of the pool reads a contiguous range of blk files from local disk, deserializes
+the blocks with raw_block.py and writes its outputs as a sorted run; the runs are then merged into
+the final index. No RPC calls are made, so bitcoind can keep running (or be stopped) during a build.
+
+Usage: python -m src.subnet.validator.nodes.bitcoin.tx_out_index_builder <blocks_dir> <output_path> [<workers>]
+"""
+import glob
+import os
+import struct
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from loguru import logger
+
+from .raw_block import parse_block, classify_script, SCRIPT_TYPE_NONSTANDARD, SCRIPT_TYPE_NULLDATA
+from .tx_out_index import TxOutIndexWriter, encode_key, write_run
+
+MAINNET_MAGIC = bytes.fromhex("f9beb4d9")
+# sequence numbers are (file number << FILE_SEQUENCE_SHIFT) + position, so later blk files win duplicates
+FILE_SEQUENCE_SHIFT = 40
+
+
+def list_block_files(blocks_dir: str):
+    return sorted(glob.glob(os.path.join(blocks_dir, "blk[0-9]*.dat")))
+
+
+def read_xor_key(blocks_dir: str) -> bytes:
+    # Bitcoin Core 28+ obfuscates the block files with the key stored in blocks/xor.dat
+    xor_path = os.path.join(blocks_dir, "xor.dat")
+    if not os.path.exists(xor_path):
+        return b""
+    with open(xor_path, "rb") as file:
+        key = file.read()
+    return b"" if not any(key) else key
+
+
+def read_block_file(path: str, xor_key: bytes = b"") -> bytes:
+    with open(path, "rb") as file:
+        data = file.read()
+    if xor_key:
+        key_stream = (xor_key * (len(data) // len(xor_key) + 1))[:len(data)]
+        data = (int.from_bytes(data, "little") ^ int.from_bytes(key_stream, "little")).to_bytes(len(data), "little")
+    return data
+
+
+def iterate_blocks(data: bytes, magic: bytes = MAINNET_MAGIC):
+    """
+    Yields the serialized blocks of a blk file. Files are preallocated, so a run of zero bytes
+    (or anything that is not a block record) ends the file.
+    """
+    view = memoryview(data)
+    offset = 0
+    while offset + 8 <= len(data):
+        if view[offset: offset + 4] != magic:
+            break
+        size = struct.unpack_from("<I", data, offset + 4)[0]
+        offset += 8
+        if offset + size > len(data):
+            break
+        yield view[offset: offset + size]
+        offset += size
+
+
+def iterate_tx_outs(block):
+    """
+    Yields (txid, vout, address, amount) for the outputs of a serialized block that the indexer keeps,
+    i.e. everything except nonstandard and nulldata outputs.
+    """
+    _, transactions = parse_block(block)
+    for tx in transactions:
+        for n, (value, script) in enumerate(tx.vouts):
+            script_type, address = classify_script(script)
+            if script_type in (SCRIPT_TYPE_NONSTANDARD, SCRIPT_TYPE_NULLDATA):
+                continue
+            yield tx.txid, n, address, value
+
+
+def build_runs(block_files, first_file_number: int, tmp_dir: str, xor_key: bytes = b"", magic: bytes = MAINNET_MAGIC, run_size: int = 5_000_000):
+    """
+    Worker entry point: turns a range of blk files into sorted run files, returns their paths.
+    """
+    run_paths = []
+    buffer = []
+
+    def spill():
+        buffer.sort()
+        fd, run_path = tempfile.mkstemp(prefix="tx_out_run_", dir=tmp_dir)
+        os.close(fd)
+        write_run(buffer, run_path)
+        run_paths.append(run_path)
+        buffer.clear()
+
+    for file_number, path in enumerate(block_files, start=first_file_number):
+        start_time = time.time()
+        sequence = file_number << FILE_SEQUENCE_SHIFT
+        blocks = 0
+        for block in iterate_blocks(read_block_file(path, xor_key), magic):
+            blocks += 1
+            for txid, vout, address, amount in iterate_tx_outs(block):
+                buffer.append((encode_key(txid, vout), sequence, amount, address))
+                sequence += 1
+            if len(buffer) >= run_size:
+                spill()
+        logger.info(f"Indexed block file", path=path, blocks=blocks, time_taken=time.time() - start_time)
+
+    if buffer:
+        spill()
+    return run_paths
+
+
+def build_tx_out_index(blocks_dir: str, output_path: str, workers: int = None, files_per_task: int = 4, magic: bytes = MAINNET_MAGIC, run_size: int = 5_000_000):
+    start_time = time.time()
+    block_files = list_block_files(blocks_dir)
+    if not block_files:
+        raise ValueError(f"No blk*.dat files found in {blocks_dir}")
+
+    xor_key = read_xor_key(blocks_dir)
+    tmp_dir = os.path.dirname(os.path.abspath(output_path))
+    writer = TxOutIndexWriter(output_path, tmp_dir=tmp_dir)
+
+    logger.info(f"Building tx_out index from block files", blocks_dir=blocks_dir, block_files=len(block_files), workers=workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(build_runs, block_files[i: i + files_per_task], i, tmp_dir, xor_key, magic, run_size)
+            for i in range(0, len(block_files), files_per_task)
+        ]
+        for future in futures:
+            for run_path in future.result():
+                writer.add_run(run_path)
+
+    record_count = writer.finish()
+    logger.info(f"Built tx_out index", output_path=output_path, records=record_count, time_taken=time.time() - start_time)
+    return record_count
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        logger.info("Usage: python -m src.subnet.validator.nodes.bitcoin.tx_out_index_builder <blocks_dir> <output_path> [<workers>]")
+        sys.exit(1)
+
+    build_tx_out_index(sys.argv[1], sys.argv[2], workers=int(sys.argv[3]) if len(sys.argv) > 3 else None)
@@ -1,8 +1,13 @@
+import threading
+
 from src.subnet.protocol.blockchain import NETWORK_BITCOIN
 from src.subnet.validator.nodes.bitcoin.node import BitcoinNode
 
 
 class NodeFactory:
+    _shared_nodes = {}
+    _shared_nodes_lock = threading.Lock()
+
     @classmethod
     def create_node(cls, network: str):
         node_class = {
@@ -13,4 +18,27 @@ class NodeFactory:
         if node_class is None:
             raise ValueError(f"Unsupported network: {network}")
 
-        return node_class()
\ No newline at end of file
+        return node_class()
+
+    @classmethod
+    def get_shared_node(cls, network: str):
+        """
+        Returns the process-wide node of a network, creating it on first use. Nodes are safe for concurrent
+        readers, so every generator thread and the validator share one node and its tx_out index / hash table
+        instead of loading their own copy.
+        """
+        # held while the node is created, so concurrent callers wait for the first load instead of repeating it
+        with cls._shared_nodes_lock:
+            node = cls._shared_nodes.get(network)
+            if node is None:
+                node = cls.create_node(network)
+                cls._shared_nodes[network] = node
+            return node
+
+    @classmethod
+    def close_shared_nodes(cls):
+        with cls._shared_nodes_lock:
+            nodes = list(cls._shared_nodes.values())
+            cls._shared_nodes.clear()
+        for node in nodes:
+            node.close()
\ No newline at end of file
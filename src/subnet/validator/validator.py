@@ -9,25 +9,26 @@ from typing import cast, Dict
 
 from communex.client import CommuneClient  # type: ignore
 from communex.misc import get_map_modules
-from communex.module.client import ModuleClient  # type: ignore
 from communex.module.module import Module  # type: ignore
 from communex.types import Ss58Address  # type: ignore
 from loguru import logger
 from substrateinterface import Keypair  # type: ignore
 from ._config import ValidatorSettings
 
+from .challenge_sampler import ChallengeSampler
+from .challenge_scheduler import ChallengeScheduler, MinerChallengeRun
 from .database.models.challenge_balance_tracking import ChallengeBalanceTrackingManager
 from .database.models.challenge_funds_flow import ChallengeFundsFlowManager
 from .database.models.validation_prompt_response import ValidationPromptResponseManager
 from .encryption import generate_hash
 from .helpers import raise_exception_if_not_registered, get_ip_port, cut_to_max_allowed_weights
 from .llm.base_llm import BaseLLM
-from .nodes.factory import NodeFactory
+from .module_client_pool import ModuleClientPool
 from .weights_storage import WeightsStorage
 from src.subnet.validator.database.models.miner_discovery import MinerDiscoveryManager
 from src.subnet.validator.database.models.miner_receipts import MinerReceiptManager, ReceiptMinerRank
-from src.subnet.protocol.llm_engine import LlmQueryRequest, LlmMessage, Challenge, LlmMessageList, ChallengesResponse, \
-    ChallengeMinerResponse, LlmMessageOutputList, MODEL_TYPE_FUNDS_FLOW
+from src.subnet.protocol.llm_engine import LlmQueryRequest, LlmMessage, Challenge, LlmMessageList, \
+    ChallengeMinerResponse, LlmMessageOutputList, MODEL_TYPE_FUNDS_FLOW, MODEL_TYPE_BALANCE_TRACKING
 from src.subnet.protocol.blockchain import Discovery
 from src.subnet.validator.database.models.validation_prompt import ValidationPromptManager
 
@@ -50,6 +51,8 @@ class Validator(Module):
             query_timeout: int = 60,
             llm_query_timeout: int = 60,
             challenge_timeout: int = 60,
+            module_client_pool_size: int = 512,
+            module_client_idle_timeout: int = 600,
 
     ) -> None:
         super().__init__()
@@ -69,6 +72,8 @@ class Validator(Module):
         self.validation_prompt_response_manager = validation_prompt_response_manager
         self.challenge_funds_flow_manager = challenge_funds_flow_manager
         self.challenge_balance_tracking_manager = challenge_balance_tracking_manager
+        self.module_client_pool = ModuleClientPool(key, max_clients=module_client_pool_size, idle_timeout=module_client_idle_timeout)
+        self.challenge_sampler = None  # ChallengeSampler of the current validation step
 
     @staticmethod
     def get_addresses(client: CommuneClient, netuid: int) -> dict[int, str]:
@@ -79,48 +84,68 @@ class Validator(Module):
                 modules_adresses[id] = f'0.0.0.0:{port}'
         return modules_adresses
 
-    async def _challenge_miner(self, miner_info):
+    def get_phase_timeouts(self, settings: ValidatorSettings) -> dict:
+        # the miner calls have their own timeouts, the phase timeouts also bound the database work around them
+        phase_timeouts = {
+            'discovery': self.challenge_timeout + 5,
+            'funds_flow': self.challenge_timeout + 5,
+            'balance_tracking': self.challenge_timeout + 5,
+            'prompt': self.llm_query_timeout + 10,
+            'validation': self.llm_query_timeout + 10,
+        }
+        phase_timeouts.update(settings.CHALLENGE_PHASE_TIMEOUTS)
+        return phase_timeouts
+
+    async def _challenge_miner(self, run: MinerChallengeRun):
         start_time = time.time()
+        miner_key = None
         try:
-            connection, miner_metadata = miner_info
+            connection, miner_metadata = run.miner_info
             module_ip, module_port = connection
             miner_key = miner_metadata['key']
-            client = ModuleClient(module_ip, int(module_port), self.key)
+            client = await self.module_client_pool.get(module_ip, int(module_port))
 
             logger.info(f"Challenging miner", miner_key=miner_key)
 
             # Discovery Phase
-            discovery = await self._get_discovery(client, miner_key)
+            discovery = await run.phase('discovery', self._get_discovery(client, miner_key))
             if not discovery:
                 return None
 
-            logger.debug(f"Got discovery for miner", miner_key=miner_key)
+            logger.debug(f"Got discovery for miner", miner_key=miner_key, max_concurrent_requests=discovery.max_concurrent_requests)
 
-            # Challenge Phase
-            node = NodeFactory.create_node(discovery.network)
-            challenge_response = await self._perform_challenges(client, miner_key, discovery, node)
-            if not challenge_response:
-                return None
-
-            # Prompt Phase
-            validation_prompt_id, validation_prompt, validation_prompt_model_type, validation_prompt_responses = await self.validation_prompt_manager.get_random_prompt(discovery.network)
+            # Challenge and Prompt Phases
+            return await self._perform_challenges(run, client, miner_key, discovery)
+        except Exception as e:
+            logger.error(f"Failed to challenge miner", error=e, miner_key=miner_key)
+            return None
+        finally:
+            end_time = time.time()
+            execution_time = end_time - start_time
+            logger.info(f"Execution time for challenge_miner", execution_time=execution_time, miner_key=miner_key)
 
-            if not validation_prompt:
-                logger.error("Failed to get a random validation prompt")
-                return None
+    async def _perform_challenges(self, run: MinerChallengeRun, client, miner_key, discovery) -> ChallengeMinerResponse | None:
+        """
+        Sends the funds flow challenge, the balance tracking challenge and the prompt, as many at once as the
+        miner's discovery allows (in this order one at a time for miners that don't advertise a capacity).
 
-            # Assuming you use the prompt in LLM message creation
-            llm_message_list = LlmMessageList(messages=[LlmMessage(type=0, content=validation_prompt)])
+        The requests still running are cancelled once the score is final: a failed request scores 0, and so
+        do two wrong challenge answers, whatever the prompt returns.
+        """
+        semaphore = asyncio.Semaphore(max(1, discovery.max_concurrent_requests))
 
-            # Send the prompt and get the miner's query response
-            prompt_result_actual = await self._send_prompt(client, miner_key, llm_message_list)
+        async def send(name, request, *args):
+            async with semaphore:
+                return await run.phase(name, request(*args))
 
+        async def prompt_and_validate():
+            prompt_result_actual, validation_prompt_id, validation_prompt, validation_prompt_responses = await send('prompt', self._get_prompt_result, client, miner_key, discovery.network)
             if not prompt_result_actual:
                 return None
 
             logger.info(f"Prompt result received")
 
-            validation_result = await self.validate_query_by_prompt(
+            return await run.phase('validation', self.validate_query_by_prompt(
                 validation_prompt_id=validation_prompt_id,
                 validation_prompt=validation_prompt,
                 miner_key=miner_key,
@@ -129,23 +154,65 @@ class Validator(Module):
                 network=discovery.network,
                 prompt_responses=validation_prompt_responses,
                 llm=self.llm
-            )
+            ))
 
-            return ChallengeMinerResponse(
-                network=discovery.network,
-                funds_flow_challenge_actual=challenge_response.funds_flow_challenge_actual,
-                funds_flow_challenge_expected=challenge_response.funds_flow_challenge_expected,
-                balance_tracking_challenge_actual=challenge_response.balance_tracking_challenge_actual,
-                balance_tracking_challenge_expected=challenge_response.balance_tracking_challenge_expected,
-                query_validation_result=validation_result
-            )
-        except Exception as e:
-            logger.error(f"Failed to challenge miner", error=e, miner_key=miner_key)
-            return None
+        challenge_tasks = {
+            asyncio.ensure_future(send('funds_flow', self._perform_funds_flow_challenge, client, miner_key, discovery.network)): MODEL_TYPE_FUNDS_FLOW,
+            asyncio.ensure_future(send('balance_tracking', self._perform_balance_tracking_challenge, client, miner_key, discovery.network)): MODEL_TYPE_BALANCE_TRACKING,
+        }
+        prompt_task = asyncio.ensure_future(prompt_and_validate())
+        tasks = [*challenge_tasks, prompt_task]
+
+        challenge_results = {}
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    result = task.result()
+                    if result is None:
+                        # a failed request scores 0 whatever the others return
+                        return None
+                    if task is prompt_task:
+                        continue
+
+                    challenge_results[challenge_tasks[task]] = result
+                    if len(challenge_results) == len(challenge_tasks):
+                        # scored if the step deadline passes before the prompt phase completes; the model
+                        # normalizes the answers and the expected values as for scoring
+                        run.partial_result = ChallengeMinerResponse(
+                            network=discovery.network,
+                            funds_flow_challenge_actual=challenge_results[MODEL_TYPE_FUNDS_FLOW][0],
+                            funds_flow_challenge_expected=challenge_results[MODEL_TYPE_FUNDS_FLOW][1],
+                            balance_tracking_challenge_actual=challenge_results[MODEL_TYPE_BALANCE_TRACKING][0],
+                            balance_tracking_challenge_expected=challenge_results[MODEL_TYPE_BALANCE_TRACKING][1],
+                        )
+                        if run.partial_result.get_failed_challenges() == len(challenge_tasks) and not prompt_task.done():
+                            logger.debug(f"Miner failed every challenge, cancelling the prompt", miner_key=miner_key)
+                            prompt_task.cancel()
         finally:
-            end_time = time.time()
-            execution_time = end_time - start_time
-            logger.info(f"Execution time for challenge_miner", execution_time=execution_time, miner_key=miner_key)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        query_validation_result = None if prompt_task.cancelled() else prompt_task.result()
+        return run.partial_result.model_copy(update={'query_validation_result': query_validation_result})
+
+    async def _get_prompt_result(self, client, miner_key, network):
+        validation_prompt_id, validation_prompt, validation_prompt_model_type, validation_prompt_responses = await self.challenge_sampler.get_prompt(network, miner_key)
+
+        if not validation_prompt:
+            logger.error("Failed to get a random validation prompt")
+            return None, None, None, None
+
+        # Assuming you use the prompt in LLM message creation
+        llm_message_list = LlmMessageList(messages=[LlmMessage(type=0, content=validation_prompt)])
+
+        # Send the prompt and get the miner's query response
+        prompt_result_actual = await self._send_prompt(client, miner_key, llm_message_list)
+        return prompt_result_actual, validation_prompt_id, validation_prompt, validation_prompt_responses
 
     async def _get_discovery(self, client, miner_key) -> Discovery:
         try:
@@ -161,10 +228,9 @@ class Validator(Module):
             logger.info(f"Miner failed to get discovery", miner_key=miner_key)
             return None
 
-    async def _perform_challenges(self, client, miner_key, discovery, node) -> ChallengesResponse | None:
+    async def _perform_funds_flow_challenge(self, client, miner_key, network) -> tuple[str, str] | None:
         try:
-            # Funds flow challenge
-            funds_flow_challenge, tx_id = await self.challenge_funds_flow_manager.get_random_challenge(discovery.network)
+            funds_flow_challenge, tx_id = await self.challenge_sampler.get_funds_flow_challenge(network, miner_key)
             funds_flow_challenge = Challenge.model_validate_json(funds_flow_challenge)
             funds_flow_challenge = await client.call(
                 "challenge",
@@ -174,9 +240,14 @@ class Validator(Module):
             )
             funds_flow_challenge = Challenge(**funds_flow_challenge)
             logger.debug(f"Funds flow challenge result",  funds_flow_challenge_output=funds_flow_challenge.output, miner_key=miner_key)
+            return funds_flow_challenge.output['tx_id'], tx_id
+        except Exception as e:
+            logger.error(f"Miner failed to perform funds flow challenge", error=e, miner_key=miner_key)
+            return None
 
-            # Balance tracking challenge
-            balance_tracking_challenge, balance_tracking_expected_response = await self.challenge_balance_tracking_manager.get_random_challenge(discovery.network)
+    async def _perform_balance_tracking_challenge(self, client, miner_key, network) -> tuple[int, str] | None:
+        try:
+            balance_tracking_challenge, balance_tracking_expected_response = await self.challenge_sampler.get_balance_tracking_challenge(network, miner_key)
             balance_tracking_challenge = Challenge.model_validate_json(balance_tracking_challenge)
             balance_tracking_challenge = await client.call(
                 "challenge",
@@ -186,15 +257,9 @@ class Validator(Module):
             )
             balance_tracking_challenge = Challenge(**balance_tracking_challenge)
             logger.debug(f"Balance tracking challenge result", balance_tracking_challenge_output=balance_tracking_challenge.output, miner_key=miner_key)
-
-            return ChallengesResponse(
-                funds_flow_challenge_actual=funds_flow_challenge.output['tx_id'],
-                funds_flow_challenge_expected=tx_id,
-                balance_tracking_challenge_actual=balance_tracking_challenge.output['balance'],
-                balance_tracking_challenge_expected=balance_tracking_expected_response,
-            )
+            return balance_tracking_challenge.output['balance'], balance_tracking_expected_response
         except Exception as e:
-            logger.error(f"Miner failed to perform challenges", error=e, miner_key=miner_key)
+            logger.error(f"Miner failed to perform balance tracking challenge", error=e, miner_key=miner_key)
             return None
 
     async def validate_query_by_prompt(self, validation_prompt_id: int, validation_prompt: str, miner_key: str, miner_query: str, result: str, network: str, prompt_responses: list, llm) -> bool:
@@ -214,7 +279,8 @@ class Validator(Module):
                 return True
 
         # logger.info("No cached query found, using LLM for validation")
-        validation_result = llm.validate_query_by_prompt(validation_prompt, miner_query, network)
+        # the llm client blocks, in a thread it doesn't hold up the other miners of the step
+        validation_result = await asyncio.to_thread(llm.validate_query_by_prompt, validation_prompt, miner_query, network)
 
         # Store the result from LLM in the cache for future use
         if isinstance(result, (list, dict)):
@@ -302,13 +368,25 @@ class Validator(Module):
         for _, miner_metadata in miners_module_info.values():
             await self.miner_discovery_manager.update_miner_rank(miner_metadata['key'], miner_metadata['emission'])
 
-        challenge_tasks = []
-        for uid, miner_info in miners_module_info.items():
-            challenge_tasks.append(self._challenge_miner(miner_info))
-
-        responses: tuple[ChallengeMinerResponse] = await asyncio.gather(*challenge_tasks)
+        # the challenge and prompt pools are loaded once for the step
+        self.challenge_sampler = ChallengeSampler(
+            self.challenge_funds_flow_manager,
+            self.challenge_balance_tracking_manager,
+            self.validation_prompt_manager,
+            settings.CHALLENGE_ASSIGNMENT,
+            settings.CHALLENGE_COHORTS,
+            settings.CHALLENGE_SAMPLE_SIZE,
+        )
+        scheduler = ChallengeScheduler(
+            settings.CHALLENGE_CONCURRENCY,
+            self.get_phase_timeouts(settings),
+            settings.CHALLENGE_STEP_TIMEOUT or settings.ITERATION_INTERVAL,
+        )
+        responses: dict[int, ChallengeMinerResponse] = await scheduler.run(miners_module_info, self._challenge_miner)
+        logger.info(f"Module client pool", **self.module_client_pool.get_stats())
 
-        for uid, miner_info, response in zip(miners_module_info.keys(), miners_module_info.values(), responses):
+        for uid, miner_info in miners_module_info.items():
+            response = responses[uid]
             if not response:
                 score_dict[uid] = 0
                 continue
@@ -374,22 +452,25 @@ class Validator(Module):
         logger.info("Set weights", action="set_weight", timestamp=datetime.utcnow().isoformat(), weighted_scores=weighted_scores)
 
     async def validation_loop(self, settings: ValidatorSettings) -> None:
-        while not self.terminate_event.is_set():
-            start_time = time.time()
-            await self.validate_step(self.netuid, settings)
-            if self.terminate_event.is_set():
-                logger.info("Terminating validation loop")
-                break
-
-            elapsed = time.time() - start_time
-            if elapsed < settings.ITERATION_INTERVAL:
-                sleep_time = settings.ITERATION_INTERVAL - elapsed
-                logger.info(f"Sleeping for {sleep_time}")
-                self.terminate_event.wait(sleep_time)
+        try:
+            while not self.terminate_event.is_set():
+                start_time = time.time()
+                await self.validate_step(self.netuid, settings)
                 if self.terminate_event.is_set():
                     logger.info("Terminating validation loop")
                     break
 
+                elapsed = time.time() - start_time
+                if elapsed < settings.ITERATION_INTERVAL:
+                    sleep_time = settings.ITERATION_INTERVAL - elapsed
+                    logger.info(f"Sleeping for {sleep_time}")
+                    self.terminate_event.wait(sleep_time)
+                    if self.terminate_event.is_set():
+                        logger.info("Terminating validation loop")
+                        break
+        finally:
+            await self.module_client_pool.close()
+
     """ VALIDATOR API METHODS"""
     async def query_miner(self, request: LlmQueryRequest) -> dict:
         request_id = str(uuid.uuid4())
@@ -452,7 +533,7 @@ class Validator(Module):
         miner_network = miner['network']
         module_ip = miner['miner_address']
         module_port = int(miner['miner_ip_port'])
-        module_client = ModuleClient(module_ip, module_port, self.key)
+        module_client = await self.module_client_pool.get(module_ip, module_port)
         try:
             llm_query_result = await module_client.call(
                 "llm_query",
@@ -170,7 +170,9 @@ if __name__ == "__main__":
         llm,
         query_timeout=settings.QUERY_TIMEOUT,
         challenge_timeout=settings.CHALLENGE_TIMEOUT,
-        llm_query_timeout=settings.LLM_QUERY_TIMEOUT
+        llm_query_timeout=settings.LLM_QUERY_TIMEOUT,
+        module_client_pool_size=settings.MODULE_CLIENT_POOL_SIZE,
+        module_client_idle_timeout=settings.MODULE_CLIENT_IDLE_TIMEOUT
     )
 
     app = FastAPI(
@@ -181,6 +183,7 @@ if __name__ == "__main__":
 
     validator_api = ValidatorApi(validator)
     app.include_router(validator_api.router)
+    app.add_event_handler("shutdown", validator.module_client_pool.close)
     app.add_middleware(RateLimiterMiddleware, redis_url=settings.REDIS_URL, max_requests=settings.API_RATE_LIMIT,
                             window_seconds=60)
 